@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Archive compaction — packs archived inbox items and old role logs into monthly bundles.
+
+Sources (per vault):
+    agent/inbox/<role>/archive/*       items older than ARCHIVE_INBOX_DAYS (by mtime),
+                                       bundled by the month of their mtime
+    agent/logs/<role>/YYYY-MM-DD.md    logs older than ARCHIVE_LOG_DAYS, bundled by the month in
+                                       their name (agent/logs/summaries/ is never compacted)
+
+Bundles live under <vault>/.archive/, mirroring the source directory:
+
+    .archive/agent/inbox/delivery/archive/2026-09.bundle.gz
+    .archive/agent/inbox/delivery/archive/2026-09.index.json
+
+A bundle is a multi-member gzip file: every item is compressed as its own
+member, so `zcat` still prints them all, while the index records each item's
+offset and compressed length (plus mtime, size, title and frontmatter). One
+item is read with a single seek and a small decompress. Compaction appends to
+the month's bundle, replaces the index atomically and only then deletes the
+originals; bytes past the last indexed item (an interrupted run) are cut off
+before the next append. An item whose name is already in the month's bundle
+(a later file of the same name) is stored as `<stem>.<mtime><ext>`, so no
+earlier version is lost.
+
+Dot-directories are skipped by the context loader, the vault index and the
+watcher, so the live directories stay small without hiding anything from
+the runner. Roles look history up with two tools available in every session
+(`archive_search`, `archive_read`; an in-process MCP server).
+
+Usage:
+    python3 archive.py                                  # Compact the default vault now
+    python3 archive.py --dry-run                        # Show what would be packed
+    python3 archive.py --search "vendor delay"          # Search the bundle indexes
+    python3 archive.py --read agent/inbox/delivery/archive/2026-09 note.md
+    python3 archive.py --vault acme ...                 # ... for another configured vault
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+
+import config
+import frontmatter
+
+ARCHIVE_DIR = ".archive"
+INBOX_ROOT = os.path.join("agent", "inbox")
+LOGS_ROOT = os.path.join("agent", "logs")
+KEEP_LOG_DIRS = frozenset({"summaries"})
+TITLE_CHARS = 120
+SEARCH_LIMIT = 20
+TOOL_NAMES = ["mcp__archive__archive_search", "mcp__archive__archive_read"]
+
+_DAY_LOG_RE = re.compile(r"^(\d{4}-\d{2})-\d{2}\.md$")
+_HEADING_RE = re.compile(r"^#+\s+(.+)$", re.MULTILINE)
+
+_lock = threading.Lock()  # one compaction at a time per process
+
+
+@dataclass(slots=True)
+class Report:
+    files: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    bundles: set[str] = field(default_factory=set)
+
+    def __str__(self) -> str:
+        size = f", {self.bytes_in} bytes"
+        if self.bytes_out:
+            size = f", {self.bytes_in} → {self.bytes_out} bytes"
+        return f"{self.files} file(s) into {len(self.bundles)} bundle(s){size}"
+
+
+def _root(vault_path: str) -> str:
+    return os.path.join(vault_path, ARCHIVE_DIR)
+
+
+def _bundle_paths(vault_path: str, bundle: str) -> tuple[str, str]:
+    """(bundle file, index file) for a bundle id "<source dir>/<YYYY-MM>"."""
+    base = os.path.normpath(os.path.join(_root(vault_path), bundle))
+    if not base.startswith(_root(vault_path) + os.sep):
+        raise ValueError(f"Not an archive bundle: {bundle}")
+    return base + ".bundle.gz", base + ".index.json"
+
+
+def _title(text: str) -> str:
+    match = _HEADING_RE.search(text)
+    if match:
+        return match.group(1).strip()[:TITLE_CHARS]
+    body = text.split("\n---", 1)[-1] if text.startswith("---") else text
+    for line in body.splitlines():
+        line = line.strip()
+        if line and line != "---":
+            return line[:TITLE_CHARS]
+    return ""
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def load_index(vault_path: str, bundle: str) -> dict[str, dict]:
+    """{item name: entry} of a bundle ({} if it does not exist yet)."""
+    _, index_path = _bundle_paths(vault_path, bundle)
+    try:
+        with open(index_path) as f:
+            return {item["name"]: item for item in json.load(f)["items"]}
+    except FileNotFoundError:
+        return {}
+
+
+def _save_index(index_path: str, items: dict[str, dict]):
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": 1, "items": sorted(items.values(), key=lambda i: (i["mtime"], i["name"]))}, f)
+    os.replace(tmp, index_path)
+
+
+def bundles(vault_path: str) -> list[str]:
+    """Every bundle id ("<source dir>/<YYYY-MM>") in a vault, sorted."""
+    root = _root(vault_path)
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for fn in filenames:
+            if fn.endswith(".index.json"):
+                found.append(os.path.relpath(os.path.join(dirpath, fn[: -len(".index.json")]), root))
+    return sorted(found)
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+def _sources(vault_path: str) -> list[tuple[str, str]]:
+    """(vault-relative directory, kind) of every compactable directory."""
+    found = []
+    for root, kind in ((INBOX_ROOT, "inbox"), (LOGS_ROOT, "logs")):
+        try:
+            entries = sorted(os.scandir(os.path.join(vault_path, root)), key=lambda e: e.name)
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            if kind == "inbox":
+                rel = os.path.join(root, entry.name, "archive")
+                if os.path.isdir(os.path.join(vault_path, rel)):
+                    found.append((rel, kind))
+            elif entry.name not in KEEP_LOG_DIRS:
+                found.append((os.path.join(root, entry.name), kind))
+    return found
+
+
+def _candidates(vault_path: str, rel_dir: str, kind: str, now: float) -> dict[str, list[tuple[str, os.stat_result]]]:
+    """Files of one source directory that are old enough, grouped by bundle month."""
+    cutoff = now - config.ARCHIVE_INBOX_DAYS * 86400
+    cutoff_day = datetime.fromtimestamp(now, timezone.utc).date() - timedelta(days=config.ARCHIVE_LOG_DAYS)
+    months: dict[str, list[tuple[str, os.stat_result]]] = {}
+    with os.scandir(os.path.join(vault_path, rel_dir)) as it:
+        for entry in it:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            st = entry.stat()
+            if kind == "inbox":
+                if st.st_mtime >= cutoff:
+                    continue
+                month = datetime.fromtimestamp(st.st_mtime, timezone.utc).strftime("%Y-%m")
+            else:
+                match = _DAY_LOG_RE.match(entry.name)
+                if not match or date.fromisoformat(entry.name[:10]) >= cutoff_day:
+                    continue
+                month = match.group(1)
+            months.setdefault(month, []).append((entry.name, st))
+    return months
+
+
+def _unique_name(items: dict, name: str, mtime: float) -> str:
+    """`name`, or `name` with the item's mtime (and a counter if needed) when the bundle already holds it."""
+    if name not in items:
+        return name
+    stem, ext = os.path.splitext(name)
+    candidate = f"{stem}.{int(mtime)}{ext}"
+    n = 1
+    while candidate in items:
+        candidate = f"{stem}.{int(mtime)}-{n}{ext}"
+        n += 1
+    return candidate
+
+
+def _pack(vault_path: str, rel_dir: str, month: str, files: list[tuple[str, os.stat_result]], report: Report):
+    bundle = os.path.join(rel_dir, month)
+    bundle_path, index_path = _bundle_paths(vault_path, bundle)
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    items = load_index(vault_path, bundle)
+    end = max((i["offset"] + i["length"] for i in items.values()), default=0)
+
+    packed = []
+    mode = "r+b" if os.path.exists(bundle_path) else "wb"
+    with open(bundle_path, mode) as out:
+        out.truncate(end)  # drop an unindexed tail left by an interrupted run
+        out.seek(end)
+        for name, st in sorted(files, key=lambda f: (f[1].st_mtime, f[0])):
+            path = os.path.join(vault_path, rel_dir, name)
+            try:
+                with open(path, "rb") as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                continue  # moved or deleted meanwhile
+            member = gzip.compress(raw, compresslevel=9, mtime=int(st.st_mtime))
+            text = raw.decode("utf-8", errors="replace")
+            stored = _unique_name(items, name, st.st_mtime)
+            items[stored] = {
+                "name": stored,
+                "offset": out.tell(),
+                "length": len(member),
+                "size": len(raw),
+                "mtime": st.st_mtime,
+                "title": _title(text),
+                "fields": frontmatter.parse(text),
+            }
+            out.write(member)
+            packed.append(path)
+            report.bytes_in += len(raw)
+            report.bytes_out += len(member)
+        out.flush()
+        os.fsync(out.fileno())
+    _save_index(index_path, items)
+
+    for path in packed:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    report.files += len(packed)
+    report.bundles.add(bundle)
+
+
+def compact(vault_path: str | None = None, dry_run: bool = False, now: float | None = None) -> Report:
+    """Pack every old enough archived inbox item and role log of a vault (default: the current one)."""
+    vault_path = vault_path or config.vault().path
+    now = time.time() if now is None else now
+    report = Report()
+    with _lock:
+        for rel_dir, kind in _sources(vault_path):
+            for month, files in sorted(_candidates(vault_path, rel_dir, kind, now).items()):
+                if dry_run:
+                    report.files += len(files)
+                    report.bytes_in += sum(st.st_size for _, st in files)
+                    report.bundles.add(os.path.join(rel_dir, month))
+                    continue
+                _pack(vault_path, rel_dir, month, files, report)
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Lookup
+# ---------------------------------------------------------------------------
+
+def read(vault_path: str, bundle: str, name: str) -> str:
+    """The text of one item of a bundle. Raises KeyError if the bundle has no such item."""
+    item = load_index(vault_path, bundle).get(name)
+    if item is None:
+        raise KeyError(f"{name} is not in {bundle}")
+    bundle_path, _ = _bundle_paths(vault_path, bundle)
+    with open(bundle_path, "rb") as f:
+        f.seek(item["offset"])
+        return gzip.decompress(f.read(item["length"])).decode("utf-8", errors="replace")
+
+
+def search(vault_path: str, query: str = "", source: str = "", limit: int = SEARCH_LIMIT) -> list[dict]:
+    """Items whose name, title or frontmatter contain every word of `query`, newest first.
+
+    `source` limits the search to bundles whose id contains it (e.g. "inbox/delivery",
+    "logs/risk" or "2026-09").
+    """
+    terms = query.lower().split()
+    hits = []
+    for bundle in bundles(vault_path):
+        if source and source.lower() not in bundle.lower():
+            continue
+        for item in load_index(vault_path, bundle).values():
+            haystack = " ".join([item["name"], item["title"], *item["fields"].values()]).lower()
+            if all(term in haystack for term in terms):
+                hits.append({"bundle": bundle, **{k: v for k, v in item.items() if k not in ("offset", "length")}})
+    hits.sort(key=lambda h: h["mtime"], reverse=True)
+    return hits[:limit]
+
+
+def _format_hit(hit: dict) -> str:
+    when = datetime.fromtimestamp(hit["mtime"], timezone.utc).strftime("%Y-%m-%d")
+    fields = ", ".join(f"{k}: {v}" for k, v in hit["fields"].items() if k in ("from", "to", "priority", "status"))
+    return f"{when}  {hit['bundle']}  {hit['name']}  — {hit['title']}" + (f"  ({fields})" if fields else "")
+
+
+def mcp_server(vault_path: str):
+    """In-process MCP server with the archive_search and archive_read tools, bound to one vault."""
+    from claude_agent_sdk import create_sdk_mcp_server, tool
+
+    @tool("archive_search", "Search archived inbox items and old role logs (packed into monthly bundles) by "
+          "words in their file name, title or frontmatter. `source` narrows to bundles whose id contains it, "
+          "e.g. 'inbox/delivery', 'logs/risk' or '2026-09'. Empty query lists the newest items.",
+          {"query": str, "source": str})
+    async def archive_search(args):
+        hits = await asyncio.to_thread(search, vault_path, args.get("query", ""), args.get("source", ""))
+        text = "\n".join(_format_hit(h) for h in hits) or "No archived items match."
+        return {"content": [{"type": "text", "text": text}]}
+
+    @tool("archive_read", "Read one archived item: pass the bundle id and item name from archive_search.",
+          {"bundle": str, "name": str})
+    async def archive_read(args):
+        try:
+            text = await asyncio.to_thread(read, vault_path, args["bundle"], args["name"])
+        except (KeyError, ValueError, OSError) as e:
+            return {"content": [{"type": "text", "text": f"Not found: {e}"}], "is_error": True}
+        return {"content": [{"type": "text", "text": text}]}
+
+    return create_sdk_mcp_server("archive", tools=[archive_search, archive_read])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact and search vault archives")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be packed")
+    parser.add_argument("--search", type=str, default=None, help="Search bundle indexes (words, all must match)")
+    parser.add_argument("--source", type=str, default="", help="Limit --search to bundles whose id contains this")
+    parser.add_argument("--read", nargs=2, metavar=("BUNDLE", "NAME"), help="Print one archived item")
+    parser.add_argument("--vault", type=str, default=None, help="Vault name (default: the first configured vault)")
+    args = parser.parse_args()
+
+    vault_path = (config.get_vault(args.vault) if args.vault else config.vault()).path
+    if args.read:
+        print(read(vault_path, *args.read))
+    elif args.search is not None:
+        for hit in search(vault_path, args.search, args.source, limit=100):
+            print(_format_hit(hit))
+    else:
+        t = time.perf_counter()
+        report = compact(vault_path, dry_run=args.dry_run)
+        verb = "Would pack" if args.dry_run else "Packed"
+        print(f"{verb} {report} in {(time.perf_counter() - t) * 1000:.0f} ms")
+        for bundle in sorted(report.bundles):
+            print(f"  {bundle}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Benchmarks for the runner: synthetic vault generator, fake Agent SDK, benchmark suite.
+
+    python3 -m bench.run --sizes 10 1000 100000 --json results.json
+"""
@@ -0,0 +1,64 @@
+"""Local stand-in for claude_agent_sdk.query with scripted latency.
+
+`FakeAgent` is an async-generator function with the same call shape as
+`query(prompt=..., options=...)`. It yields real SDK message types so the
+runner's message handling, session bookkeeping and log verification all run
+unchanged — only the network and the Claude Code subprocess are replaced.
+
+Each call:
+  1. waits `startup_s` (subprocess start / first byte),
+  2. emits `turns` AssistantMessages `turn_s` apart; every turn except the
+     last carries a ToolUseBlock, the first one appends a run section to the
+     role's log file (like the real agent's mandatory first Edit),
+  3. emits a ResultMessage with the scripted cost.
+"""
+
+import asyncio
+import os
+import re
+from dataclasses import dataclass, field
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+
+_LOG_PATH_RE = re.compile(r"agent/logs/[^/\s]+/\d{4}-\d{2}-\d{2}\.md")
+
+
+@dataclass
+class FakeAgent:
+    startup_s: float = 0.05
+    turns: int = 3
+    turn_s: float = 0.02
+    cost_usd: float = 0.01
+    error: Exception | None = None  # raised after startup, e.g. a rate-limit error
+    calls: list[dict] = field(default_factory=list)
+
+    async def __call__(self, prompt: str, options):
+        self.calls.append({"prompt_chars": len(prompt), "model": options.model, "resume": options.resume})
+        n = len(self.calls)
+        await asyncio.sleep(self.startup_s)
+        if self.error is not None:
+            raise self.error
+
+        session_id = options.resume or f"fake-session-{n}"
+        match = _LOG_PATH_RE.search(prompt)
+        for turn in range(self.turns):
+            if turn:
+                await asyncio.sleep(self.turn_s)
+            content = [TextBlock(text=f"turn {turn + 1} of {self.turns}")]
+            if turn < self.turns - 1:
+                content.append(ToolUseBlock(id=f"tool-{n}-{turn}", name="Edit", input={}))
+            if turn == 0 and match and options.cwd:
+                with open(os.path.join(options.cwd, match.group(0)), "a") as f:
+                    f.write(f"\n## Run (benchmark call {n})\n")
+            yield AssistantMessage(content=content, model=options.model or "sonnet", session_id=session_id)
+
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=int((self.startup_s + self.turn_s * max(self.turns - 1, 0)) * 1000),
+            duration_api_ms=0,
+            is_error=False,
+            num_turns=self.turns,
+            session_id=session_id,
+            total_cost_usd=self.cost_usd,
+            usage={"input_tokens": len(prompt) // 4, "output_tokens": 200},
+        )
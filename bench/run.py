@@ -0,0 +1,254 @@
+"""Runner benchmark suite.
+
+Generates synthetic vaults at several sizes and measures the runner's hot
+paths against them, with the Agent SDK replaced by bench.fake_sdk:
+
+    load_role_context (cold)   vault cache emptied before every call; files fetched concurrently
+    load_role_context (serial) the same with VAULT_IO_THREADS=1, one file after another
+    load_role_context (warm)   unchanged files served from the cache
+    load_role_context (retr.)  warm, narrowed to the files most relevant to the role's inbox
+    build_role_message         context + inbox + message assembly
+    check_all_inboxes          answered-question routing + inbox scan for every role
+    route_answered_questions   routing a fresh batch of answered questions
+    scheduler throughput       end-to-end role runs/second through the worker pool
+
+Usage:
+    python3 -m bench.run                                  # sizes 10, 100, 1000, 10000
+    python3 -m bench.run --sizes 10 1000 100000 --json results.json
+    python3 -m bench.run --io-latency-ms 2                # emulate a network-mounted vault
+    python3 -m bench.run --compare before.json after.json
+
+Results are keyed by (size, benchmark) and stamped with the git commit, so
+JSON files from different commits can be compared with --compare.
+"""
+
+import argparse
+import asyncio
+import builtins
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import ratelimit  # noqa: E402
+import retrieval  # noqa: E402
+import run_store  # noqa: E402
+import transcripts  # noqa: E402
+import vault_index  # noqa: E402
+from bench import vaultgen  # noqa: E402
+from bench.fake_sdk import FakeAgent  # noqa: E402
+from vault_cache import cache  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+
+def use_workspace(root: str, roles_dir: str, vault: str):
+    """Point config (and every cache keyed on it) at a generated workspace."""
+    sessions = os.path.join(root, ".sessions")
+    config.ROLES_DIR = roles_dir
+    config.METRICS_DIR = os.path.join(root, "metrics")
+    config.TRANSCRIPTS_DIR = os.path.join(root, "transcripts")
+    config.set_vaults([config.make_vault("bench", vault, sessions_dir=sessions)])
+    run_store._stores.clear()
+    vault_index._indexes.clear()
+    retrieval._indexes.clear()
+    cache.invalidate()
+
+
+@contextlib.contextmanager
+def io_latency(seconds: float):
+    """Delay every stat(), scandir() and open() by `seconds`, like a round trip to a network mount.
+
+    The delay sleeps (releasing the GIL), so concurrent calls overlap as they would on real storage.
+    """
+    if seconds <= 0:
+        yield
+        return
+    originals = os.stat, os.scandir, builtins.open
+
+    def slow(fn):
+        def call(*args, **kwargs):
+            time.sleep(seconds)
+            return fn(*args, **kwargs)
+        return call
+
+    os.stat, os.scandir, builtins.open = (slow(fn) for fn in originals)
+    try:
+        yield
+    finally:
+        os.stat, os.scandir, builtins.open = originals
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return {
+        "n": repeat,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+def bench_size(runner, size: int, repeat: int, rounds: int, concurrency: int, latency_s: float = 0.0) -> list[dict]:
+    root = tempfile.mkdtemp(prefix=f"tpm-bench-{size}-")
+    try:
+        spec = vaultgen.VaultSpec.for_total_files(size)
+        roles_dir, vault = vaultgen.generate(root, spec)
+        use_workspace(root, roles_dir, vault)
+        names = config.list_roles()
+        role_cfg = config.load_role(names[0])
+        results = []
+
+        def add(name: str, stats: dict):
+            results.append({"size": size, "files": spec.total_files(), "bench": name, **stats})
+            print(f"  {size:>7} files  {name:<28} median {stats['median_ms']:>10.3f} ms  "
+                  f"min {stats['min_ms']:>10.3f} ms", flush=True)
+
+        def cold_load(threads: int):
+            saved, config.VAULT_IO_THREADS = config.VAULT_IO_THREADS, threads
+            try:
+                with io_latency(latency_s):
+                    return measure(lambda: runner.load_role_context(role_cfg), repeat, setup=cache.invalidate)
+            finally:
+                config.VAULT_IO_THREADS = saved
+
+        add("load_role_context_cold", cold_load(config.VAULT_IO_THREADS))
+        add("load_role_context_cold_serial", cold_load(1))
+        add("load_role_context_warm", measure(lambda: runner.load_role_context(role_cfg), repeat))
+        trigger = runner.check_inbox(role_cfg)
+        add("load_role_context_retrieval", measure(lambda: runner.load_role_context(role_cfg, trigger), repeat))
+        full_chars = len(runner.load_role_context(role_cfg))
+        narrowed_chars = len(runner.load_role_context(role_cfg, trigger))
+        print(f"  {size:>7} files  context chars: {full_chars} full, {narrowed_chars} with retrieval "
+              f"(inbox-triggered)", flush=True)
+        add("build_role_message", measure(lambda: runner.build_role_message(role_cfg), repeat))
+
+        async def noop(role_name: str, reason: str):
+            return None
+
+        async def scan_once():
+            pool = runner.RolePool(noop, concurrency)
+            await runner.check_all_inboxes(pool)
+            await pool.join()
+
+        add("check_all_inboxes", measure(lambda: asyncio.run(scan_once()), repeat))
+        add("route_answered_questions", measure(
+            runner.route_answered_questions, repeat,
+            setup=lambda: vaultgen.write_answered(vault, names, spec.answered, seed=spec.seed),
+        ))
+
+        # End-to-end: every role runs `rounds` times through the pool with a scripted agent
+        agent = FakeAgent(startup_s=0.02, turns=3, turn_s=0.01)
+        original_query = runner.query
+        runner.query = agent
+        ratelimit.limiter.rate = 0  # measure the runner, not the SDK call budget
+        try:
+            async def throughput() -> float:
+                pool = runner.make_pool()
+                pool.max_concurrent = concurrency
+                pool.debounce = 0
+                t = time.perf_counter()
+                for _ in range(rounds):
+                    for name in names:
+                        pool.submit(name, "benchmark")
+                    await pool.join()
+                return time.perf_counter() - t
+
+            elapsed = asyncio.run(throughput())
+        finally:
+            runner.query = original_query
+        runs = rounds * len(names)
+        stats = {"n": runs, "min_ms": round(elapsed * 1000 / runs, 3), "median_ms": round(elapsed * 1000 / runs, 3),
+                 "mean_ms": round(elapsed * 1000 / runs, 3), "runs_per_s": round(runs / elapsed, 2)}
+        add("scheduler_per_run", stats)
+        return results
+    finally:
+        transcripts.flush()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"before: {before['meta'].get('commit', '?')[:10]}  after: {after['meta'].get('commit', '?')[:10]}")
+    old = {(r["size"], r["bench"]): r for r in before["results"]}
+    for r in after["results"]:
+        o = old.get((r["size"], r["bench"]))
+        if not o:
+            continue
+        ratio = r["median_ms"] / o["median_ms"] if o["median_ms"] else float("inf")
+        print(f"  {r['size']:>7}  {r['bench']:<28} {o['median_ms']:>10.3f} → {r['median_ms']:>10.3f} ms  "
+              f"x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runner benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Approximate vault sizes (files)")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per micro-benchmark")
+    parser.add_argument("--rounds", type=int, default=3, help="Scheduler rounds (each runs every role once)")
+    parser.add_argument("--concurrency", type=int, default=config.MAX_CONCURRENT_RUNS)
+    parser.add_argument("--io-latency-ms", type=float, default=0,
+                        help="Added to every file system call of the cold context loads (emulates a network mount)")
+    parser.add_argument("--json", type=str, default=None, help="Write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    import runner  # imported late: it sets up logging on import
+    logging.getLogger("tpm-runner").setLevel(logging.WARNING)
+
+    meta = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "rounds": args.rounds,
+        "concurrency": args.concurrency,
+        "io_latency_ms": args.io_latency_ms,
+        "vault_io_threads": config.VAULT_IO_THREADS,
+    }
+    print(f"Benchmarking commit {meta['commit'][:10] or '?'}{' (dirty)' if meta['dirty'] else ''}")
+    results = []
+    for size in args.sizes:
+        results += bench_size(runner, size, args.repeat, args.rounds, args.concurrency, args.io_latency_ms / 1000)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Synthetic vault generator for benchmarks.
+
+Builds a workspace with a roles/ directory and a vault laid out like
+vaults/peaklogistics: project files, blockers, traffic lights, per-role
+inboxes (with archive/), answered questions, memory files and logs.
+
+    python3 -m bench.vaultgen /tmp/bench-vault --files 10000
+"""
+
+import argparse
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+_WORDS = (
+    "shipment carrier supplier dashboard auth deploy latency schema migration "
+    "reservation timeline blocker risk mitigation owner client scope budget "
+    "review approval integration api endpoint release staging production"
+).split()
+
+PRIORITIES = ("low", "medium", "high")
+
+
+@dataclass
+class VaultSpec:
+    roles: int = 4
+    context_files: int = 6  # plain files under project/
+    blockers: int = 10
+    traffic_lights: int = 4
+    inbox_items: int = 2  # per role
+    archive_entries: int = 20  # per role
+    answered: int = 2
+    log_days: int = 3  # per role
+    file_bytes: int = 600
+    seed: int = 7
+
+    @classmethod
+    def for_total_files(cls, total: int, roles: int = 4, seed: int = 7) -> "VaultSpec":
+        """Spread roughly `total` files over the vault in realistic proportions.
+
+        Archives dominate large vaults; live context and inboxes stay small.
+        """
+        total = max(total, 10)
+        per_role = max(total // roles, 1)
+        return cls(
+            roles=roles,
+            context_files=max(2, total // 50),
+            blockers=max(1, total // 25),
+            traffic_lights=max(1, total // 100),
+            inbox_items=max(1, per_role // 100),
+            archive_entries=max(1, int(per_role * 0.8)),
+            answered=max(1, total // 200),
+            log_days=max(1, min(per_role // 20, 365)),
+            seed=seed,
+        )
+
+    def total_files(self) -> int:
+        per_role = self.inbox_items + self.archive_entries + self.log_days + 2  # + role .md + memory
+        return self.context_files + self.blockers + self.traffic_lights + self.answered + 1 + self.roles * per_role
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        w = rng.choice(_WORDS)
+        words.append(w)
+        length += len(w) + 1
+    lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+    return "\n".join(lines) + "\n"
+
+
+def _frontmatter(**fields) -> str:
+    return "---\n" + "".join(f"{k}: {v}\n" for k, v in fields.items()) + "---\n\n"
+
+
+def _write(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def role_names(spec: VaultSpec) -> list[str]:
+    return [f"role{i:02d}" for i in range(spec.roles)]
+
+
+def _role_md(name: str, i: int) -> str:
+    schedules = ["Every 30 minutes, weekdays", "9am and 5pm, weekdays", "10am, weekdays", "On-demand"]
+    return f"""# Role {name}
+
+## Model
+sonnet
+
+## Mission
+Synthetic benchmark role {name}.
+
+## Goals
+- Track synthetic work
+- Surface synthetic risks
+
+## Context Files
+- project/scope.md
+- project/timeline.md
+- project/blockers/
+- project/traffic-lights/
+- project/notes/
+- memory.md
+- agent/memory/{name}.md
+
+## Tools
+- Read
+- Write
+- Edit
+
+## Schedule
+{schedules[i % len(schedules)]}
+
+## Inbox
+agent/inbox/{name}/
+
+## User Preferences
+(No preferences configured yet.)
+"""
+
+
+def generate(root: str, spec: VaultSpec) -> tuple[str, str]:
+    """Create <root>/roles and <root>/vault. Returns (roles_dir, vault_path)."""
+    rng = random.Random(spec.seed)
+    roles_dir = os.path.join(root, "roles")
+    vault = os.path.join(root, "vault")
+    now = datetime.now(timezone.utc)
+    names = role_names(spec)
+
+    for i, name in enumerate(names):
+        _write(os.path.join(roles_dir, f"{name}.md"), _role_md(name, i))
+
+    _write(os.path.join(vault, "CLAUDE.md"), "# Synthetic vault\n\n" + _text(rng, 2000))
+    _write(os.path.join(vault, "memory.md"), "# Memory\n\n" + _text(rng, spec.file_bytes))
+    _write(os.path.join(vault, "project", "scope.md"), "# Scope\n\n" + _text(rng, spec.file_bytes))
+    _write(os.path.join(vault, "project", "timeline.md"), "# Timeline\n\n" + _text(rng, spec.file_bytes))
+    for n in range(max(spec.context_files - 2, 0)):
+        _write(os.path.join(vault, "project", "notes", f"note-{n:05d}.md"), _text(rng, spec.file_bytes))
+    for n in range(spec.blockers):
+        body = _frontmatter(id=f"blocker-{n:05d}", priority=rng.choice(PRIORITIES), status="open",
+                            date=(now - timedelta(hours=n)).strftime("%Y-%m-%dT%H:%M:%SZ"))
+        _write(os.path.join(vault, "project", "blockers", f"blocker-{n:05d}.md"), body + _text(rng, spec.file_bytes))
+    for n in range(spec.traffic_lights):
+        _write(os.path.join(vault, "project", "traffic-lights", f"tl-{n:04d}.md"), _text(rng, spec.file_bytes))
+
+    for name in names:
+        inbox = os.path.join(vault, "agent", "inbox", name)
+        os.makedirs(os.path.join(inbox, "archive"), exist_ok=True)
+        for n in range(spec.inbox_items):
+            write_trigger(os.path.join(inbox, f"trigger-{n:05d}.md"), rng, frm=rng.choice(names),
+                          date=now - timedelta(minutes=n), size=spec.file_bytes // 2)
+        for n in range(spec.archive_entries):
+            write_trigger(os.path.join(inbox, "archive", f"old-{n:06d}.md"), rng, frm=rng.choice(names),
+                          date=now - timedelta(hours=n), size=spec.file_bytes // 2)
+        _write(os.path.join(vault, "agent", "memory", f"{name}.md"), "# Memory\n\n" + _text(rng, spec.file_bytes))
+        for d in range(spec.log_days):
+            day = (now - timedelta(days=d + 1)).strftime("%Y-%m-%d")
+            log = f"# {name} Log — {day}\n\n"
+            for h in (9, 13, 17):
+                log += f"## Run {h:02d}:00 (scheduled)\n\n### Inbox\n- empty\n\n### What Changed\n{_text(rng, 300)}\n"
+            _write(os.path.join(vault, "agent", "logs", name, f"{day}.md"), log)
+
+    os.makedirs(os.path.join(vault, "agent", "inbox", "user", "answered"), exist_ok=True)
+    write_answered(vault, names, spec.answered, seed=spec.seed)
+    return roles_dir, vault
+
+
+def write_trigger(path: str, rng: random.Random, frm: str, date: datetime, size: int):
+    body = _frontmatter(**{"from": frm, "date": date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                           "priority": rng.choice(PRIORITIES)})
+    _write(path, body + _text(rng, size))
+
+
+def write_answered(vault: str, names: list[str], count: int, seed: int = 7):
+    """(Re)populate agent/inbox/user/answered/ with questions routed back to roles."""
+    rng = random.Random(seed)
+    answered = os.path.join(vault, "agent", "inbox", "user", "answered")
+    for n in range(count):
+        frm = names[n % len(names)]
+        qid = f"2026-01-01T00-00-q{n:05d}"
+        body = _frontmatter(id=qid, **{"from": frm}, to="user", date="2026-01-01T00:00:00Z", status="answered")
+        _write(os.path.join(answered, f"{qid}.md"), body + _text(rng, 200) + "\n## Answer\nyes\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic vault")
+    parser.add_argument("root", help="Output directory (roles/ and vault/ are created inside)")
+    parser.add_argument("--files", type=int, default=1000, help="Approximate total number of files")
+    parser.add_argument("--roles", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    spec = VaultSpec.for_total_files(args.files, roles=args.roles, seed=args.seed)
+    roles_dir, vault = generate(args.root, spec)
+    print(f"Generated {spec.total_files()} files: roles={roles_dir} vault={vault}")
+
+
+if __name__ == "__main__":
+    main()
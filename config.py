@@ -1,11 +1,25 @@
-"""Config — vault path + role config parser.
+"""Config — vaults + role config parser.
 
 Role configs are Markdown files in roles/ with structured sections.
-The parser extracts model, mission, goals, context files, tools, schedule, and inbox path.
+The parser extracts model, model routing, mission, goals, context files, tools, schedule, and inbox path.
+Parsed roles are held in a per-vault RoleRegistry and only re-parsed when their file changes.
+
+One runner can serve several vaults (VAULTS). Each Vault has its own role
+set (<vault>/roles/ if present, else the shared roles/ directory), its own
+run store and index under .sessions/<vault>/, and its own budgets (optional
+<vault>/runner.md). Code that works on one vault calls `vault()`, which
+returns the vault bound to the current task by `use_vault()` — the default
+(first) vault otherwise.
 """
 
+import contextvars
 import os
 import re
+import socket
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,91 +28,449 @@ load_dotenv()
 _DEFAULT_VAULT = os.path.join(os.path.dirname(__file__), "vaults", "peaklogistics")
 VAULT_PATH = os.path.expanduser(os.environ.get("VAULT_PATH", _DEFAULT_VAULT))
 
-# Roles directory (sibling to this file)
+# Several vaults served by one runner: comma-separated paths, optionally named ("acme=~/vaults/acme").
+# Unset = just VAULT_PATH.
+VAULTS = os.environ.get("VAULTS", "")
+
+# Shared roles directory (sibling to this file); a vault's own roles/ directory takes precedence
 ROLES_DIR = os.path.join(os.path.dirname(__file__), "roles")
 
 # Session tracking directory
 SESSIONS_DIR = os.path.join(os.path.dirname(__file__), ".sessions")
 
+# Run store (SQLite, WAL mode): session IDs, context manifests and run history
+RUN_STORE_PATH = os.path.expanduser(os.environ.get("RUN_STORE_PATH", os.path.join(SESSIONS_DIR, "runs.db")))
+
+# Vault metadata index (SQLite): parsed frontmatter of every item under agent/ and project/
+VAULT_INDEX_PATH = os.path.expanduser(os.environ.get("VAULT_INDEX_PATH", os.path.join(SESSIONS_DIR, "vault_index.db")))
+
+# Per-run metrics: runs.jsonl + a Prometheus textfile (tpm_runner.prom) for node_exporter
+METRICS_DIR = os.path.expanduser(os.environ.get("METRICS_DIR", os.path.join(os.path.dirname(__file__), "metrics")))
+
+# Runner log: logs/runner.log, written by a background thread; rotated once it reaches LOG_MAX_MB
+# or every LOG_ROTATE_HOURS (aligned to UTC midnight for 24), keeping LOG_BACKUPS old files
+LOG_DIR = os.path.expanduser(os.environ.get("LOG_DIR", os.path.join(os.path.dirname(__file__), "logs")))
+LOG_MAX_BYTES = int(float(os.environ.get("LOG_MAX_MB", "20")) * 1024 * 1024)
+LOG_ROTATE_HOURS = float(os.environ.get("LOG_ROTATE_HOURS", "24"))
+LOG_BACKUPS = int(os.environ.get("LOG_BACKUPS", "14"))
+
+# Per-run transcripts (transcripts.py): every SDK message, tool use, usage block and timing as
+# gzip-compressed JSONL under TRANSCRIPTS_DIR/<vault>/<role>/<date>/. Set TRANSCRIPTS=0 to disable.
+TRANSCRIPTS = os.environ.get("TRANSCRIPTS", "1") != "0"
+TRANSCRIPTS_DIR = os.path.expanduser(
+    os.environ.get("TRANSCRIPTS_DIR", os.path.join(os.path.dirname(__file__), "transcripts"))
+)
+
+# Maximum number of role runs (agent sessions) in flight at once, across all vaults.
+# A vault's runner.md ("## Max Concurrent Runs") can cap its own share.
+MAX_CONCURRENT_RUNS = int(os.environ.get("MAX_CONCURRENT_RUNS", "2"))
+
+# Archive compaction (archive.py): archived inbox items older than ARCHIVE_INBOX_DAYS and role logs
+# older than ARCHIVE_LOG_DAYS are packed into monthly bundles under <vault>/.archive/, every
+# ARCHIVE_COMPACT_HOURS (0 = only via `python3 archive.py`). ARCHIVE_TOOLS gives every role session
+# the archive_search / archive_read tools to look them up.
+ARCHIVE_INBOX_DAYS = float(os.environ.get("ARCHIVE_INBOX_DAYS", "30"))
+ARCHIVE_LOG_DAYS = float(os.environ.get("ARCHIVE_LOG_DAYS", "90"))
+ARCHIVE_COMPACT_HOURS = float(os.environ.get("ARCHIVE_COMPACT_HOURS", "24"))
+ARCHIVE_TOOLS = os.environ.get("ARCHIVE_TOOLS", "1") != "0"
+
+# Agent SDK rate limiting (ratelimit.py): query() calls from role runs and summaries share one token
+# bucket (0 = unlimited). A rate-limit error pauses all calls for RATE_LIMIT_COOLDOWN_SECONDS and,
+# with ADAPTIVE_CONCURRENCY, halves the pool's concurrency; every ADAPTIVE_RECOVERY_RUNS successful
+# calls give one slot back. The rate-limited run is retried with exponential backoff and jitter
+# (RETRY_BASE_SECONDS doubling up to RETRY_MAX_SECONDS), at most RETRY_MAX_ATTEMPTS times.
+SDK_CALLS_PER_MINUTE = float(os.environ.get("SDK_CALLS_PER_MINUTE", "30"))
+SDK_BURST = int(os.environ.get("SDK_BURST", "5"))
+RATE_LIMIT_COOLDOWN_SECONDS = float(os.environ.get("RATE_LIMIT_COOLDOWN_SECONDS", "30"))
+ADAPTIVE_CONCURRENCY = os.environ.get("ADAPTIVE_CONCURRENCY", "1") != "0"
+ADAPTIVE_RECOVERY_RUNS = int(os.environ.get("ADAPTIVE_RECOVERY_RUNS", "5"))
+RETRY_BASE_SECONDS = float(os.environ.get("RETRY_BASE_SECONDS", "60"))
+RETRY_MAX_SECONDS = float(os.environ.get("RETRY_MAX_SECONDS", "1800"))
+RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", "6"))
+
+# Distributed mode: runners on several nodes share one job queue (SQLite on storage every node can
+# lock). Unset = this process dispatches its own runs. Workers hold a lease on each claimed job and
+# renew it every third of JOB_LEASE_SECONDS; a crashed worker's jobs are re-queued once it expires.
+# Finished jobs are deleted after JOB_RETENTION_DAYS.
+JOB_QUEUE_PATH = os.path.expanduser(os.environ.get("JOB_QUEUE_PATH", ""))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "2"))
+JOB_RETENTION_DAYS = float(os.environ.get("JOB_RETENTION_DAYS", "7"))
+NODE_ID = os.environ.get("NODE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+# Inbox watcher: debounce window for bursts of writes, and the timed fallback
+# scan that catches anything the file watcher missed
+INBOX_DEBOUNCE_SECONDS = float(os.environ.get("INBOX_DEBOUNCE_SECONDS", "0.5"))
+INBOX_FALLBACK_SCAN_SECONDS = int(os.environ.get("INBOX_FALLBACK_SCAN_SECONDS", "300"))
+
+# Triggers for the same role within this window are coalesced into one run
+DISPATCH_DEBOUNCE_SECONDS = float(os.environ.get("DISPATCH_DEBOUNCE_SECONDS", "2"))
+
+# In-memory vault file cache budget (MB) used when assembling role context
+VAULT_CACHE_MAX_BYTES = int(float(os.environ.get("VAULT_CACHE_MB", "64")) * 1024 * 1024)
+
+# Threads that stat and read vault files concurrently while a prompt is assembled (1 = one at a time).
+# Worth raising on a network-mounted vault, where every stat() and read is a round trip.
+VAULT_IO_THREADS = int(os.environ.get("VAULT_IO_THREADS", "8"))
+
+# Resumed same-day sessions get only changed context files (set to 0 to always send everything)
+DELTA_CONTEXT = os.environ.get("DELTA_CONTEXT", "1") != "0"
+
+# Scheduled runs are skipped when nothing a role would see (role config, CLAUDE.md, context files,
+# inbox, memory file) changed since its last full run; a run is forced once the last full run is
+# older than SKIP_UNCHANGED_MAX_AGE_HOURS. Set SKIP_UNCHANGED_RUNS=0 to always run.
+SKIP_UNCHANGED_RUNS = os.environ.get("SKIP_UNCHANGED_RUNS", "1") != "0"
+SKIP_UNCHANGED_MAX_AGE_HOURS = float(os.environ.get("SKIP_UNCHANGED_MAX_AGE_HOURS", "24"))
+
+# Model routing (routing.py): pick each run's model from its inbox, context size and change, and the
+# role's recent outcomes, instead of always using the role's "## Model". Off unless MODEL_ROUTING=1.
+MODEL_ROUTING = os.environ.get("MODEL_ROUTING", "0") == "1"
+ROUTING_LIGHT_MAX_ITEMS = int(os.environ.get("ROUTING_LIGHT_MAX_ITEMS", "1"))
+ROUTING_LIGHT_MAX_CHANGED = float(os.environ.get("ROUTING_LIGHT_MAX_CHANGED", "0.1"))
+ROUTING_LIGHT_MAX_TOKENS = int(os.environ.get("ROUTING_LIGHT_MAX_TOKENS", "4000"))
+ROUTING_HEAVY_MIN_ITEMS = int(os.environ.get("ROUTING_HEAVY_MIN_ITEMS", "5"))
+ROUTING_HEAVY_MIN_TOKENS = int(os.environ.get("ROUTING_HEAVY_MIN_TOKENS", "60000"))
+ROUTING_HISTORY = int(os.environ.get("ROUTING_HISTORY", "10"))
+ROUTING_MAX_FAILURE_RATE = float(os.environ.get("ROUTING_MAX_FAILURE_RATE", "0.3"))
+
+# Default per-role context budget in estimated tokens (0 = unlimited).
+# A role's "## Context Budget" section overrides it.
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "0"))
+
+# Context and inbox files over this many estimated tokens are not read whole: the role gets their
+# head and tail plus a cached summary of the middle (see large_files.py). A role's
+# "## Large File Threshold" section overrides it. 0 = always send files whole.
+LARGE_FILE_TOKENS = int(os.environ.get("LARGE_FILE_TOKENS", "16000"))
+
+# Inbox-triggered runs: keep only the k files of each context directory that best match the
+# trigger contents (BM25). Files listed directly in Context Files are always sent. 0 = send everything.
+RETRIEVAL_TOP_K = int(os.environ.get("RETRIEVAL_TOP_K", "8"))
+
 
 # ---------------------------------------------------------------------------
 # Role config parser
 # ---------------------------------------------------------------------------
 
+_SECTION_RE = re.compile(r"^##[ \t]+(.+)$", re.MULTILINE)
+_TITLE_RE = re.compile(r"^#[ \t]+(.+)$", re.MULTILINE)
+_BUDGET_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(k)?\b", re.IGNORECASE)
+
+
 def _parse_sections(text: str) -> dict[str, str]:
     """Split a Markdown file into {section_name: content} by ## headers."""
     sections = {}
-    current = None
-    lines = []
-    for line in text.splitlines():
-        match = re.match(r"^##\s+(.+)$", line)
-        if match:
-            if current is not None:
-                sections[current] = "\n".join(lines).strip()
-            current = match.group(1).strip().lower()
-            lines = []
-        elif current is not None:
-            lines.append(line)
-    if current is not None:
-        sections[current] = "\n".join(lines).strip()
+    matches = list(_SECTION_RE.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections[match.group(1).strip().lower()] = text[match.end():end].strip()
     return sections
 
 
-def _parse_bullet_list(text: str) -> list[str]:
+def _parse_bullet_list(text: str) -> tuple[str, ...]:
     """Extract items from a Markdown bullet list."""
     items = []
     for line in text.splitlines():
         line = line.strip()
         if line.startswith("- "):
             items.append(line[2:].strip())
-    return items
+    return tuple(items)
+
+
+def _parse_budget(text: str) -> int | None:
+    """Parse a token budget like "20000 tokens" or "20k". None if not set, 0 if unlimited."""
+    text = text.strip().lower()
+    if not text:
+        return None
+    if text.startswith(("none", "unlimited")):
+        return 0
+    match = _BUDGET_RE.search(text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    if match.group(2):
+        value *= 1000
+    return int(value)
 
 
 def _parse_title(text: str) -> str:
     """Extract the # title from a Markdown file."""
-    for line in text.splitlines():
-        match = re.match(r"^#\s+(.+)$", line)
-        if match:
-            return match.group(1).strip()
-    return ""
+    match = _TITLE_RE.search(text)
+    return match.group(1).strip() if match else ""
 
 
-def load_role(role_name: str) -> dict:
-    """Load and parse a role config from roles/<role_name>.md.
+@dataclass(frozen=True, slots=True)
+class RoleConfig:
+    """A parsed roles/<name>.md file. Immutable; replaced when the file changes.
 
-    Returns a dict with keys:
-        name, display_name, model, mission, goals, context_files,
-        tools, schedule, inbox, preferences
+    Supports mapping-style access (role_cfg["model"]) as well as attributes.
     """
-    path = os.path.join(ROLES_DIR, f"{role_name}.md")
-    if not os.path.isfile(path):
-        raise FileNotFoundError(f"Role config not found: {path}")
 
-    with open(path) as f:
-        text = f.read()
+    name: str
+    display_name: str
+    model: str
+    routing: str
+    mission: str
+    goals: tuple[str, ...]
+    context_files: tuple[str, ...]
+    tools: tuple[str, ...]
+    schedule: str
+    inbox: str
+    preferences: str
+    context_budget: int | None
+    large_file_tokens: int | None
+    path: str
+    mtime_ns: int
+    size: int
 
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+
+def _parse_role(role_name: str, path: str, text: str, st: os.stat_result) -> RoleConfig:
     sections = _parse_sections(text)
+    return RoleConfig(
+        name=role_name,
+        display_name=_parse_title(text),
+        model=sections.get("model", "sonnet").strip(),
+        routing=sections.get("model routing", ""),
+        mission=sections.get("mission", ""),
+        goals=_parse_bullet_list(sections.get("goals", "")),
+        context_files=_parse_bullet_list(sections.get("context files", "")),
+        tools=_parse_bullet_list(sections.get("tools", "")),
+        schedule=sections.get("schedule", ""),
+        inbox=sections.get("inbox", "").strip(),
+        preferences=sections.get("user preferences", ""),
+        context_budget=_parse_budget(sections.get("context budget", "")),
+        large_file_tokens=_parse_budget(sections.get("large file threshold", "")),
+        path=path,
+        mtime_ns=st.st_mtime_ns,
+        size=st.st_size,
+    )
 
-    return {
-        "name": role_name,
-        "display_name": _parse_title(text),
-        "model": sections.get("model", "sonnet").strip(),
-        "mission": sections.get("mission", ""),
-        "goals": _parse_bullet_list(sections.get("goals", "")),
-        "context_files": _parse_bullet_list(sections.get("context files", "")),
-        "tools": _parse_bullet_list(sections.get("tools", "")),
-        "schedule": sections.get("schedule", ""),
-        "inbox": sections.get("inbox", "").strip(),
-        "preferences": sections.get("user preferences", ""),
-    }
 
+class RoleRegistry:
+    """Parses each roles/*.md once and re-parses only when the file changes.
 
-def list_roles() -> list[str]:
-    """Return names of all available roles (from .md files in roles/)."""
-    if not os.path.isdir(ROLES_DIR):
-        return []
-    return sorted(
-        os.path.splitext(f)[0]
-        for f in os.listdir(ROLES_DIR)
-        if f.endswith(".md")
+    Every lookup costs one os.stat(); the role list is re-read only when the
+    roles directory's mtime changes.
+    """
+
+    def __init__(self, roles_dir: str, vault_path: str):
+        self.roles_dir = roles_dir
+        self.vault_path = vault_path
+        self._roles: dict[str, RoleConfig] = {}
+        self._names: tuple[str, ...] = ()
+        self._dir_mtime_ns: int | None = None
+        self._lock = threading.Lock()
+
+    def names(self) -> list[str]:
+        """Return names of all available roles, sorted."""
+        try:
+            mtime_ns = os.stat(self.roles_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if mtime_ns != self._dir_mtime_ns:
+                self._names = tuple(sorted(
+                    os.path.splitext(f)[0]
+                    for f in os.listdir(self.roles_dir)
+                    if f.endswith(".md")
+                ))
+                self._dir_mtime_ns = mtime_ns
+                for stale in set(self._roles) - set(self._names):
+                    del self._roles[stale]
+            return list(self._names)
+
+    def get(self, role_name: str) -> RoleConfig:
+        path = os.path.join(self.roles_dir, f"{role_name}.md")
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._roles.pop(role_name, None)
+            raise FileNotFoundError(f"Role config not found: {path}") from None
+
+        with self._lock:
+            cached = self._roles.get(role_name)
+            if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+                return cached
+
+        with open(path) as f:
+            text = f.read()
+        role = _parse_role(role_name, path, text, st)
+        with self._lock:
+            self._roles[role_name] = role
+        return role
+
+    def all(self) -> list[RoleConfig]:
+        return [self.get(name) for name in self.names()]
+
+    def inbox_path(self, role_name: str) -> str:
+        """Absolute path to the role's inbox directory in the vault."""
+        return os.path.join(self.vault_path, self.get(role_name).inbox)
+
+    def inbox_paths(self) -> dict[str, str]:
+        return {name: self.inbox_path(name) for name in self.names()}
+
+    def schedules(self) -> dict[str, str]:
+        return {role.name: role.schedule for role in self.all()}
+
+
+# ---------------------------------------------------------------------------
+# Vaults
+# ---------------------------------------------------------------------------
+
+VAULT_SETTINGS_FILE = "runner.md"
+
+
+@dataclass(frozen=True, slots=True)
+class Vault:
+    """A project vault served by this runner, with its own roles, stores and budgets."""
+
+    name: str
+    path: str
+    project: str  # project name shown to roles
+    roles_dir: str
+    sessions_dir: str  # context blobs
+    run_store_path: str
+    index_path: str
+    max_concurrent_runs: int  # 0 = limited only by the shared pool (MAX_CONCURRENT_RUNS)
+    context_token_budget: int
+    registry: RoleRegistry
+
+    def key(self, role_name: str) -> str:
+        """Process-wide name of a role run ("<vault>/<role>"), used by the pool and scheduler."""
+        return f"{self.name}/{role_name}"
+
+
+def make_vault(
+    name: str,
+    path: str,
+    sessions_dir: str | None = None,
+    run_store_path: str | None = None,
+    index_path: str | None = None,
+) -> Vault:
+    """Build a Vault, reading budgets from <path>/runner.md if it exists.
+
+    runner.md sections (all optional):
+        ## Project                the project's name in role prompts (default: the vault name)
+        ## Max Concurrent Runs    this vault's share of the shared pool, e.g. 1 (default: no own cap)
+        ## Context Budget         default role context budget, e.g. 20k tokens
+    """
+    path = os.path.expanduser(path)
+    sessions_dir = sessions_dir or os.path.join(SESSIONS_DIR, name)
+    settings = {}
+    try:
+        with open(os.path.join(path, VAULT_SETTINGS_FILE)) as f:
+            settings = _parse_sections(f.read())
+    except FileNotFoundError:
+        pass
+    max_runs = re.search(r"\d+", settings.get("max concurrent runs", ""))
+    budget = _parse_budget(settings.get("context budget", ""))
+    own_roles = os.path.join(path, "roles")
+    roles_dir = own_roles if os.path.isdir(own_roles) else ROLES_DIR
+    return Vault(
+        name=name,
+        path=path,
+        project=settings.get("project", "").strip() or name,
+        roles_dir=roles_dir,
+        sessions_dir=sessions_dir,
+        run_store_path=run_store_path or os.path.join(sessions_dir, "runs.db"),
+        index_path=index_path or os.path.join(sessions_dir, "vault_index.db"),
+        max_concurrent_runs=int(max_runs.group()) if max_runs else 0,
+        context_token_budget=CONTEXT_TOKEN_BUDGET if budget is None else budget,
+        registry=RoleRegistry(roles_dir, path),
     )
+
+
+def _vault_name(path: str) -> str:
+    return os.path.basename(os.path.normpath(os.path.expanduser(path)))
+
+
+def _load_vaults() -> list[Vault]:
+    entries = [e.strip() for e in VAULTS.split(",") if e.strip()]
+    if not entries:
+        # Single-vault setup: keep the original store locations
+        return [make_vault(_vault_name(VAULT_PATH), VAULT_PATH, SESSIONS_DIR, RUN_STORE_PATH, VAULT_INDEX_PATH)]
+    vaults = []
+    for entry in entries:
+        name, sep, path = entry.partition("=")
+        if not sep:
+            name, path = _vault_name(entry), entry
+        vaults.append(make_vault(name.strip(), path.strip()))
+    return vaults
+
+
+_vaults: dict[str, Vault] = {}
+_current: contextvars.ContextVar[Vault | None] = contextvars.ContextVar("vault", default=None)
+
+
+def set_vaults(vaults: list[Vault]):
+    """Replace the set of served vaults. The first one is the default."""
+    names = [v.name for v in vaults]
+    if not vaults or len(set(names)) != len(names):
+        raise ValueError(f"Vault names must be unique and non-empty: {names}")
+    _vaults.clear()
+    _vaults.update((v.name, v) for v in vaults)
+
+
+def vaults() -> list[Vault]:
+    return list(_vaults.values())
+
+
+def get_vault(name: str) -> Vault:
+    try:
+        return _vaults[name]
+    except KeyError:
+        raise KeyError(f"Unknown vault: {name}. Available: {', '.join(_vaults)}") from None
+
+
+def vault() -> Vault:
+    """The vault the current task works on (see use_vault), else the default vault."""
+    current = _current.get()
+    return current if current is not None else next(iter(_vaults.values()))
+
+
+def bound_vault() -> Vault | None:
+    """The vault bound by use_vault() in this task, if any."""
+    return _current.get()
+
+
+@contextmanager
+def use_vault(v: Vault):
+    """Bind `v` as the current vault for this task (asyncio tasks inherit it)."""
+    token = _current.set(v)
+    try:
+        yield v
+    finally:
+        _current.reset(token)
+
+
+def split_key(key: str) -> tuple[Vault, str]:
+    """("<vault>/<role>") -> (Vault, role name). A bare role name refers to the current vault."""
+    name, _, role_name = key.rpartition("/")
+    return (get_vault(name) if name else vault()), role_name
+
+
+set_vaults(_load_vaults())
+
+
+def load_role(role_name: str) -> RoleConfig:
+    """Load a role config from the current vault's roles directory (cached in its registry).
+
+    The returned RoleConfig exposes (attribute or key access):
+        name, display_name, model, routing, mission, goals, context_files,
+        tools, schedule, inbox, preferences, context_budget, large_file_tokens
+    """
+    return vault().registry.get(role_name)
+
+
+def list_roles() -> list[str]:
+    """Return names of all roles available in the current vault."""
+    return vault().registry.names()
@@ -0,0 +1,289 @@
+"""Context assembly — collects a role's context files and renders them for the prompt.
+
+`collect()` resolves the role's Context Files entries (files and directories)
+into ContextSections, reading through the vault cache. `render()` produces the
+full "## Project Context" block.
+
+Delta mode: when a role resumes a session from earlier today, the model has
+already seen that session's context. The runner keeps a manifest of
+{vault-relative path: content digest} per session, and `render_delta()` sends
+only what was added, changed (as a unified diff) or deleted since then.
+Previous file contents are kept in a small content-addressed blob store so
+diffs can be computed.
+
+Budgets: `apply_budget()` caps the context at a per-role token budget
+(estimated at ~4 characters per token). Files are ranked by their position
+in the role's Context Files list (earlier = higher priority), then by their
+frontmatter (high `priority:` first, closed/resolved items last), then by most
+recently modified. Files that don't fit are truncated to the remaining
+budget or replaced with a stub telling the role to Read them if needed.
+
+Files over the role's large-file threshold are never read whole; they are
+sent as head + summary of the middle + tail (see large_files.py).
+"""
+
+import difflib
+import hashlib
+import os
+import stat
+from dataclasses import dataclass, field
+
+import config
+import frontmatter
+import large_files
+from vault_cache import cache
+
+
+CHARS_PER_TOKEN = 4
+MIN_TRUNCATED_TOKENS = 200  # below this, drop the file instead of sending a useless fragment
+OMITTED_NAMES_SHOWN = 30  # file names listed for directory files left out by retrieval
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass(slots=True)
+class ContextFile:
+    path: str  # vault-relative, e.g. project/blockers/api-auth.md
+    name: str  # label used in the prompt (file name inside a directory section)
+    text: str
+    digest: str
+    priority: int = 0  # index of the Context Files entry (lower = more important)
+    mtime_ns: int = 0
+    urgency: int = frontmatter.PRIORITY_RANK["medium"]  # frontmatter priority rank; -1 if closed
+
+
+@dataclass(slots=True)
+class ContextSection:
+    rel: str  # the Context Files entry, e.g. project/blockers/
+    is_dir: bool
+    files: list[ContextFile] = field(default_factory=list)
+    omitted: list[str] = field(default_factory=list)  # paths left out by retrieval (see retrieval.py)
+
+
+def collect(role_cfg) -> list[ContextSection]:
+    """Resolve a role's Context Files into sections, in config order.
+
+    Directories contribute their .md files (sorted), skipping archive/ and
+    other subdirectories, dotfiles and .gitkeep. Missing paths are skipped.
+    Oversized files come condensed (see large_files.py). Listings are
+    resolved first, then all files are fetched concurrently (cache.entries).
+    """
+    limit = large_file_limit(role_cfg)
+    sections = []
+    wanted: list[tuple[ContextSection, int, str, str, str]] = []  # (section, priority, path, name, full path)
+    for priority, rel in enumerate(role_cfg["context_files"]):
+        full = os.path.join(config.vault().path, rel)
+        try:
+            mode = os.stat(full).st_mode
+        except FileNotFoundError:
+            continue
+        if stat.S_ISREG(mode):
+            section = ContextSection(rel, False)
+            wanted.append((section, priority, os.path.normpath(rel), rel, full))
+        elif stat.S_ISDIR(mode):
+            section = ContextSection(rel, True)
+            for fn, is_file, is_dir in cache.list_dir(full):
+                if fn == ".gitkeep" or fn.startswith("."):
+                    continue
+                if is_dir or not is_file:
+                    continue  # skip archive/ and other subdirectories
+                if fn.endswith(".md"):
+                    wanted.append((section, priority, os.path.normpath(os.path.join(rel, fn)), fn,
+                                   os.path.join(full, fn)))
+        else:
+            continue
+        sections.append(section)
+
+    entries = cache.entries([w[4] for w in wanted], limit)
+    for (section, priority, path, name, _), entry in zip(wanted, entries):
+        text, digest = large_files.content(entry, path)
+        f = ContextFile(path, name, text, digest, priority, entry.sig.mtime_ns)
+        if section.is_dir:
+            f.urgency = _urgency(entry.text)
+        section.files.append(f)
+    return sections
+
+
+def _urgency(text: str) -> int:
+    fields = frontmatter.parse(text)
+    if fields.get("status", "").lower() in frontmatter.CLOSED_STATUSES:
+        return -1
+    return frontmatter.priority_rank(fields)
+
+
+def _omitted_note(section: ContextSection) -> str:
+    names = [os.path.basename(p) for p in section.omitted[:OMITTED_NAMES_SHOWN]]
+    more = len(section.omitted) - len(names)
+    listing = ", ".join(names) + (f", … and {more} more" if more else "")
+    return (f"({len(section.omitted)} more file(s) in {section.rel} not shown — ranked less relevant to this "
+            f"run's triggers: {listing}. Read them if needed.)")
+
+
+def render_section(section: ContextSection) -> str:
+    """Render one section as it appears in the Project Context block."""
+    if not section.is_dir:
+        return f"--- {section.rel} ---\n{section.files[0].text}"
+    if not section.files:
+        return f"--- {section.rel} ---\n(empty directory)"
+    body = "\n\n".join(f"### {f.name}\n{f.text}" for f in section.files)
+    if section.omitted:
+        body += "\n\n" + _omitted_note(section)
+    return f"--- {section.rel} ---\n{body}"
+
+
+def render(sections: list[ContextSection]) -> str:
+    """Render sections as the full Project Context block."""
+    return "\n\n".join(render_section(section) for section in sections)
+
+
+def manifest(sections: list[ContextSection]) -> dict[str, str]:
+    """Map every context file's vault-relative path to its content digest."""
+    return {f.path: f.digest for section in sections for f in section.files}
+
+
+# ---------------------------------------------------------------------------
+# Token budget
+# ---------------------------------------------------------------------------
+
+def budget_for(role_cfg) -> int:
+    """The role's context budget in tokens (0 = unlimited); defaults to the vault's budget."""
+    budget = role_cfg.get("context_budget")
+    return config.vault().context_token_budget if budget is None else budget
+
+
+def large_file_limit(role_cfg) -> int:
+    """Size in bytes above which the role gets a file condensed (0 = never)."""
+    tokens = role_cfg.get("large_file_tokens")
+    return (config.LARGE_FILE_TOKENS if tokens is None else tokens) * CHARS_PER_TOKEN
+
+
+def _replace_text(f: ContextFile, text: str):
+    f.text = text
+    # The digest must describe what the model was sent, so delta mode stays correct
+    f.digest = hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest()
+
+
+def apply_budget(sections: list[ContextSection], budget: int) -> list[tuple[str, str, int]]:
+    """Trim sections in place to fit `budget` tokens (0 = unlimited).
+
+    Returns (path, "truncated"|"dropped", original tokens) for every file
+    that was not sent in full.
+    """
+    if budget <= 0:
+        return []
+
+    files = [f for section in sections for f in section.files]
+    ranked = sorted(files, key=lambda f: (f.priority, -f.urgency, -f.mtime_ns))
+    remaining = budget
+    report = []
+    for f in ranked:
+        tokens = estimate_tokens(f.text)
+        if tokens <= remaining:
+            remaining -= tokens
+            continue
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            note = (f"\n\n[… truncated: ~{remaining} of ~{tokens} tokens shown "
+                    f"(context budget). Read {f.path} for the full file.]")
+            keep = max(0, remaining * CHARS_PER_TOKEN - len(note))
+            _replace_text(f, f.text[:keep] + note)
+            report.append((f.path, "truncated", tokens))
+        else:
+            _replace_text(f, f"(omitted — ~{tokens} tokens, over the context budget. Read {f.path} if needed.)")
+            report.append((f.path, "dropped", tokens))
+        remaining = max(0, remaining - estimate_tokens(f.text))
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Delta rendering
+# ---------------------------------------------------------------------------
+
+def _blobs_dir() -> str:
+    path = os.path.join(config.vault().sessions_dir, "blobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_blobs(sections: list[ContextSection]):
+    """Store the contents of every context file by digest (for future diffs)."""
+    blobs = _blobs_dir()
+    for section in sections:
+        for f in section.files:
+            path = os.path.join(blobs, f.digest)
+            if not os.path.exists(path):
+                tmp = f"{path}.tmp"
+                with open(tmp, "w") as out:
+                    out.write(f.text)
+                os.replace(tmp, path)
+
+
+def load_blob(digest: str) -> str | None:
+    path = os.path.join(_blobs_dir(), digest)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def prune_blobs(referenced: set[str]):
+    """Delete stored blobs that no session manifest refers to anymore."""
+    blobs = _blobs_dir()
+    for fn in os.listdir(blobs):
+        if fn not in referenced and not fn.endswith(".tmp"):
+            os.remove(os.path.join(blobs, fn))
+
+
+def _diff(path: str, old: str, new: str) -> str:
+    lines = difflib.unified_diff(
+        old.splitlines(), new.splitlines(),
+        fromfile=f"a/{path}", tofile=f"b/{path}", lineterm="", n=1,
+    )
+    return "\n".join(lines)
+
+
+def render_delta(sections: list[ContextSection], previous: dict[str, str]) -> tuple[str, dict]:
+    """Render only what changed since `previous` (a manifest from this session).
+
+    Changed files are sent as unified diffs, falling back to the full file
+    when the old contents are unavailable or the diff would be larger.
+    Returns (rendered text, counts of added/changed/deleted/unchanged files).
+    """
+    parts = []
+    counts = {"added": 0, "changed": 0, "deleted": 0, "unchanged": 0}
+    current = set()
+
+    for section in sections:
+        current.update(section.omitted)  # not sent this run, but not deleted either
+        if section.omitted:
+            parts.append(_omitted_note(section))
+        for f in section.files:
+            current.add(f.path)
+            old_digest = previous.get(f.path)
+            if old_digest == f.digest:
+                counts["unchanged"] += 1
+                continue
+            if old_digest is None:
+                counts["added"] += 1
+                parts.append(f"--- added: {f.path} ---\n{f.text}")
+                continue
+            counts["changed"] += 1
+            old = load_blob(old_digest)
+            diff = _diff(f.path, old, f.text) if old is not None else None
+            if diff is None or len(diff) >= len(f.text):
+                parts.append(f"--- changed: {f.path} (full contents) ---\n{f.text}")
+            else:
+                parts.append(f"--- changed: {f.path} (diff) ---\n```diff\n{diff}\n```")
+
+    for path in sorted(set(previous) - current):
+        counts["deleted"] += 1
+        parts.append(f"--- deleted: {path} ---")
+
+    header = (
+        f"Only changes since your last run in this session are shown. "
+        f"{counts['unchanged']} unchanged file(s) omitted — use the versions you already have."
+    )
+    if not parts:
+        return header + "\n\n(no changes)", counts
+    return header + "\n\n" + "\n\n".join(parts), counts
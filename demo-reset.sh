@@ -25,7 +25,7 @@ find vaults/peaklogistics/agent/outbox -type f ! -name '.gitkeep' -delete 2>/dev
 
 # Clean runner logs (auto-generated, recreated on each run)
 echo "🗑️  Cleaning runner logs..."
-rm -f logs/*.log 2>/dev/null || true
+rm -f logs/*.log logs/*.log.* 2>/dev/null || true
 
 # Clean project generated agent roles .md files
 echo "🗑️  Cleaning project generated .mf files..."
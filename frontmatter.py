@@ -0,0 +1,43 @@
+"""YAML frontmatter helpers for vault items (triggers, questions, blockers).
+
+Vault items carry a small `key: value` block between `---` delimiters:
+
+    ---
+    from: risk
+    date: 2026-02-15T10:00:00Z
+    priority: high
+    ---
+
+Only flat scalar keys are supported — that is all the vault uses.
+"""
+
+HEAD_BYTES = 4096  # frontmatter always sits at the top; never read more than this
+
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+CLOSED_STATUSES = frozenset({"closed", "resolved", "done"})
+
+
+def parse(text: str) -> dict[str, str]:
+    """Return the frontmatter keys of a document ({} if it has none)."""
+    if not text.startswith("---"):
+        return {}
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}
+    fields = {}
+    for line in text[3:end].splitlines():
+        key, sep, value = line.strip().partition(":")
+        if sep and key:
+            fields[key.strip().lower()] = value.strip().strip("\"'")
+    return fields
+
+
+def read(path: str) -> dict[str, str]:
+    """Parse the frontmatter of a file, reading only its head."""
+    with open(path, errors="replace") as f:
+        return parse(f.read(HEAD_BYTES))
+
+
+def priority_rank(fields: dict[str, str], default: str = "medium") -> int:
+    """Map a `priority:` value to 0 (low) .. 2 (high)."""
+    return PRIORITY_RANK.get(fields.get("priority", default).lower(), PRIORITY_RANK[default])
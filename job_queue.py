@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""Job queue — a shared SQLite queue of role runs, for running the runner on several hosts.
+
+Without JOB_QUEUE_PATH every runner dispatches its own runs (pool.RolePool).
+With it, runners on any number of nodes share one queue database:
+
+  - Triggers (schedules, inbox files) become jobs. A trigger for a role that
+    already has a queued job is merged into it (highest priority, oldest
+    trigger time, all reasons), just like the local pool's pending runs.
+  - Workers claim jobs under an expiring lease and renew it with heartbeats
+    while the run is in flight. A role key never has more than one live
+    lease, so a role runs on only one worker at a time and only one process
+    appends to its daily log.
+  - When a worker dies, its lease expires and the job is queued again for
+    any node (up to MAX_ATTEMPTS claims). A worker that finds its lease
+    taken over cancels its run.
+  - Schedules fire on one node only: the holder of the "scheduler" lease,
+    which also deletes finished jobs older than JOB_RETENTION_DAYS.
+
+The database must live on storage every node can lock (a shared or network
+filesystem with working POSIX locks). It uses a rollback journal instead of
+WAL, because WAL's shared memory index does not work across hosts. Lease
+times are wall-clock, so node clocks should be kept in sync (NTP). Every
+database call runs on a worker thread, so a busy lock (up to busy_timeout)
+never stalls the event loop.
+
+Usage (reporting):
+    python3 job_queue.py              # Queued and running jobs, leases
+    python3 job_queue.py --recent 20  # Last 20 finished jobs
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import config
+from pool import PRIORITY_MEDIUM, RoleRunFn
+
+log = logging.getLogger("tpm-runner")
+
+MAX_ATTEMPTS = 3  # claims per job before a job whose worker keeps dying is marked failed
+SCHEDULER_LEASE = "scheduler"
+PRUNE_INTERVAL = 3600  # seconds between deletions of old finished jobs (scheduler lease holder only)
+FINISHED_STATES = ("done", "failed", "dropped", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    role_key        TEXT NOT NULL,
+    vault           TEXT NOT NULL,
+    reasons         TEXT NOT NULL,
+    priority        INTEGER NOT NULL,
+    since           REAL NOT NULL,
+    ready_at        REAL NOT NULL,
+    recheck         INTEGER NOT NULL,
+    state           TEXT NOT NULL DEFAULT 'queued',
+    owner           TEXT,
+    lease_expires   REAL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    created_at      TEXT NOT NULL,
+    finished_at     TEXT,
+    error           TEXT
+);
+
+CREATE TABLE IF NOT EXISTS leases (
+    name        TEXT PRIMARY KEY,
+    owner       TEXT NOT NULL,
+    expires     REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, role_key);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    id: int
+    role_key: str
+    reason: str
+    recheck: bool
+    attempts: int
+
+
+class JobQueue:
+    """Thread-safe wrapper around the shared queue database. Every mutation is one transaction."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=DELETE")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            self._conn.executescript(_SCHEMA)
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _read(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # -- producers ----------------------------------------------------------
+
+    def enqueue(self, role_key: str, vault: str, reason: str, priority: int, since: float,
+                recheck: bool, debounce: float = 0.0) -> tuple[int, bool]:
+        """Queue a run, merging into the role's queued job if there is one.
+
+        Returns (job id, True if the job was created rather than merged into).
+        """
+
+        def txn(conn: sqlite3.Connection) -> tuple[int, bool]:
+            row = conn.execute("SELECT id, reasons, priority, since, recheck FROM jobs "
+                               "WHERE role_key = ? AND state = 'queued'", (role_key,)).fetchone()
+            if row is not None:
+                reasons = json.loads(row["reasons"])
+                if reason not in reasons:
+                    reasons.append(reason)
+                conn.execute("UPDATE jobs SET reasons = ?, priority = ?, since = ?, recheck = ? WHERE id = ?",
+                             (json.dumps(reasons), max(row["priority"], priority), min(row["since"], since),
+                              int(bool(row["recheck"]) and recheck), row["id"]))
+                return row["id"], False
+            cursor = conn.execute(
+                "INSERT INTO jobs (role_key, vault, reasons, priority, since, ready_at, recheck, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (role_key, vault, json.dumps([reason]), priority, since, time.time() + debounce,
+                 int(recheck), _now_iso()),
+            )
+            return cursor.lastrowid, True
+
+        return self._transaction(txn)
+
+    # -- workers ------------------------------------------------------------
+
+    def claim(self, owner: str, lease_seconds: float, vault_limits: dict[str, int] | None = None) -> Job | None:
+        """Claim the best ready job whose role has no live lease, or None.
+
+        Expired leases are recovered first: their jobs go back to the queue
+        (or fail after MAX_ATTEMPTS). `vault_limits` caps live runs per vault
+        across all nodes (0 = no cap).
+        """
+        now = time.time()
+
+        def txn(conn: sqlite3.Connection) -> Job | None:
+            for row in conn.execute("SELECT id, role_key, owner, attempts FROM jobs "
+                                    "WHERE state = 'running' AND lease_expires <= ?", (now,)).fetchall():
+                if row["attempts"] >= MAX_ATTEMPTS:
+                    conn.execute("UPDATE jobs SET state = 'failed', owner = NULL, finished_at = ?, error = ? "
+                                 "WHERE id = ?", (_now_iso(), f"lease expired {row['attempts']} times", row["id"]))
+                    log.warning(f"[{row['role_key']}] Job {row['id']} failed: lease expired "
+                                f"{row['attempts']} times (last owner {row['owner']})")
+                    continue
+                # Merge into a queued follow-up for the same role, if any, so the role stays single
+                follow_up = conn.execute("SELECT id FROM jobs WHERE role_key = ? AND state = 'queued'",
+                                         (row["role_key"],)).fetchone()
+                if follow_up is not None:
+                    conn.execute("UPDATE jobs SET state = 'dropped', owner = NULL, finished_at = ?, error = ? "
+                                 "WHERE id = ?", (_now_iso(), f"merged into job {follow_up['id']}", row["id"]))
+                    conn.execute("UPDATE jobs SET recheck = 0 WHERE id = ?", (follow_up["id"],))
+                    target = follow_up["id"]
+                else:
+                    conn.execute("UPDATE jobs SET state = 'queued', owner = NULL, lease_expires = NULL, "
+                                 "recheck = 0 WHERE id = ?", (row["id"],))
+                    target = row["id"]
+                log.warning(f"[{row['role_key']}] Lease of {row['owner']} expired — requeued as job {target}")
+
+            live = conn.execute("SELECT role_key, vault FROM jobs WHERE state = 'running'").fetchall()
+            busy_roles = {r["role_key"] for r in live}
+            per_vault: dict[str, int] = {}
+            for r in live:
+                per_vault[r["vault"]] = per_vault.get(r["vault"], 0) + 1
+            full = {v for v, n in per_vault.items() if 0 < (vault_limits or {}).get(v, 0) <= n}
+
+            for row in conn.execute("SELECT * FROM jobs WHERE state = 'queued' AND ready_at <= ? "
+                                    "ORDER BY priority DESC, since, id", (now,)).fetchall():
+                if row["role_key"] in busy_roles or row["vault"] in full:
+                    continue
+                conn.execute("UPDATE jobs SET state = 'running', owner = ?, lease_expires = ?, "
+                             "attempts = attempts + 1 WHERE id = ?", (owner, now + lease_seconds, row["id"]))
+                return Job(row["id"], row["role_key"], " + ".join(json.loads(row["reasons"])),
+                           bool(row["recheck"]), row["attempts"] + 1)
+            return None
+
+        return self._transaction(txn)
+
+    def next_ready_at(self) -> float | None:
+        """Earliest ready time of any queued job (for sleeping until a debounce window closes)."""
+        rows = self._read("SELECT MIN(ready_at) AS t FROM jobs WHERE state = 'queued'")
+        return rows[0]["t"] if rows else None
+
+    def heartbeat(self, owner: str, job_ids: list[int], lease_seconds: float) -> set[int]:
+        """Extend the leases of `owner`'s jobs. Returns the ids it still holds."""
+        if not job_ids:
+            return set()
+        expires = time.time() + lease_seconds
+        marks = ",".join("?" * len(job_ids))
+
+        def txn(conn: sqlite3.Connection) -> set[int]:
+            conn.execute(f"UPDATE jobs SET lease_expires = ? WHERE owner = ? AND state = 'running' "
+                         f"AND id IN ({marks})", (expires, owner, *job_ids))
+            rows = conn.execute(f"SELECT id FROM jobs WHERE owner = ? AND state = 'running' AND id IN ({marks})",
+                                (owner, *job_ids)).fetchall()
+            return {r["id"] for r in rows}
+
+        return self._transaction(txn)
+
+    def finish(self, job_id: int, owner: str, state: str, error: str | None = None):
+        """Mark a job done/failed/dropped/cancelled — only if `owner` still holds it."""
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET state = ?, owner = NULL, lease_expires = NULL, finished_at = ?, error = ? "
+            "WHERE id = ? AND owner = ? AND state = 'running'",
+            (state, _now_iso(), error, job_id, owner),
+        ))
+
+    def unfinished(self, job_ids: set[int]) -> set[int]:
+        """The ids among `job_ids` whose jobs are still queued or running."""
+        if not job_ids:
+            return set()
+        marks = ",".join("?" * len(job_ids))
+        rows = self._read(f"SELECT id FROM jobs WHERE state IN ('queued', 'running') AND id IN ({marks})",
+                          tuple(job_ids))
+        return {r["id"] for r in rows}
+
+    def prune(self, days: float) -> int:
+        """Delete jobs that finished more than `days` ago. Returns the number deleted."""
+        cutoff = datetime.fromtimestamp(time.time() - days * 86400, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        marks = ",".join("?" * len(FINISHED_STATES))
+        return self._transaction(lambda conn: conn.execute(
+            f"DELETE FROM jobs WHERE state IN ({marks}) AND finished_at < ?", (*FINISHED_STATES, cutoff),
+        ).rowcount)
+
+    # -- named leases -------------------------------------------------------
+
+    def acquire_lease(self, name: str, owner: str, lease_seconds: float) -> bool:
+        """Take or renew a named lease. False if another owner holds it and it has not expired."""
+        now = time.time()
+
+        def txn(conn: sqlite3.Connection) -> bool:
+            row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and row["owner"] != owner and row["expires"] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)",
+                         (name, owner, now + lease_seconds))
+            return True
+
+        return self._transaction(txn)
+
+    def release_lease(self, name: str, owner: str):
+        self._transaction(lambda conn: conn.execute(
+            "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)))
+
+    # -- reporting ----------------------------------------------------------
+
+    def jobs(self, states: tuple[str, ...], limit: int = 100) -> list[dict]:
+        marks = ",".join("?" * len(states))
+        rows = self._read(f"SELECT * FROM jobs WHERE state IN ({marks}) "
+                          f"ORDER BY COALESCE(finished_at, created_at) DESC, id DESC LIMIT ?", (*states, limit))
+        return [dict(r) for r in rows]
+
+    def leases(self) -> list[dict]:
+        return [dict(r) for r in self._read("SELECT * FROM leases ORDER BY name")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_queue: JobQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Return the process-wide job queue, opening it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(config.JOB_QUEUE_PATH)
+        return _queue
+
+
+# ---------------------------------------------------------------------------
+# Distributed pool
+# ---------------------------------------------------------------------------
+
+class DistributedPool:
+    """Drop-in for pool.RolePool that dispatches through the shared job queue.
+
+    `submit()` hands the trigger to a submit task that enqueues it; a claim
+    task claims up to `max_concurrent` jobs for this node and runs them; a
+    heartbeat task renews their leases (and the scheduler lease, once
+    `lead()` has been called). Queue calls run on worker threads.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        run: RoleRunFn,
+        max_concurrent: int,
+        node_id: str,
+        lease_seconds: float,
+        debounce: float = 0.0,
+        still_needed: Callable[[str], bool] | None = None,
+        group_of: Callable[[str], str] | None = None,
+        group_limits: Callable[[], dict[str, int]] | None = None,
+        poll_seconds: float = 1.0,
+        retention_days: float = 7.0,
+    ):
+        self._queue = queue
+        self._run = run
+        self.max_concurrent = max(1, max_concurrent)
+        self.node_id = node_id
+        self.lease_seconds = lease_seconds
+        self.debounce = debounce
+        self.poll_seconds = poll_seconds
+        self.retention_days = retention_days
+        self._still_needed = still_needed
+        self._group_of = group_of or (lambda key: "")
+        self._group_limits = group_limits or dict
+        self._running: dict[int, tuple[str, asyncio.Task]] = {}  # job id -> (role key, task)
+        self._submissions: asyncio.Queue | None = None  # (role key, reason, priority, since, recheck)
+        self._submitted: set[int] = set()  # ids of jobs this node enqueued or merged into, until finished
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+        self._leading = False
+        self._pruned_at = 0.0
+        self.is_leader = False
+
+    # -- introspection ------------------------------------------------------
+
+    @property
+    def running(self) -> list[str]:
+        return [key for key, _ in self._running.values()]
+
+    def is_running(self, role_name: str) -> bool:
+        return role_name in self.running
+
+    # -- leadership ---------------------------------------------------------
+
+    async def lead(self) -> bool:
+        """Campaign for the scheduler lease (kept by the heartbeat). True if this node holds it."""
+        self._leading = True
+        self._ensure_started()
+        await self._renew_leadership()
+        return self.is_leader
+
+    async def _renew_leadership(self):
+        was_leader = self.is_leader
+        self.is_leader = await asyncio.to_thread(
+            self._queue.acquire_lease, SCHEDULER_LEASE, self.node_id, self.lease_seconds)
+        if self.is_leader and not was_leader:
+            log.info(f"[job-queue] {self.node_id} now fires schedules")
+        elif was_leader and not self.is_leader:
+            log.warning(f"[job-queue] {self.node_id} lost the scheduler lease")
+        if self.is_leader and time.time() - self._pruned_at >= PRUNE_INTERVAL:
+            self._pruned_at = time.time()
+            pruned = await asyncio.to_thread(self._queue.prune, self.retention_days)
+            if pruned:
+                log.info(f"[job-queue] Deleted {pruned} jobs finished over {self.retention_days:g} days ago")
+
+    # -- dispatch -----------------------------------------------------------
+
+    def submit(
+        self,
+        role_name: str,
+        reason: str,
+        priority: int = PRIORITY_MEDIUM,
+        since: float | None = None,
+        recheck: bool = False,
+    ) -> bool:
+        """Queue a run of `role_name` (a role key) on whichever node claims it first. Never blocks.
+
+        The job is written by the submit task, in submission order, so
+        whether the trigger was merged into a queued job is only logged;
+        the return value is always True.
+        """
+        since = time.time() if since is None else since
+        self._ensure_started()
+        self._submissions.put_nowait((role_name, reason, priority, since, recheck))
+        return True
+
+    def _ensure_started(self):
+        if not self._tasks:
+            self._submissions = self._submissions or asyncio.Queue()
+            self._stopping = False
+            self._tasks = [
+                asyncio.create_task(self._submit_loop(), name="job-queue:submit"),
+                asyncio.create_task(self._claim_loop(), name="job-queue:claim"),
+                asyncio.create_task(self._heartbeat_loop(), name="job-queue:heartbeat"),
+            ]
+
+    async def _submit_loop(self):
+        while True:
+            role_name, reason, priority, since, recheck = await self._submissions.get()
+            try:
+                job_id, created = await asyncio.to_thread(
+                    self._queue.enqueue, role_name, self._group_of(role_name), reason, priority, since,
+                    recheck, self.debounce)
+                self._submitted.add(job_id)
+                log.debug(f"[{role_name}] {'Queued' if created else 'Merged into queued'} job {job_id} ({reason})")
+                self._wake.set()
+            except sqlite3.Error as e:
+                log.error(f"[{role_name}] Could not queue run ({reason}): {e}")
+            finally:
+                self._submissions.task_done()
+
+    async def _claim_loop(self):
+        # Checks _stopping as well as being cancelled: wait_for() can swallow a cancellation (Python < 3.12)
+        while not self._stopping:
+            try:
+                while len(self._running) < self.max_concurrent and not self._stopping:
+                    job = await asyncio.to_thread(
+                        self._queue.claim, self.node_id, self.lease_seconds, self._group_limits())
+                    if job is None:
+                        break
+                    await self._start(job)
+                ready_at = await asyncio.to_thread(self._queue.next_ready_at)
+            except sqlite3.Error as e:
+                log.warning(f"[job-queue] Claim failed: {e}")
+                ready_at = None
+            delay = self.poll_seconds
+            if ready_at is not None:
+                delay = min(delay, max(ready_at - time.time(), 0.0))
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(delay, 0.05))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _start(self, job: Job):
+        if self._stopping:
+            await asyncio.to_thread(self._queue.finish, job.id, self.node_id, "cancelled", "cancelled")
+            return
+        if job.recheck and self._still_needed is not None \
+                and not await asyncio.to_thread(self._still_needed, job.role_key):
+            log.debug(f"[{job.role_key}] Inbox already drained — dropping job {job.id}")
+            await asyncio.to_thread(self._queue.finish, job.id, self.node_id, "dropped")
+            self._submitted.discard(job.id)
+            return
+        if job.attempts > 1:
+            log.info(f"[{job.role_key}] Claimed job {job.id} (attempt {job.attempts})")
+        task = asyncio.create_task(self._worker(job), name=f"role:{job.role_key}")
+        self._running[job.id] = (job.role_key, task)
+
+    async def _worker(self, job: Job):
+        state, error = "done", None
+        try:
+            await self._run(job.role_key, job.reason)
+        except asyncio.CancelledError:
+            log.warning(f"[{job.role_key}] Run cancelled")
+            state, error = "cancelled", "cancelled"
+            raise
+        except Exception as e:
+            log.error(f"[{job.role_key}] Run failed: {e}")
+            state, error = "failed", str(e)[:500]
+        finally:
+            self._running.pop(job.id, None)
+            try:
+                await asyncio.to_thread(self._queue.finish, job.id, self.node_id, state, error)
+            except sqlite3.Error as e:
+                log.warning(f"[job-queue] Could not finish job {job.id}: {e}")
+            self._submitted.discard(job.id)
+            self._wake.set()
+
+    async def _heartbeat_loop(self):
+        interval = self.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                held = await asyncio.to_thread(
+                    self._queue.heartbeat, self.node_id, list(self._running), self.lease_seconds)
+                for job_id, (role_key, task) in list(self._running.items()):
+                    if job_id not in held:
+                        log.error(f"[{role_key}] Lease on job {job_id} lost — cancelling the run")
+                        task.cancel()
+                if self._leading:
+                    await self._renew_leadership()
+            except sqlite3.Error as e:
+                log.warning(f"[job-queue] Heartbeat failed: {e}")
+
+    async def join(self):
+        """Wait until this node's runs are done and every job it submitted has finished, on any node.
+
+        Jobs other nodes queued are left to them.
+        """
+        self._ensure_started()
+        while True:
+            await self._submissions.join()
+            if not self._running and not self._submitted:
+                return
+            self._wake.set()
+            await asyncio.sleep(self.poll_seconds)
+            submitted = set(self._submitted)
+            self._submitted -= submitted - await asyncio.to_thread(self._queue.unfinished, submitted)
+
+    async def shutdown(self):
+        """Stop claiming, cancel in-flight runs (their jobs are marked cancelled) and step down."""
+        self._stopping = True
+        self._wake.set()
+        for task in self._tasks:
+            task.cancel()
+        running = [task for _, task in self._running.values()]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *running, return_exceptions=True)
+        self._tasks = []
+        if self.is_leader:
+            await asyncio.to_thread(self._queue.release_lease, SCHEDULER_LEASE, self.node_id)
+            self.is_leader = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared job queue report")
+    parser.add_argument("--recent", type=int, default=0, help="List the N most recently finished jobs instead")
+    args = parser.parse_args()
+
+    if not config.JOB_QUEUE_PATH:
+        print("JOB_QUEUE_PATH is not set — the runner dispatches locally.")
+        return
+    queue = get_queue()
+    now = time.time()
+    if args.recent:
+        for job in queue.jobs(FINISHED_STATES, args.recent):
+            print(f"  {job['finished_at']}  {job['role_key']:<24} {job['state']:<10} "
+                  f"attempts={job['attempts']}  {', '.join(json.loads(job['reasons']))}"
+                  f"{'  ' + job['error'] if job['error'] else ''}")
+        return
+
+    print("Running:")
+    for job in queue.jobs(("running",)):
+        print(f"  {job['role_key']:<24} on {job['owner']:<28} lease {job['lease_expires'] - now:+.0f}s  "
+              f"attempt {job['attempts']}")
+    print("Queued:")
+    for job in sorted(queue.jobs(("queued",)), key=lambda j: (-j["priority"], j["since"])):
+        print(f"  {job['role_key']:<24} priority={job['priority']}  {', '.join(json.loads(job['reasons']))}")
+    print("Leases:")
+    for lease in queue.leases():
+        print(f"  {lease['name']:<12} {lease['owner']:<28} expires {lease['expires'] - now:+.0f}s")
+
+
+if __name__ == "__main__":
+    main()
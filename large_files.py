@@ -0,0 +1,114 @@
+"""Large files — bounded reads of oversized context and inbox files, with cached summaries.
+
+A long pasted meeting transcript or an overgrown memory.md would otherwise be
+read whole and sent on every run. A file over the role's threshold
+(LARGE_FILE_TOKENS, or the role's `## Large File Threshold` section) is read
+through the vault cache as a head and a tail window, a quarter of the
+threshold each. The file is mapped and hashed in place, so the rest is never
+decoded or copied. The role gets:
+
+    <head>
+    [… 1,234,567 bytes from the middle of <path>, summarized (Read the file for the full text):
+    <summary>
+    …]
+    <tail>
+
+The summary is made once per file content (haiku, through summaries.Summarizer)
+and cached in the run store by the file's digest. As long as the file is
+unchanged, later runs neither read nor summarize it again (one stat() and one
+lookup). Until a summary exists, or if the call failed, the middle is replaced
+with a note telling the role to Read the file.
+"""
+
+import asyncio
+import hashlib
+import logging
+import mmap
+
+import summaries
+from run_store import get_store
+from vault_cache import CachedFile, cache
+
+log = logging.getLogger("tpm-runner")
+
+MAX_MIDDLE_BYTES = 60_000  # sent to the summarizer; longer middles are sampled evenly
+SAMPLES = 12  # excerpts taken from a middle longer than MAX_MIDDLE_BYTES
+
+
+def _summary_key(digest: str) -> str:
+    return hashlib.sha256(f"large-file\0{digest}".encode()).hexdigest()
+
+
+def _condense(entry: CachedFile, rel: str, summary: str | None) -> str:
+    start, end = entry.gap
+    if summary is None:
+        middle = f"[… {end - start:,} bytes omitted from the middle of this file. Read {rel} for the full text.]"
+    else:
+        middle = (f"[… {end - start:,} bytes from the middle of {rel}, summarized "
+                  f"(Read the file for the full text):\n{summary}\n…]")
+    return f"{entry.text.rstrip()}\n\n{middle}\n\n{entry.tail.lstrip()}"
+
+
+def content(entry: CachedFile, rel: str) -> tuple[str, str]:
+    """(text to send, digest of that text) for a vault cache entry: the file, or head + summary + tail."""
+    if entry.gap is None:
+        return entry.text, entry.digest
+    text = _condense(entry, rel, get_store().get_summary(_summary_key(entry.digest)))
+    return text, hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest()
+
+
+def needs_summary(entry: CachedFile) -> bool:
+    return entry.gap is not None and get_store().get_summary(_summary_key(entry.digest)) is None
+
+
+def _middle(path: str, entry: CachedFile) -> tuple[str, bool] | None:
+    """(middle text, sampled?) of a windowed file; None if the file changed since it was cached."""
+    start, end = entry.gap
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) != entry.sig.size:
+            return None
+        if end - start <= MAX_MIDDLE_BYTES:
+            return mm[start:end].decode("utf-8", "ignore"), False
+        step = (end - start) // SAMPLES
+        size = MAX_MIDDLE_BYTES // SAMPLES
+        parts = [mm[start + i * step: start + i * step + size].decode("utf-8", "ignore") for i in range(SAMPLES)]
+    return "\n[…]\n".join(parts), True
+
+
+async def summarize(files: list[tuple[str, str]], limit: int, query_fn, role_name: str) -> int:
+    """Summarize the middle of every file in `files` [(path, vault-relative path)] that is over
+    `limit` bytes and has no cached summary. Returns the number of summaries added."""
+    def unsummarized() -> list[tuple[str, str, CachedFile]]:
+        entries = cache.entries([path for path, _ in files], limit)
+        return [(path, rel, entry) for (path, rel), entry in zip(files, entries) if needs_summary(entry)]
+
+    # Stats, window reads and summary lookups run on a worker thread, off the event loop
+    pending = await asyncio.to_thread(unsummarized)
+    if not pending:
+        return 0
+
+    summarizer = summaries.Summarizer(query_fn)
+
+    async def one(path: str, rel: str, entry: CachedFile) -> str | None:
+        middle = await asyncio.to_thread(_middle, path, entry)
+        if middle is None:
+            return None  # changed meanwhile; the next run sees the new version
+        text, sampled = middle
+        start, end = entry.gap
+        prompt = (
+            f"Below is the middle part (bytes {start:,}–{end:,} of {entry.sig.size:,}) of {rel}, a file in a "
+            "project vault. Its beginning and end are shown to the reader separately.\n"
+            + ("It is long, so only evenly spaced excerpts are included, separated by […].\n" if sampled else "")
+            + "Summarize it in at most 15 terse bullets. Keep names, dates, numbers, decisions, risks, "
+            "action items and open questions. Reply with the bullets only.\n\n"
+            + text
+        )
+        return await summarizer.complete(_summary_key(entry.digest), "file", role_name, rel, prompt)
+
+    results = await asyncio.gather(*(one(*p) for p in pending))
+    added = sum(r is not None for r in results)
+    if added:
+        log.info(f"[{role_name}] Summarized {added} large file(s) "
+                 f"({', '.join(rel for (_, rel, _), r in zip(pending, results) if r is not None)}), "
+                 f"cost ${summarizer.cost_usd:.4f}")
+    return added
@@ -0,0 +1,284 @@
+"""Run metrics — per-phase timings, message counts and cost for every role run.
+
+Each role run gets a RunMetrics object. The runner wraps its phases in
+`span()` and feeds SDK messages through `on_message()`. When the run ends,
+`record()` does two things:
+
+  - appends one JSON line to metrics/runs.jsonl (full detail, for analysis)
+  - rewrites metrics/tpm_runner.prom, a Prometheus text-format file with
+    per-role aggregates (labelled with vault and role), for node_exporter's
+    textfile collector
+
+Phases:
+    fingerprint      input fingerprint of a scheduled run (see SKIP_UNCHANGED_RUNS)
+    large_files      summarize the middle of oversized context/inbox files (only when not cached)
+    context_load     collect context files + apply budget + delta rendering
+    prompt_build     system prompt + user message
+    sdk_start        query() call until the first message from the SDK subprocess
+    first_assistant  query() call until the first AssistantMessage
+    tool_turns       time spent waiting on tool execution between assistant turns
+    query            query() call until the stream ends
+    verify_log       verify_log_written()
+    total            the whole run
+
+Prompt caching: `tokens` splits the run's input tokens (from the SDK's usage
+data) into uncached, cache_read and cache_write; `prefix` records how many
+leading prompt segments were unchanged since the role's previous run (see
+prompt.py).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import config
+
+PROM_FILE = "tpm_runner.prom"
+JSONL_FILE = "runs.jsonl"
+
+
+class RunMetrics:
+    """Timings and counters collected during one role run."""
+
+    def __init__(self, role: str, trigger: str, model: str, vault: str = ""):
+        self.role = role
+        self.vault = vault
+        self.trigger = trigger
+        self.model = model
+        self.routing = ""  # routing.Decision.rule
+        self.run_id: int | None = None
+        self.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.status = "running"
+        self.cost_usd: float | None = None
+        self.sdk_duration_ms: int | None = None
+        self.phases: dict[str, float] = {}  # seconds
+        self.counts = {"messages": 0, "assistant_messages": 0, "tool_uses": 0, "tool_turns": 0, "turns": 0}
+        self.sizes: dict[str, int] = {}
+        self.tokens: dict[str, int] = {}  # input, uncached, cache_read, cache_write, output
+        self.prefix: dict[str, int] = {}  # prompt.PrefixReuse.to_dict()
+        self._t0 = time.perf_counter()
+        self._query_t0: float | None = None
+        self._tool_t0: float | None = None
+
+    @contextmanager
+    def span(self, phase: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - t
+
+    # -- SDK stream ---------------------------------------------------------
+
+    def begin_query(self):
+        self._query_t0 = time.perf_counter()
+
+    def on_message(self, is_assistant: bool, tool_uses: int = 0):
+        """Record one streamed SDK message (tool_uses = ToolUse blocks it contains)."""
+        now = time.perf_counter()
+        since_query = now - (self._query_t0 or self._t0)
+        self.counts["messages"] += 1
+        self.phases.setdefault("sdk_start", since_query)
+
+        # The previous assistant turn asked for tools; this message is the model resuming
+        if self._tool_t0 is not None and is_assistant:
+            self.phases["tool_turns"] = self.phases.get("tool_turns", 0.0) + now - self._tool_t0
+            self._tool_t0 = None
+
+        if is_assistant:
+            self.counts["assistant_messages"] += 1
+            self.phases.setdefault("first_assistant", since_query)
+            if tool_uses:
+                self.counts["tool_uses"] += tool_uses
+                self.counts["tool_turns"] += 1
+                self._tool_t0 = now
+
+    def end_query(self):
+        if self._query_t0 is not None:
+            self.phases["query"] = time.perf_counter() - self._query_t0
+
+    def finish(self, status: str, cost_usd: float | None = None,
+               sdk_duration_ms: int | None = None, num_turns: int | None = None, usage: dict | None = None):
+        self.status = status
+        self.cost_usd = cost_usd
+        self.sdk_duration_ms = sdk_duration_ms
+        if num_turns is not None:
+            self.counts["turns"] = num_turns
+        if usage:
+            self.set_usage(usage)
+        self.phases["total"] = time.perf_counter() - self._t0
+
+    def set_usage(self, usage: dict):
+        """Record token usage from a ResultMessage (Anthropic usage field names)."""
+        uncached = int(usage.get("input_tokens") or 0)
+        cache_read = int(usage.get("cache_read_input_tokens") or 0)
+        cache_write = int(usage.get("cache_creation_input_tokens") or 0)
+        self.tokens = {
+            "input": uncached + cache_read + cache_write,
+            "uncached": uncached,
+            "cache_read": cache_read,
+            "cache_write": cache_write,
+            "output": int(usage.get("output_tokens") or 0),
+        }
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        """Share of input tokens served from the provider's prompt cache."""
+        total = self.tokens.get("input", 0)
+        return self.tokens.get("cache_read", 0) / total if total else 0.0
+
+    # -- output -------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "vault": self.vault,
+            "role": self.role,
+            "trigger": self.trigger,
+            "model": self.model,
+            "routing": self.routing,
+            "started_at": self.started_at,
+            "status": self.status,
+            "cost_usd": self.cost_usd,
+            "sdk_duration_ms": self.sdk_duration_ms,
+            "phases_ms": {k: round(v * 1000, 1) for k, v in self.phases.items()},
+            "counts": self.counts,
+            "sizes": self.sizes,
+            "tokens": self.tokens,
+            "cache_hit_ratio": round(self.cache_hit_ratio, 4),
+            "prefix": self.prefix,
+        }
+
+    def summary(self) -> str:
+        order = ["fingerprint", "large_files", "context_load", "prompt_build", "sdk_start", "first_assistant", "tool_turns", "verify_log", "total"]
+        parts = [f"{p}={self.phases[p] * 1000:.0f}ms" for p in order if p in self.phases]
+        parts.append(f"assistant_msgs={self.counts['assistant_messages']}")
+        parts.append(f"tool_uses={self.counts['tool_uses']}")
+        if self.tokens.get("input"):
+            parts.append(f"cache_hit={self.cache_hit_ratio:.0%}")
+        return " ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Aggregation + exporters
+# ---------------------------------------------------------------------------
+
+class _Aggregate:
+    """Process-lifetime per-role totals, exported in Prometheus text format.
+
+    Keys start with (vault, role); both become labels.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.runs = defaultdict(int)  # ((vault, role), status)
+        self.phase_sum = defaultdict(float)  # ((vault, role), phase)
+        self.phase_count = defaultdict(int)
+        self.phase_last = {}
+        self.cost = defaultdict(float)  # (vault, role)
+        self.counts = defaultdict(int)  # ((vault, role), counter)
+        self.tokens = defaultdict(int)  # ((vault, role), kind)
+        self.prefix = defaultdict(int)  # ((vault, role), "runs" | "reused_runs" | "chars" | "chars_reused")
+        self.last_run = {}  # (vault, role) -> unix time
+
+    def add(self, m: RunMetrics):
+        who = (m.vault, m.role)
+        with self.lock:
+            self.runs[(who, m.status)] += 1
+            for phase, seconds in m.phases.items():
+                self.phase_sum[(who, phase)] += seconds
+                self.phase_count[(who, phase)] += 1
+                self.phase_last[(who, phase)] = seconds
+            self.cost[who] += m.cost_usd or 0.0
+            for name, value in m.counts.items():
+                self.counts[(who, name)] += value
+            for kind in ("uncached", "cache_read", "cache_write", "output"):
+                self.tokens[(who, kind)] += m.tokens.get(kind, 0)
+            if m.prefix:
+                self.prefix[(who, "runs")] += 1
+                self.prefix[(who, "reused_runs")] += int(m.prefix["segments_reused"] > 0)
+                self.prefix[(who, "chars")] += m.prefix["chars"]
+                self.prefix[(who, "chars_reused")] += m.prefix["chars_reused"]
+            self.last_run[who] = time.time()
+
+    def render(self) -> str:
+        def labels(who: tuple[str, str], **kv) -> str:
+            kv = {"vault": who[0], "role": who[1], **kv}
+            return "{" + ",".join(f'{k}="{v}"' for k, v in kv.items()) + "}"
+
+        lines = []
+        with self.lock:
+            lines += ["# HELP tpm_runner_runs_total Role runs by final status.",
+                      "# TYPE tpm_runner_runs_total counter"]
+            lines += [f"tpm_runner_runs_total{labels(r, status=s)} {v}" for (r, s), v in sorted(self.runs.items())]
+
+            lines += ["# HELP tpm_runner_phase_seconds Time spent per run phase.",
+                      "# TYPE tpm_runner_phase_seconds summary"]
+            for (r, p), v in sorted(self.phase_sum.items()):
+                lines.append(f"tpm_runner_phase_seconds_sum{labels(r, phase=p)} {v:.6f}")
+                lines.append(f"tpm_runner_phase_seconds_count{labels(r, phase=p)} {self.phase_count[(r, p)]}")
+
+            lines += ["# HELP tpm_runner_last_phase_seconds Phase duration of the most recent run.",
+                      "# TYPE tpm_runner_last_phase_seconds gauge"]
+            lines += [f"tpm_runner_last_phase_seconds{labels(r, phase=p)} {v:.6f}"
+                      for (r, p), v in sorted(self.phase_last.items())]
+
+            lines += ["# HELP tpm_runner_cost_usd_total Total reported cost of role runs.",
+                      "# TYPE tpm_runner_cost_usd_total counter"]
+            lines += [f"tpm_runner_cost_usd_total{labels(r)} {v:.6f}" for r, v in sorted(self.cost.items())]
+
+            for name in ("messages", "assistant_messages", "tool_uses", "tool_turns", "turns"):
+                metric = f"tpm_runner_{name}_total"
+                lines += [f"# HELP {metric} Total {name.replace('_', ' ')} across role runs.",
+                          f"# TYPE {metric} counter"]
+                lines += [f"{metric}{labels(r)} {v}" for (r, n), v in sorted(self.counts.items()) if n == name]
+
+            lines += ["# HELP tpm_runner_tokens_total Tokens by kind (uncached/cache_read/cache_write input, output).",
+                      "# TYPE tpm_runner_tokens_total counter"]
+            lines += [f"tpm_runner_tokens_total{labels(r, kind=k)} {v}" for (r, k), v in sorted(self.tokens.items())]
+
+            lines += ["# HELP tpm_runner_cache_hit_ratio Share of input tokens read from the prompt cache.",
+                      "# TYPE tpm_runner_cache_hit_ratio gauge"]
+            for r in sorted({r for r, _ in self.tokens}):
+                read = self.tokens[(r, "cache_read")]
+                total = read + self.tokens[(r, "uncached")] + self.tokens[(r, "cache_write")]
+                lines.append(f"tpm_runner_cache_hit_ratio{labels(r)} {read / total if total else 0:.4f}")
+
+            lines += ["# HELP tpm_runner_prompt_prefix_total Prompt prefix reuse: runs, runs reusing a prefix, "
+                      "prompt chars and chars in the reused prefix.",
+                      "# TYPE tpm_runner_prompt_prefix_total counter"]
+            lines += [f"tpm_runner_prompt_prefix_total{labels(r, kind=k)} {v}"
+                      for (r, k), v in sorted(self.prefix.items())]
+
+            lines += ["# HELP tpm_runner_last_run_timestamp_seconds When each role last finished a run.",
+                      "# TYPE tpm_runner_last_run_timestamp_seconds gauge"]
+            lines += [f"tpm_runner_last_run_timestamp_seconds{labels(r)} {v:.0f}"
+                      for r, v in sorted(self.last_run.items())]
+        return "\n".join(lines) + "\n"
+
+
+_aggregate = _Aggregate()
+
+
+def _metrics_dir() -> str:
+    os.makedirs(config.METRICS_DIR, exist_ok=True)
+    return config.METRICS_DIR
+
+
+def record(m: RunMetrics):
+    """Append the run to the JSONL file and refresh the Prometheus textfile."""
+    directory = _metrics_dir()
+    with open(os.path.join(directory, JSONL_FILE), "a") as f:
+        f.write(json.dumps(m.to_dict()) + "\n")
+
+    _aggregate.add(m)
+    # Write-then-rename so node_exporter never scrapes a half-written file
+    prom_path = os.path.join(directory, PROM_FILE)
+    tmp = f"{prom_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(_aggregate.render())
+    os.replace(tmp, prom_path)
@@ -0,0 +1,233 @@
+"""Worker pool — runs role sessions concurrently on one long-lived event loop.
+
+The scheduler loop submits role runs here and moves on. The pool starts up to
+`max_concurrent` runs at once and never runs the same role twice at the same
+time.
+
+Dispatch queue:
+  - Every trigger for a role coalesces into a single pending run. The pending
+    run keeps the highest priority and the oldest trigger time seen, and
+    collects all trigger reasons.
+  - A new pending run waits a short debounce window so that a burst of
+    triggers (several inbox files, a schedule tick) becomes one run.
+  - When a worker frees up, the pool starts the ready run with the highest
+    priority, then the oldest trigger. A high-priority blocker for one role
+    goes ahead of a low-priority note for another.
+  - Triggers that arrive while the role is running become a follow-up run.
+    If that follow-up came only from inbox triggers, `still_needed(role)` is
+    checked (on a worker thread) before it starts, because the current run
+    usually drains the inbox.
+
+Groups: with `group_of` and `group_limit`, runs are also capped per group
+(the runner groups role keys by vault), so one busy vault cannot take every
+worker slot of the shared pool.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from frontmatter import PRIORITY_RANK
+
+log = logging.getLogger("tpm-runner")
+
+RoleRunFn = Callable[[str, str], Awaitable[None]]
+
+
+class WorkerPool(Protocol):
+    """What the runner needs from a pool: RolePool here, or job_queue.DistributedPool."""
+
+    max_concurrent: int
+
+    @property
+    def running(self) -> list[str]: ...
+
+    def is_running(self, role_name: str) -> bool: ...
+
+    def submit(self, role_name: str, reason: str, priority: int = ..., since: float | None = None,
+               recheck: bool = False) -> bool: ...
+
+    async def join(self): ...
+
+    async def shutdown(self): ...
+
+
+PRIORITY_LOW = PRIORITY_RANK["low"]
+PRIORITY_MEDIUM = PRIORITY_RANK["medium"]
+PRIORITY_HIGH = PRIORITY_RANK["high"]
+
+
+@dataclass
+class _Pending:
+    priority: int
+    since: float  # wall-clock time of the oldest coalesced trigger
+    ready_at: float  # loop time when the debounce window closes
+    reasons: list[str] = field(default_factory=list)
+    recheck: bool = True  # all coalesced triggers were inbox triggers
+
+    def merge(self, reason: str, priority: int, since: float, recheck: bool):
+        self.priority = max(self.priority, priority)
+        self.since = min(self.since, since)
+        self.recheck = self.recheck and recheck
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+
+class RolePool:
+    """Bounded, per-role-exclusive, priority-ordered dispatcher for role runs."""
+
+    def __init__(
+        self,
+        run: RoleRunFn,
+        max_concurrent: int,
+        debounce: float = 0.0,
+        still_needed: Callable[[str], bool] | None = None,
+        group_of: Callable[[str], str] | None = None,
+        group_limit: Callable[[str], int] | None = None,
+    ):
+        self._run = run
+        self.max_concurrent = max(1, max_concurrent)
+        self.debounce = debounce
+        self._still_needed = still_needed
+        self._group_of = group_of
+        self._group_limit = group_limit
+        self._pending: dict[str, _Pending] = {}
+        self._running: dict[str, asyncio.Task] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    # -- introspection ------------------------------------------------------
+
+    def is_busy(self, role_name: str) -> bool:
+        """True if the role is queued or currently running."""
+        return role_name in self._pending or role_name in self._running
+
+    def is_running(self, role_name: str) -> bool:
+        return role_name in self._running
+
+    @property
+    def running(self) -> list[str]:
+        return list(self._running)
+
+    @property
+    def pending(self) -> list[str]:
+        """Queued roles in dispatch order (highest priority, then oldest first)."""
+        return sorted(self._pending, key=lambda r: self._order(self._pending[r]))
+
+    @staticmethod
+    def _order(p: _Pending) -> tuple[int, float]:
+        return (-p.priority, p.since)
+
+    def _full_groups(self) -> set[str]:
+        """Groups that have reached their own concurrency limit (a limit of 0 means none)."""
+        if self._group_of is None or self._group_limit is None:
+            return set()
+        running: dict[str, int] = {}
+        for role in self._running:
+            group = self._group_of(role)
+            running[group] = running.get(group, 0) + 1
+        return {g for g, n in running.items() if 0 < self._group_limit(g) <= n}
+
+    # -- dispatch -----------------------------------------------------------
+
+    def submit(
+        self,
+        role_name: str,
+        reason: str,
+        priority: int = PRIORITY_MEDIUM,
+        since: float | None = None,
+        recheck: bool = False,
+    ) -> bool:
+        """Queue a role run, coalescing with any run already pending for the role.
+
+        `since` is the wall-clock time of the trigger (e.g. oldest inbox file).
+        `recheck` marks inbox triggers whose follow-up runs may be dropped once
+        the inbox is empty. Returns True if a new pending run was created and
+        False if the trigger was merged into an existing one. Must be called
+        from inside the running event loop. Never blocks.
+        """
+        since = time.time() if since is None else since
+        pending = self._pending.get(role_name)
+        if pending is not None:
+            pending.merge(reason, priority, since, recheck)
+            log.debug(f"[{role_name}] Coalesced trigger ({reason}) into pending run")
+            self._pump()
+            return False
+
+        loop = asyncio.get_running_loop()
+        self._pending[role_name] = _Pending(priority, since, loop.time() + self.debounce, [reason], recheck)
+        if role_name in self._running:
+            log.debug(f"[{role_name}] Running — queued follow-up run ({reason})")
+        self._idle.clear()
+        self._pump()
+        return True
+
+    def _pump(self):
+        """Start ready runs, best first, while there are free worker slots."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        while len(self._running) < self.max_concurrent:
+            full = self._full_groups()
+            ready = [
+                (self._order(p), role) for role, p in self._pending.items()
+                if role not in self._running and p.ready_at <= now
+                and not (full and self._group_of(role) in full)
+            ]
+            if not ready:
+                break
+            _, role_name = min(ready)
+            pending = self._pending.pop(role_name)
+            reason = " + ".join(pending.reasons)
+            task = asyncio.create_task(self._worker(role_name, reason, pending.recheck), name=f"role:{role_name}")
+            self._running[role_name] = task
+
+        # Wake up again when the next debounce window closes
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiting = [p.ready_at for role, p in self._pending.items() if role not in self._running and p.ready_at > now]
+        if waiting and len(self._running) < self.max_concurrent:
+            self._timer = loop.call_at(min(waiting), self._pump)
+        if self._pending:
+            log.debug(f"[pool] {len(self._running)} running, queued: {', '.join(self.pending)}")
+        self._update_idle()
+
+    def _update_idle(self):
+        if not self._running and not self._pending:
+            self._idle.set()
+
+    async def _worker(self, role_name: str, reason: str, recheck: bool = False):
+        try:
+            if recheck and self._still_needed is not None \
+                    and not await asyncio.to_thread(self._still_needed, role_name):
+                log.debug(f"[{role_name}] Inbox already drained — dropping queued run")
+                return
+            await self._run(role_name, reason)
+        except asyncio.CancelledError:
+            log.warning(f"[{role_name}] Run cancelled")
+            raise
+        except Exception as e:
+            log.error(f"[{role_name}] Run failed: {e}")
+        finally:
+            self._running.pop(role_name, None)
+            self._pump()
+
+    async def join(self):
+        """Wait until every queued and running role run has finished."""
+        await self._idle.wait()
+
+    async def shutdown(self):
+        """Drop queued runs and cancel in-flight ones."""
+        self._pending.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._idle.set()
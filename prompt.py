@@ -0,0 +1,92 @@
+"""Prompt assembly — segments ordered from most static to most dynamic.
+
+Provider-side prompt caching only helps when a prompt starts with the same
+bytes as an earlier one. Every role prompt is therefore built from
+segments, most static first:
+
+    system   vault rules (CLAUDE.md) → role template (no dates or times)
+    message  role header → context sections → inbox → run header (time, date, log path)
+
+Context sections are ordered by the newest mtime of their files, oldest
+first, so slow-changing files (scope, team) lead and fast-changing ones
+(blockers, drafts, memory) trail. When a file changes, its section moves
+towards the end and everything before it stays byte-identical.
+
+Each segment carries a content digest, computed once when it is made.
+`PrefixTracker` compares each role's segment digests with its previous run
+and reports how much of the prompt prefix was byte-stable. The SDK's usage
+data (cache_read_input_tokens) shows how much the provider actually served
+from cache — see metrics.py. Joining segments is a plain concatenation:
+the provider caches the bytes, not this process.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+
+from context import ContextSection, render_section
+
+
+@dataclass(frozen=True, slots=True)
+class Segment:
+    name: str  # e.g. "vault_rules", "context:project/blockers/", "inbox"
+    text: str
+    digest: str
+
+
+def segment(name: str, text: str) -> Segment:
+    return Segment(name, text, hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest())
+
+
+def context_segments(sections: list[ContextSection]) -> list[Segment]:
+    """One segment per context section, least recently modified first (stable for ties)."""
+    def newest(section: ContextSection) -> int:
+        return max((f.mtime_ns for f in section.files), default=0)
+
+    ordered = sorted(enumerate(sections), key=lambda item: (newest(item[1]), item[0]))
+    return [segment(f"context:{section.rel}", render_section(section)) for _, section in ordered]
+
+
+def join(segments: list[Segment], sep: str = "\n\n") -> str:
+    return sep.join(s.text for s in segments)
+
+
+@dataclass(slots=True)
+class PrefixReuse:
+    segments: int
+    segments_reused: int
+    chars: int
+    chars_reused: int
+
+    def to_dict(self) -> dict:
+        return {"segments": self.segments, "segments_reused": self.segments_reused,
+                "chars": self.chars, "chars_reused": self.chars_reused}
+
+
+class PrefixTracker:
+    """Remembers each role's last segment digests to measure prefix stability."""
+
+    def __init__(self):
+        self._last: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, role_name: str, segments: list[Segment]) -> PrefixReuse:
+        """Record this run's segments; return how many leading ones match the role's previous run."""
+        digests = [s.digest for s in segments]
+        with self._lock:
+            previous = self._last.get(role_name, [])
+            self._last[role_name] = digests
+        reused = 0
+        for old, new in zip(previous, digests):
+            if old != new:
+                break
+            reused += 1
+        return PrefixReuse(
+            segments=len(segments),
+            segments_reused=reused,
+            chars=sum(len(s.text) for s in segments),
+            chars_reused=sum(len(s.text) for s in segments[:reused]),
+        )
+
+
+tracker = PrefixTracker()
@@ -0,0 +1,208 @@
+"""Rate limiting — one token bucket and one concurrency controller for every Agent SDK call.
+
+Role runs and log summaries call query() through `limited()`:
+
+  - Token bucket: each call takes a token. Tokens refill at
+    SDK_CALLS_PER_MINUTE up to a burst of SDK_BURST; a call that finds the
+    bucket empty waits for its token instead of failing upstream.
+  - A call is rate limited when its messages say so (a failed ResultMessage
+    with HTTP status 429 or 529, or an AssistantMessage whose error is
+    "rate_limit"), or when it raises an error with such a status or an
+    explicit rate-limit/overload message. `limited()` then raises
+    RateLimited for a run that did not recover.
+  - When a call is rate limited, the bucket is paused for
+    RATE_LIMIT_COOLDOWN_SECONDS, so calls already waiting don't hit the
+    same wall.
+  - Adaptive concurrency (AIMD): a rate-limit error halves the worker pool's
+    concurrency, at most once per cooldown, so one burst of errors counts once.
+    Every ADAPTIVE_RECOVERY_RUNS successful calls add one slot back, up to
+    MAX_CONCURRENT_RUNS.
+
+The run that hit the limit is not lost: the runner puts it on the vault's
+retry queue (run store) with exponential backoff and jitter (`retry_delay()`).
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+import config
+from pool import WorkerPool
+
+log = logging.getLogger("tpm-runner")
+
+RATE_LIMIT_STATUSES = (429, 529)  # HTTP: too many requests, overloaded
+# Fallback for errors without a status. Explicit phrases only: "limit" or "token" alone
+# also match authentication, context-length and billing errors, which a retry won't fix.
+_RATE_LIMIT_PHRASES = ("rate limit", "rate_limit", "429", "529", "overloaded")
+
+
+class RateLimited(Exception):
+    """An SDK call whose messages reported a rate limit or overload and that did not recover."""
+
+
+def is_rate_limit_message(message) -> bool:
+    """True if an SDK message reports a rate limit or overload."""
+    if getattr(message, "error", None) == "rate_limit":  # AssistantMessage
+        return True
+    return (bool(getattr(message, "is_error", False))  # ResultMessage
+            and getattr(message, "api_error_status", None) in RATE_LIMIT_STATUSES)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True if an SDK error is a rate limit or overload error.
+
+    The HTTP status decides when the error carries one (ResultError); the
+    message text is checked only for errors without it.
+    """
+    if isinstance(error, RateLimited):
+        return True
+    status = getattr(error, "api_error_status", None)
+    if isinstance(status, int):
+        return status in RATE_LIMIT_STATUSES
+    text = str(error).lower()
+    return any(phrase in text for phrase in _RATE_LIMIT_PHRASES)
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` (1-based): exponential, capped, with jitter.
+
+    "Equal jitter": half the backoff is fixed, the other half random, so
+    retries of runs that failed together spread out but never come back early.
+    """
+    backoff = min(config.RETRY_MAX_SECONDS, config.RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class TokenBucket:
+    """Process-wide token bucket. `rate` is tokens per second (0 = unlimited)."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token (possibly one that has not refilled yet); return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    async def acquire(self) -> float:
+        """Wait for a token. Returns the seconds waited."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Hold back every call (waiting or new) for `seconds`."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """AIMD controller for the worker pools' `max_concurrent`."""
+
+    def __init__(self, ceiling: int):
+        self.ceiling = max(1, ceiling)
+        self.limit = self.ceiling
+        self._pools = weakref.WeakSet()
+        self._successes = 0
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    def attach(self, pool: WorkerPool):
+        """Let the controller resize `pool` (a RolePool or DistributedPool)."""
+        self._pools.add(pool)
+        pool.max_concurrent = min(pool.max_concurrent, self.limit)
+
+    def _apply(self):
+        for pool in self._pools:
+            pool.max_concurrent = self.limit
+
+    def on_rate_limited(self):
+        with self._lock:
+            now = time.monotonic()
+            self._successes = 0
+            if now - self._last_decrease < config.RATE_LIMIT_COOLDOWN_SECONDS or self.limit == 1:
+                return
+            self._last_decrease = now
+            previous, self.limit = self.limit, max(1, self.limit // 2)
+            self._apply()
+        log.warning(f"[ratelimit] Concurrency {previous} → {self.limit}")
+
+    def on_success(self):
+        with self._lock:
+            if self.limit >= self.ceiling:
+                return
+            self._successes += 1
+            if self._successes < config.ADAPTIVE_RECOVERY_RUNS:
+                return
+            self._successes = 0
+            self.limit += 1
+            self._apply()
+        log.info(f"[ratelimit] Concurrency back up to {self.limit}")
+
+
+limiter = TokenBucket(config.SDK_CALLS_PER_MINUTE / 60, config.SDK_BURST)
+concurrency = AdaptiveConcurrency(config.MAX_CONCURRENT_RUNS)
+
+
+def _rate_limited():
+    log.warning(f"[ratelimit] Rate limited — pausing SDK calls for {config.RATE_LIMIT_COOLDOWN_SECONDS:g}s")
+    limiter.pause(config.RATE_LIMIT_COOLDOWN_SECONDS)
+    if config.ADAPTIVE_CONCURRENCY:
+        concurrency.on_rate_limited()
+
+
+def _describe(message) -> str:
+    status = getattr(message, "api_error_status", None)
+    if status is not None:
+        detail = getattr(message, "result", None) or ""
+        return f"API error (HTTP {status}){': ' + detail[:200] if detail else ''}"
+    return f"API error: {message.error}"
+
+
+def limited(query_fn):
+    """Wrap an Agent SDK query() so every call goes through the limiter and reports its outcome."""
+
+    async def query(*, prompt, options):
+        waited = await limiter.acquire()
+        if waited >= 1:
+            log.debug(f"[ratelimit] Waited {waited:.1f}s for an SDK call slot")
+        limit_message = None  # last message that reported a rate limit
+        result = None
+        try:
+            async for message in query_fn(prompt=prompt, options=options):
+                if is_rate_limit_message(message):
+                    limit_message = message
+                if hasattr(message, "is_error"):  # ResultMessage
+                    result = message
+                yield message
+        except Exception as e:
+            if limit_message is not None or is_rate_limit_error(e):
+                _rate_limited()
+                if not is_rate_limit_error(e):
+                    raise RateLimited(f"{_describe(limit_message)} ({e})") from e
+            raise
+        if limit_message is not None and (result is None or result.is_error):
+            _rate_limited()
+            raise RateLimited(_describe(limit_message))
+        if config.ADAPTIVE_CONCURRENCY:
+            concurrency.on_success()
+
+    return query
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Retrieval — BM25 ranking of directory context files against a run's triggers.
+
+A role's Context Files can name whole directories (project/blockers/,
+project/decisions/, ...). On large vaults most of those files have nothing
+to do with the inbox items that caused a run. For inbox-triggered runs,
+`narrow()` keeps only the `top_k` files of each directory section that best
+match the trigger text; files named directly in Context Files are always
+kept. The rest are listed by name so the role can still Read them.
+
+Each vault has its own inverted index (Okapi BM25): documents, lengths and
+postings in a SQLite database next to the vault index (WAL mode, like the
+other stores). It survives restarts and is updated incrementally: a file is
+re-tokenized only when its content digest changes, and files that disappear
+from a directory are dropped from the corpus statistics. `python3
+retrieval.py` builds it ahead of time for every role's context directories;
+otherwise the first inbox-triggered run of a role fills in what is missing.
+
+Usage:
+    python3 retrieval.py                                   # Index every role's context directories
+    python3 retrieval.py --search "vendor delay" --dir project/blockers/
+    python3 retrieval.py --vault acme ...                  # ... for another configured vault
+"""
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import config
+import context
+from context import ContextSection
+
+K1 = 1.5
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_]+")
+_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have if in into is it its of on or that the their this to was
+were will with not no yes you your we our they them he she his her then than there these those what when
+which who why how all any can could should would may might must do does did done been being also just
+about after before over under more most other some such only own same so too very up down out off again
+further once here both each few nor md
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS and not t.isdigit()]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    path        TEXT PRIMARY KEY,
+    dir         TEXT NOT NULL,
+    digest      TEXT NOT NULL,
+    length      INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS docs_dir ON docs (dir);
+
+CREATE TABLE IF NOT EXISTS postings (
+    dir         TEXT NOT NULL,
+    term        TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    tf          INTEGER NOT NULL,
+    PRIMARY KEY (dir, term, path)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS postings_term ON postings (term);
+CREATE INDEX IF NOT EXISTS postings_path ON postings (path);
+"""
+
+
+def _batches(values: list[str], size: int = 500):
+    """Slices small enough for SQLite's bound-parameter limit."""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class BM25Index:
+    """Persistent, incremental BM25 index keyed by vault-relative path."""
+
+    def __init__(self, path: str, k1: float = K1, b: float = B):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            self._conn.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def _write(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                fn(self._conn)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def sync_dir(self, rel_dir: str, docs: dict[str, tuple[str, str]]) -> int:
+        """Make the documents directly inside `rel_dir` match `docs` {path: (digest, text)}.
+
+        Only new and changed documents are tokenized; missing ones are dropped.
+        Returns the number of documents added, changed or removed.
+        """
+        rel_dir = os.path.normpath(rel_dir)
+        with self._lock:
+            known = dict(self._conn.execute("SELECT path, digest FROM docs WHERE dir = ?", (rel_dir,)).fetchall())
+        changed = {p: text for p, (digest, text) in docs.items() if known.get(p) != digest}
+        gone = [p for p in known if p not in docs]
+        if not changed and not gone:
+            return 0
+        tokenized = {p: Counter(tokenize(text)) for p, text in changed.items()}
+
+        def apply(conn: sqlite3.Connection):
+            for path in gone + list(changed):
+                conn.execute("DELETE FROM postings WHERE path = ?", (path,))
+                conn.execute("DELETE FROM docs WHERE path = ?", (path,))
+            for path, tf in tokenized.items():
+                conn.execute("INSERT INTO docs VALUES (?, ?, ?, ?)",
+                             (path, os.path.dirname(path), docs[path][0], sum(tf.values())))
+                conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)",
+                                 [(os.path.dirname(path), t, path, n) for t, n in tf.items()])
+
+        self._write(apply)
+        return len(changed) + len(gone)
+
+    def paths_in(self, rel_dir: str) -> list[str]:
+        """Indexed documents directly inside a vault-relative directory."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM docs WHERE dir = ? ORDER BY path", (os.path.normpath(rel_dir),))
+            return [r[0] for r in rows]
+
+    def scores(self, query: str, paths: list[str]) -> dict[str, float]:
+        """BM25 score of every path in `paths` for the query text (0 for unindexed paths)."""
+        result = {p: 0.0 for p in paths}
+        terms = sorted(set(tokenize(query)))
+        if not terms or not paths:
+            return result
+        dirs = sorted({os.path.dirname(p) for p in paths})
+        df: dict[str, int] = {}
+        hits = []
+        with self._lock:
+            n, total_len = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+            lengths = {}
+            for batch in _batches(dirs):
+                lengths.update(self._conn.execute(
+                    f"SELECT path, length FROM docs WHERE dir IN ({','.join('?' * len(batch))})", batch,
+                ).fetchall())
+            for batch in _batches(terms):
+                marks = ",".join("?" * len(batch))
+                df.update(self._conn.execute(
+                    f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", batch,
+                ).fetchall())
+                for dir_batch in _batches(dirs):
+                    hits += [row for row in self._conn.execute(
+                        f"SELECT term, path, tf FROM postings "
+                        f"WHERE dir IN ({','.join('?' * len(dir_batch))}) AND term IN ({marks})",
+                        dir_batch + batch,
+                    ) if row[1] in result]
+        if not n:
+            return result
+        avg_len = total_len / n or 1.0
+        idf = {t: math.log((n - d + 0.5) / (d + 0.5) + 1) for t, d in df.items()}
+        for term, path, tf in hits:
+            norm = self.k1 * (1 - self.b + self.b * lengths[path] / avg_len)
+            result[path] += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def bm25_index() -> BM25Index:
+    """The current vault's BM25 index (paths are vault-relative, so vaults can't share one)."""
+    vault = config.vault()
+    with _indexes_lock:
+        index = _indexes.get(vault.name)
+        if index is None:
+            path = os.path.join(os.path.dirname(vault.index_path), "retrieval.db")
+            index = _indexes[vault.name] = BM25Index(path)
+        return index
+
+
+def _index_sections(index: BM25Index, sections: list[ContextSection]) -> int:
+    return sum(
+        index.sync_dir(section.rel, {f.path: (f.digest, f.text) for f in section.files})
+        for section in sections if section.is_dir
+    )
+
+
+def build(role_names: list[str] | None = None) -> int:
+    """Index the context directories of the current vault's roles ahead of time. Returns documents updated."""
+    index = bm25_index()
+    return sum(
+        _index_sections(index, context.collect(config.load_role(name)))
+        for name in role_names or config.list_roles()
+    )
+
+
+def narrow(sections: list[ContextSection], query: str, top_k: int) -> tuple[int, int]:
+    """Keep the `top_k` best-matching files of each directory section, in place.
+
+    Files are ranked by BM25 score against `query`, ties (including no match
+    at all) broken by most recently modified. Dropped paths are recorded in
+    `section.omitted`. Returns (files kept, files considered) over directory
+    sections.
+    """
+    index = bm25_index()
+    _index_sections(index, sections)
+    kept = considered = 0
+    for section in sections:
+        if not section.is_dir:
+            continue
+        considered += len(section.files)
+        if top_k <= 0 or len(section.files) <= top_k:
+            kept += len(section.files)
+            continue
+        scores = index.scores(query, [f.path for f in section.files])
+        ranked = sorted(section.files, key=lambda f: (-scores[f.path], -f.mtime_ns))
+        keep = {f.path for f in ranked[:top_k]}
+        section.omitted = [f.path for f in section.files if f.path not in keep]
+        section.files = [f for f in section.files if f.path in keep]
+        kept += len(section.files)
+    return kept, considered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the BM25 retrieval index")
+    parser.add_argument("--search", type=str, default=None, help="Rank the files of --dir against this text")
+    parser.add_argument("--dir", type=str, default=None, help="Vault-relative directory to rank (with --search)")
+    parser.add_argument("--limit", type=int, default=10, help="Number of results to show")
+    parser.add_argument("--vault", type=str, default=None, help="Vault name (default: the first configured vault)")
+    args = parser.parse_args()
+
+    vault = config.get_vault(args.vault) if args.vault else config.vault()
+    with config.use_vault(vault):
+        t = time.perf_counter()
+        updated = build()
+        index = bm25_index()
+        print(f"Index of {vault.name} up to date in {(time.perf_counter() - t) * 1000:.1f} ms "
+              f"({updated} documents updated, {len(index)} indexed)")
+        if args.search:
+            rel_dir = args.dir or "project"
+            ranked = sorted(index.scores(args.search, index.paths_in(rel_dir)).items(), key=lambda kv: -kv[1])
+            for path, score in ranked[:args.limit]:
+                print(f"  {score:7.3f}  {path}")
+
+
+if __name__ == "__main__":
+    main()
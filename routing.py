@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Model routing — picks the model for each role run from what the run has to do.
+
+A role's `## Model` is its default. With MODEL_ROUTING=1 (off by default),
+each run is routed from signals that are known before the session starts:
+
+    context_tokens   estimated tokens of the role's context (after budgets, before delta mode)
+    inbox_items      trigger files in the role's inbox, and the highest priority among them
+    changed          share of context files added, changed or removed since the role's last
+                     full run (1.0 when there is nothing to compare against)
+    history          outcomes of the role's recent runs on the candidate model (run store)
+
+Rules, first match wins:
+
+    off      routing is off, globally or for the role
+    fixed    the run was started by hand with --role (trigger "manual"); --once runs are routed
+    heavy    a high-priority inbox of ROUTING_HEAVY_MIN_ITEMS+ items, or ROUTING_HEAVY_MIN_TOKENS+
+             of context → the role's heavy model (default: its own model, i.e. no escalation)
+    light    nothing above low priority in an inbox of at most ROUTING_LIGHT_MAX_ITEMS, at most
+             ROUTING_LIGHT_MAX_CHANGED of the context changed, and at most
+             ROUTING_LIGHT_MAX_TOKENS sent → the role's light model (default haiku)
+    guard    light or heavy was chosen, but the candidate model failed (error or missing log)
+             in ROUTING_MAX_FAILURE_RATE+ of its routed runs among the role's last ROUTING_HISTORY
+             runs → the role's default model (the failures age out, so the model is tried again)
+    default  everything else
+
+Per-role overrides go in an optional `## Model Routing` section of the role file:
+
+    ## Model Routing
+    - light: haiku
+    - heavy: opus
+
+or just `off` to always use `## Model`. Every decision is logged, stored with
+the run (runs.routing; NULL when routing was off) and written to metrics/runs.jsonl.
+A session stays on one model: when today's session ran on another model than the
+one chosen, the run starts a fresh session with full context instead of resuming.
+
+Usage (reporting):
+    python3 routing.py                  # Latency/cost per role, runs before vs. after routing (7 days)
+    python3 routing.py --days 30        # ... over a longer window
+    python3 routing.py --vault acme     # ... for another configured vault
+"""
+
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import config
+from frontmatter import PRIORITY_RANK
+from run_store import get_store
+
+NO_INBOX = -1
+
+
+@dataclass(frozen=True, slots=True)
+class Policy:
+    """A role's routing overrides, parsed from its `## Model Routing` section."""
+
+    enabled: bool = True
+    light: str = "haiku"
+    heavy: str | None = None  # None = the role's own model
+
+
+def parse_policy(text: str) -> Policy:
+    """Parse a `## Model Routing` section. Empty means the defaults."""
+    text = text.strip().lower()
+    if text.startswith(("off", "none", "fixed")):
+        return Policy(enabled=False)
+    overrides = {}
+    for line in text.splitlines():
+        key, sep, value = line.strip().lstrip("- ").partition(":")
+        if sep and key.strip() in ("light", "heavy") and value.strip():
+            overrides[key.strip()] = value.strip()
+    return Policy(**overrides)
+
+
+@dataclass(slots=True)
+class Signals:
+    trigger: str
+    context_tokens: int
+    inbox_items: int
+    inbox_priority: int  # highest priority rank in the inbox, NO_INBOX if empty
+    changed: float
+
+    def describe(self) -> str:
+        if self.inbox_items:
+            priority = next(name for name, rank in PRIORITY_RANK.items() if rank == self.inbox_priority)
+            inbox = f"{self.inbox_items} inbox item(s), up to {priority}"
+        else:
+            inbox = "empty inbox"
+        return f"{inbox}, {self.changed:.0%} of context changed, ~{self.context_tokens} context tokens"
+
+
+@dataclass(frozen=True, slots=True)
+class Decision:
+    model: str
+    default: str
+    rule: str  # off | fixed | heavy | light | guard | default
+    signals: Signals
+    note: str = ""
+
+    @property
+    def routed(self) -> bool:
+        return self.model != self.default
+
+    def describe(self) -> str:
+        text = f"{self.model} ({self.rule}"
+        if self.routed:
+            text += f", role default {self.default}"
+        text += f" — {self.signals.describe()}"
+        if self.note:
+            text += f"; {self.note}"
+        return text + ")"
+
+
+def changed_share(current: dict[str, str], previous: dict[str, str] | None) -> float:
+    """Share of context files added, changed or removed between two {path: digest} manifests."""
+    if previous is None:
+        return 1.0
+    paths = current.keys() | previous.keys()
+    if not paths:
+        return 0.0
+    return sum(current.get(p) != previous.get(p) for p in paths) / len(paths)
+
+
+def _failure_rate(role_name: str, model: str, rule: str) -> tuple[int, int]:
+    """(failed, total) of the `rule`-routed runs on `model` among the role's last ROUTING_HISTORY runs."""
+    runs = [
+        r for r in get_store().recent_runs(role_name, config.ROUTING_HISTORY)
+        if r["model"] == model and r["routing"] == rule
+    ]
+    failed = sum(1 for r in runs if r["status"] != "ok" or r["log_verified"] == 0)
+    return failed, len(runs)
+
+
+def decide(role_cfg, signals: Signals) -> Decision:
+    """Choose the model for one run of a role of the current vault."""
+    default = role_cfg["model"]
+    policy = parse_policy(role_cfg.get("routing") or "")
+    if not config.MODEL_ROUTING or not policy.enabled:
+        return Decision(default, default, "off", signals)
+    if signals.trigger == "manual":
+        return Decision(default, default, "fixed", signals)
+
+    high = PRIORITY_RANK["high"]
+    if ((signals.inbox_priority >= high and signals.inbox_items >= config.ROUTING_HEAVY_MIN_ITEMS)
+            or signals.context_tokens >= config.ROUTING_HEAVY_MIN_TOKENS):
+        rule, candidate = "heavy", policy.heavy or default
+    elif (signals.inbox_priority <= PRIORITY_RANK["low"]
+            and signals.inbox_items <= config.ROUTING_LIGHT_MAX_ITEMS
+            and signals.changed <= config.ROUTING_LIGHT_MAX_CHANGED
+            and signals.context_tokens <= config.ROUTING_LIGHT_MAX_TOKENS):
+        rule, candidate = "light", policy.light
+    else:
+        return Decision(default, default, "default", signals)
+
+    if candidate == default:
+        return Decision(default, default, rule, signals)
+    failed, total = _failure_rate(role_cfg["name"], candidate, rule)
+    if total and failed / total >= config.ROUTING_MAX_FAILURE_RATE:
+        return Decision(default, default, "guard", signals,
+                        f"{candidate} failed {failed} of its last {total} {rule} runs")
+    return Decision(candidate, default, rule, signals)
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _fmt(row: dict) -> str:
+    duration = f"{row['avg_duration_ms'] / 1000:.1f}s" if row["avg_duration_ms"] is not None else "-"
+    cost = f"${row['avg_cost_usd']:.4f}" if row["avg_cost_usd"] is not None else "-"
+    return f"runs={row['runs']:<4} failed={row['failed'] or 0:<3} avg={duration:>7} avg_cost={cost:>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model routing report: runs before vs. after routing")
+    parser.add_argument("--days", type=float, default=7, help="Report window in days")
+    parser.add_argument("--vault", type=str, default=None, help="Vault name (default: the first configured vault)")
+    args = parser.parse_args()
+
+    if args.vault:
+        with config.use_vault(config.get_vault(args.vault)):
+            store = get_store()
+    else:
+        store = get_store()
+    since = (datetime.now(timezone.utc) - timedelta(days=args.days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    print(f"Runs since {since} (skipped runs excluded)")
+    rows = store.routing_summary_since(since)
+    for role in sorted({r["role"] for r in rows}):
+        print(f"  {role}")
+        for row in rows:
+            if row["role"] != role:
+                continue
+            label = row["rule"] or "off"
+            print(f"    {label:<8} {row['model'] or '-':<8} {_fmt(row)}")
+        for phase in ("before", "after"):
+            group = [r for r in rows if r["role"] == role and (r["rule"] is None) == (phase == "before")]
+            runs = sum(r["runs"] for r in group)
+            if not runs:
+                continue
+            timed = [(r["avg_duration_ms"], r["runs"]) for r in group if r["avg_duration_ms"] is not None]
+            costed = [(r["avg_cost_usd"], r["runs"]) for r in group if r["avg_cost_usd"] is not None]
+            total = {
+                "runs": runs,
+                "failed": sum(r["failed"] or 0 for r in group),
+                "avg_duration_ms": sum(v * n for v, n in timed) / sum(n for _, n in timed) if timed else None,
+                "avg_cost_usd": sum(v * n for v, n in costed) / sum(n for _, n in costed) if costed else None,
+            }
+            print(f"    {phase.upper():<17} {_fmt(total)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""Run store — SQLite-backed session IDs, context manifests and run history.
+
+Replaces .sessions/sessions.json. The database runs in WAL mode with a busy
+timeout, so concurrent role runs and several runner processes can read and
+write it safely; every write is a single transaction. Each vault has its
+own database, so role names and sessions never collide across vaults.
+
+Tables:
+    sessions          — current session per role (resume same day, fresh next day)
+    context_manifests — {path: digest} of context already sent in a session
+    runs              — one row per role run (trigger, model, timing, cost, outcome)
+    summaries         — log summaries keyed by a digest of their input (see summaries.py)
+    fingerprints      — digest of each role's inputs after its last full run (skips no-op runs)
+    retries           — rate-limited runs waiting to be retried (one per role, with backoff)
+
+Usage (reporting):
+    python3 run_store.py              # Per-role summary for the last 7 days
+    python3 run_store.py --days 1     # ... for the last day
+    python3 run_store.py --recent 20  # Last 20 runs
+    python3 run_store.py --vault acme # ... for another configured vault
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    role        TEXT PRIMARY KEY,
+    session_id  TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    updated_at  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS context_manifests (
+    role        TEXT PRIMARY KEY,
+    session_id  TEXT NOT NULL,
+    files       TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    role            TEXT NOT NULL,
+    trigger         TEXT NOT NULL,
+    model           TEXT,
+    started_at      TEXT NOT NULL,
+    ended_at        TEXT,
+    duration_ms     INTEGER,
+    total_cost_usd  REAL,
+    session_id      TEXT,
+    log_verified    INTEGER,
+    status          TEXT NOT NULL DEFAULT 'running',
+    error           TEXT,
+    routing         TEXT
+);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    digest      TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    role        TEXT NOT NULL,
+    period      TEXT NOT NULL,
+    summary     TEXT NOT NULL,
+    cost_usd    REAL,
+    created_at  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fingerprints (
+    role        TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    files       TEXT,
+    run_at      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS retries (
+    role        TEXT PRIMARY KEY,
+    trigger     TEXT NOT NULL,
+    attempts    INTEGER NOT NULL,
+    due_at      REAL,
+    last_error  TEXT,
+    updated_at  TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS runs_role_started ON runs (role, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status, started_at);
+"""
+
+# (table, column, declaration) added after the table was first released
+_ADDED_COLUMNS = (
+    ("runs", "routing", "TEXT"),
+    ("fingerprints", "files", "TEXT"),
+)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class RunStore:
+    """Thin, thread-safe wrapper around the run database."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            self._conn.executescript(_SCHEMA)
+            self._add_missing_columns()
+        self._migrate_sessions_json()
+
+    def _transaction(self, fn):
+        """Run `fn(conn)` in one write transaction, so a read and the write based on it can't interleave."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _write(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        return self._transaction(lambda conn: conn.execute(sql, params))
+
+    def _read(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _add_missing_columns(self):
+        """Bring tables created by older versions up to date (CREATE TABLE IF NOT EXISTS won't)."""
+        for table, column, decl in _ADDED_COLUMNS:
+            columns = {row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+    def _migrate_sessions_json(self):
+        """Import a legacy sessions.json once, then rename it out of the way."""
+        legacy = os.path.join(os.path.dirname(self.path), "sessions.json")
+        if not os.path.isfile(legacy):
+            return
+        try:
+            with open(legacy) as f:
+                sessions = json.load(f)
+        except (OSError, ValueError):
+            sessions = {}
+        for role, entry in sessions.items():
+            if entry.get("session_id") and entry.get("date"):
+                self._write(
+                    "INSERT OR IGNORE INTO sessions (role, session_id, date, updated_at) VALUES (?, ?, ?, ?)",
+                    (role, entry["session_id"], entry["date"], _now_iso()),
+                )
+        os.replace(legacy, legacy + ".migrated")
+
+    # -- sessions -----------------------------------------------------------
+
+    def get_session(self, role: str, date: str) -> str | None:
+        rows = self._read("SELECT session_id FROM sessions WHERE role = ? AND date = ?", (role, date))
+        return rows[0]["session_id"] if rows else None
+
+    def save_session(self, role: str, session_id: str, date: str):
+        self._write(
+            "INSERT INTO sessions (role, session_id, date, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(role) DO UPDATE SET session_id = excluded.session_id, "
+            "date = excluded.date, updated_at = excluded.updated_at",
+            (role, session_id, date, _now_iso()),
+        )
+
+    # -- context manifests --------------------------------------------------
+
+    def get_context_manifest(self, role: str, session_id: str) -> dict[str, str] | None:
+        rows = self._read(
+            "SELECT files FROM context_manifests WHERE role = ? AND session_id = ?", (role, session_id)
+        )
+        return json.loads(rows[0]["files"]) if rows else None
+
+    def save_context_manifest(self, role: str, session_id: str, files: dict[str, str]):
+        self._write(
+            "INSERT INTO context_manifests (role, session_id, files) VALUES (?, ?, ?) "
+            "ON CONFLICT(role) DO UPDATE SET session_id = excluded.session_id, files = excluded.files",
+            (role, session_id, json.dumps(files)),
+        )
+
+    def referenced_digests(self) -> set[str]:
+        digests = set()
+        for row in self._read("SELECT files FROM context_manifests"):
+            digests.update(json.loads(row["files"]).values())
+        return digests
+
+    # -- runs ---------------------------------------------------------------
+
+    def start_run(
+        self, role: str, trigger: str, model: str | None, session_id: str | None = None, routing: str | None = None,
+    ) -> int:
+        cur = self._write(
+            "INSERT INTO runs (role, trigger, model, started_at, session_id, routing) VALUES (?, ?, ?, ?, ?, ?)",
+            (role, trigger, model, _now_iso(), session_id, routing),
+        )
+        return cur.lastrowid
+
+    def finish_run(
+        self,
+        run_id: int,
+        status: str,
+        duration_ms: int | None = None,
+        total_cost_usd: float | None = None,
+        session_id: str | None = None,
+        log_verified: bool | None = None,
+        error: str | None = None,
+    ):
+        self._write(
+            "UPDATE runs SET status = ?, ended_at = ?, duration_ms = ?, total_cost_usd = ?, "
+            "session_id = COALESCE(?, session_id), log_verified = ?, error = ? WHERE id = ?",
+            (
+                status, _now_iso(), duration_ms, total_cost_usd, session_id,
+                None if log_verified is None else int(log_verified), error, run_id,
+            ),
+        )
+
+    def session_model(self, session_id: str) -> str | None:
+        """Model of the latest run in a session (None if the session has no recorded runs)."""
+        rows = self._read(
+            "SELECT model FROM runs WHERE session_id = ? ORDER BY started_at DESC, id DESC LIMIT 1", (session_id,)
+        )
+        return rows[0]["model"] if rows else None
+
+    def last_run(self, role: str, status: str | None = None) -> dict | None:
+        sql = "SELECT * FROM runs WHERE role = ?"
+        params: tuple = (role,)
+        if status:
+            sql += " AND status = ?"
+            params += (status,)
+        rows = self._read(sql + " ORDER BY started_at DESC, id DESC LIMIT 1", params)
+        return dict(rows[0]) if rows else None
+
+    def recent_runs(self, role: str | None = None, limit: int = 50) -> list[dict]:
+        if role:
+            rows = self._read(
+                "SELECT * FROM runs WHERE role = ? ORDER BY started_at DESC, id DESC LIMIT ?", (role, limit)
+            )
+        else:
+            rows = self._read("SELECT * FROM runs ORDER BY started_at DESC, id DESC LIMIT ?", (limit,))
+        return [dict(r) for r in rows]
+
+    def runs_since(self, since_iso: str, role: str | None = None) -> list[dict]:
+        if role:
+            rows = self._read(
+                "SELECT * FROM runs WHERE role = ? AND started_at >= ? ORDER BY started_at", (role, since_iso)
+            )
+        else:
+            rows = self._read("SELECT * FROM runs WHERE started_at >= ? ORDER BY started_at", (since_iso,))
+        return [dict(r) for r in rows]
+
+    def summary_since(self, since_iso: str) -> list[dict]:
+        """Per-role run counts, failures, skips, average duration and total cost since a time."""
+        rows = self._read(
+            "SELECT role, COUNT(*) AS runs, "
+            "SUM(status NOT IN ('ok', 'skipped')) AS failed, "
+            "SUM(status = 'skipped') AS skipped, "
+            "SUM(log_verified = 0) AS unverified_logs, "
+            "AVG(CASE WHEN status != 'skipped' THEN duration_ms END) AS avg_duration_ms, "
+            "SUM(COALESCE(total_cost_usd, 0)) AS total_cost_usd "
+            "FROM runs WHERE started_at >= ? GROUP BY role ORDER BY role",
+            (since_iso,),
+        )
+        return [dict(r) for r in rows]
+
+    def routing_summary_since(self, since_iso: str) -> list[dict]:
+        """Per (role, routing rule, model): run counts, failures, average duration and cost since a time.
+
+        Skipped runs are left out; a NULL rule means model routing was off for the run.
+        """
+        rows = self._read(
+            "SELECT role, routing AS rule, model, COUNT(*) AS runs, "
+            "SUM(status != 'ok' OR log_verified = 0) AS failed, "
+            "AVG(duration_ms) AS avg_duration_ms, "
+            "AVG(total_cost_usd) AS avg_cost_usd "
+            "FROM runs WHERE started_at >= ? AND status != 'skipped' "
+            "GROUP BY role, routing, model ORDER BY role, routing IS NOT NULL, routing, model",
+            (since_iso,),
+        )
+        return [dict(r) for r in rows]
+
+    # -- input fingerprints -------------------------------------------------
+
+    def get_fingerprint(self, role: str) -> tuple[str, str] | None:
+        """(fingerprint, ISO time of the run it was taken after) for a role, if any."""
+        rows = self._read("SELECT fingerprint, run_at FROM fingerprints WHERE role = ?", (role,))
+        return (rows[0]["fingerprint"], rows[0]["run_at"]) if rows else None
+
+    def get_input_manifest(self, role: str) -> dict[str, str] | None:
+        """{path: digest} of the role's context files as of its last full run, if recorded."""
+        rows = self._read("SELECT files FROM fingerprints WHERE role = ?", (role,))
+        return json.loads(rows[0]["files"]) if rows and rows[0]["files"] is not None else None
+
+    def save_fingerprint(self, role: str, fingerprint: str, files: dict[str, str] | None = None):
+        self._write(
+            "INSERT OR REPLACE INTO fingerprints (role, fingerprint, files, run_at) VALUES (?, ?, ?, ?)",
+            (role, fingerprint, None if files is None else json.dumps(files), _now_iso()),
+        )
+
+    # -- retry queue --------------------------------------------------------
+    # due_at is unix time; NULL while the retry is handed to the pool
+
+    def schedule_retry(self, role: str, trigger: str, delay_fn, error: str) -> tuple[int, float] | None:
+        """Queue (or re-queue) a retry of a rate-limited run.
+
+        `delay_fn(attempt)` gives the backoff. Returns (attempt, due_at), or
+        None once RETRY_MAX_ATTEMPTS retries have been used up (the retry is dropped).
+        """
+        def txn(conn: sqlite3.Connection) -> tuple[int, float] | None:
+            row = conn.execute("SELECT attempts FROM retries WHERE role = ?", (role,)).fetchone()
+            attempt = (row["attempts"] if row else 0) + 1
+            if attempt > config.RETRY_MAX_ATTEMPTS:
+                conn.execute("DELETE FROM retries WHERE role = ?", (role,))
+                return None
+            due_at = time.time() + delay_fn(attempt)
+            conn.execute(
+                "INSERT OR REPLACE INTO retries (role, trigger, attempts, due_at, last_error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (role, trigger, attempt, due_at, error[:500], _now_iso()),
+            )
+            return attempt, due_at
+
+        return self._transaction(txn)
+
+    def take_due_retries(self, now: float | None = None) -> list[dict]:
+        """Retries that are due, marked as handed out (due_at = NULL)."""
+        now = time.time() if now is None else now
+
+        def txn(conn: sqlite3.Connection) -> list[dict]:
+            rows = [dict(r) for r in conn.execute(
+                "SELECT * FROM retries WHERE due_at IS NOT NULL AND due_at <= ? ORDER BY due_at", (now,)
+            )]
+            conn.execute("UPDATE retries SET due_at = NULL WHERE due_at IS NOT NULL AND due_at <= ?", (now,))
+            return rows
+
+        return self._transaction(txn)
+
+    def next_retry_at(self) -> float | None:
+        rows = self._read("SELECT MIN(due_at) AS due FROM retries WHERE due_at IS NOT NULL")
+        return rows[0]["due"] if rows else None
+
+    def requeue_retries(self):
+        """Make retries that were handed out by a process that then stopped due again."""
+        self._write("UPDATE retries SET due_at = ? WHERE due_at IS NULL", (time.time(),))
+
+    def clear_retry(self, role: str):
+        self._write("DELETE FROM retries WHERE role = ?", (role,))
+
+    def retries(self) -> list[dict]:
+        return [dict(r) for r in self._read("SELECT * FROM retries ORDER BY due_at")]
+
+    # -- log summaries ------------------------------------------------------
+
+    def get_summary(self, digest: str) -> str | None:
+        rows = self._read("SELECT summary FROM summaries WHERE digest = ?", (digest,))
+        return rows[0]["summary"] if rows else None
+
+    def save_summary(self, digest: str, kind: str, role: str, period: str, summary: str, cost_usd: float | None):
+        self._write(
+            "INSERT OR REPLACE INTO summaries (digest, kind, role, period, summary, cost_usd, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (digest, kind, role, period, summary, cost_usd, _now_iso()),
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_stores: dict[str, RunStore] = {}
+_store_lock = threading.Lock()
+
+
+def get_store() -> RunStore:
+    """Return the current vault's run store, opening it on first use."""
+    vault = config.vault()
+    with _store_lock:
+        store = _stores.get(vault.name)
+        if store is None:
+            store = _stores[vault.name] = RunStore(vault.run_store_path)
+        return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run history report")
+    parser.add_argument("--days", type=float, default=7, help="Summary window in days")
+    parser.add_argument("--recent", type=int, default=0, help="List the N most recent runs instead")
+    parser.add_argument("--vault", type=str, default=None, help="Vault name (default: the first configured vault)")
+    args = parser.parse_args()
+
+    if args.vault:
+        with config.use_vault(config.get_vault(args.vault)):
+            store = get_store()
+    else:
+        store = get_store()
+    if args.recent:
+        for run in reversed(store.recent_runs(limit=args.recent)):
+            cost = f"${run['total_cost_usd']:.4f}" if run["total_cost_usd"] is not None else "-"
+            duration = f"{run['duration_ms'] / 1000:.1f}s" if run["duration_ms"] is not None else "-"
+            model = f"{run['model']} ({run['routing']})" if run["routing"] else run["model"] or "-"
+            print(f"{run['started_at']}  {run['role']:<10} {run['status']:<12} {duration:>8} {cost:>9}  "
+                  f"{model}  {run['trigger']}")
+        return
+
+    since = (datetime.now(timezone.utc) - timedelta(days=args.days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    print(f"Runs since {since}")
+    for row in store.summary_since(since):
+        avg = f"{row['avg_duration_ms'] / 1000:.1f}s" if row["avg_duration_ms"] is not None else "-"
+        print(f"  {row['role']:<10} runs={row['runs']:<4} failed={row['failed'] or 0:<3} "
+              f"skipped={row['skipped'] or 0:<3} "
+              f"unverified_logs={row['unverified_logs'] or 0:<3} avg={avg:>7} cost=${row['total_cost_usd']:.4f}")
+    retries = store.retries()
+    if retries:
+        print("Pending retries (rate-limited runs)")
+    for row in retries:
+        due = "in flight"
+        if row["due_at"] is not None:
+            due = datetime.fromtimestamp(row["due_at"], timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        print(f"  {row['role']:<10} attempt={row['attempts']:<3} due={due:<20} {row['trigger']}")
+
+
+if __name__ == "__main__":
+    main()
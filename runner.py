@@ -7,25 +7,50 @@ Usage:
     python3 runner.py --role delivery      # Run a single role immediately
     python3 runner.py --dry-run            # Show what would run
     python3 runner.py --role comms --once  # Run comms once, then exit
+    python3 runner.py --role acme/comms    # Run a role of another vault (see VAULTS)
+    python3 runner.py --vault acme         # Serve only one of the configured vaults
+    python3 runner.py --simulate --days 7 --arrival-rate 2   # Capacity-plan on a virtual clock
 """
 
 import argparse
 import asyncio
-import json
+import atexit
+import functools
+import hashlib
 import logging
+import logging.handlers
 import os
-import re
+import queue
+import random
 import sys
 import time
-from datetime import datetime, timedelta, timezone
-
-import schedule
+from datetime import datetime, timezone
 
+import archive
 import config
+import context
+import job_queue
+import large_files
+import metrics
+import prompt
+import ratelimit
+import retrieval
+import routing
+import simulator
+import summaries
+import transcripts
+import watcher
+from frontmatter import PRIORITY_RANK
+from pool import RolePool, WorkerPool
+from run_store import get_store
+from scheduler import DeadlineScheduler, parse_schedule_spec
+from vault_cache import cache
+from vault_index import get_index
 from claude_agent_sdk import (
     ClaudeAgentOptions,
     ResultMessage,
     AssistantMessage,
+    ToolUseBlock,
     query,
 )
 
@@ -33,26 +58,69 @@ from claude_agent_sdk import (
 # Logging
 # ---------------------------------------------------------------------------
 
+class _VaultFilter(logging.Filter):
+    """Adds %(vault)s: "<name>: " inside a vault-bound task when several vaults are served."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        bound = config.bound_vault()
+        record.vault = f"{bound.name}: " if bound is not None and len(config.vaults()) > 1 else ""
+        return True
+
+
+class _RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates by size (maxBytes) and also every `interval` seconds, at multiples of the interval since the epoch."""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, interval: float):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.interval = interval
+        self.rollover_at = self._next_boundary(time.time())
+        # A file left over from an earlier interval starts a new one
+        if interval > 0 and os.path.isfile(filename):
+            if os.path.getmtime(filename) < self.rollover_at - interval:
+                self.rollover_at = 0
+
+    def _next_boundary(self, now: float) -> float:
+        if self.interval <= 0:
+            return float("inf")
+        return (now // self.interval + 1) * self.interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_boundary(time.time())
+
+
 def setup_logging() -> logging.Logger:
-    log_dir = os.path.join(os.path.dirname(__file__), "logs")
-    os.makedirs(log_dir, exist_ok=True)
+    """Log through a queue: callers only enqueue, a listener thread formats and writes.
 
-    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H%M%S")
-    log_file = os.path.join(log_dir, f"{timestamp}_runner.log")
+    The vault prefix is resolved by the queue handler's filter, in the calling
+    task, because the vault binding is a context variable.
+    """
+    os.makedirs(config.LOG_DIR, exist_ok=True)
+    log_file = os.path.join(config.LOG_DIR, "runner.log")
 
     logger = logging.getLogger("tpm-runner")
     logger.setLevel(logging.DEBUG)
 
-    fh = logging.FileHandler(log_file)
+    fh = _RotatingFileHandler(log_file, config.LOG_MAX_BYTES, config.LOG_BACKUPS, config.LOG_ROTATE_HOURS * 3600)
     fh.setLevel(logging.DEBUG)
-    fh.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    fh.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(vault)s%(message)s"))
 
     ch = logging.StreamHandler()
     ch.setLevel(logging.INFO)
-    ch.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+    ch.setFormatter(logging.Formatter("[%(asctime)s] %(vault)s%(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+
+    qh = logging.handlers.QueueHandler(queue.SimpleQueue())
+    qh.addFilter(_VaultFilter())
+    listener = logging.handlers.QueueListener(qh.queue, fh, ch, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
 
-    logger.addHandler(fh)
-    logger.addHandler(ch)
+    logger.addHandler(qh)
 
     logger.info(f"Runner log: {log_file}")
     return logger
@@ -63,125 +131,218 @@ log = setup_logging()
 
 # ---------------------------------------------------------------------------
 # Session management — resume same day, fresh next day
+# (per vault: every vault has its own run store)
 # ---------------------------------------------------------------------------
 
-def _sessions_file() -> str:
-    os.makedirs(config.SESSIONS_DIR, exist_ok=True)
-    return os.path.join(config.SESSIONS_DIR, "sessions.json")
-
-
-def _load_sessions() -> dict:
-    path = _sessions_file()
-    if os.path.isfile(path):
-        with open(path) as f:
-            return json.load(f)
-    return {}
-
-
-def _save_sessions(sessions: dict):
-    with open(_sessions_file(), "w") as f:
-        json.dump(sessions, f, indent=2)
-
-
 def get_session_id(role_name: str) -> str | None:
     """Get existing session ID for a role if it's from today. Otherwise None (fresh start)."""
-    sessions = _load_sessions()
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    entry = sessions.get(role_name)
-    if entry and entry.get("date") == today:
-        return entry.get("session_id")
-    return None
+    return get_store().get_session(role_name, today)
 
 
 def save_session_id(role_name: str, session_id: str):
     """Save session ID for a role with today's date."""
-    sessions = _load_sessions()
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    sessions[role_name] = {"session_id": session_id, "date": today}
-    _save_sessions(sessions)
+    get_store().save_session(role_name, session_id, today)
+
+
+def get_context_manifest(role_name: str, session_id: str) -> dict[str, str] | None:
+    """Return {path: digest} of the context already sent in this session, if known."""
+    return get_store().get_context_manifest(role_name, session_id)
+
+
+def save_context_manifest(role_name: str, session_id: str, sections: list[context.ContextSection]):
+    """Record which context file versions this session has seen (for delta mode)."""
+    context.save_blobs(sections)
+    store = get_store()
+    store.save_context_manifest(role_name, session_id, context.manifest(sections))
+    # Keep only the blobs some role's current manifest still refers to
+    context.prune_blobs(store.referenced_digests())
 
 
 # ---------------------------------------------------------------------------
 # Vault helpers
 # ---------------------------------------------------------------------------
 
+def answered_dir_path() -> str:
+    """Absolute path of the current vault's agent/inbox/user/answered/ directory."""
+    return os.path.join(config.vault().path, "agent", "inbox", "user", "answered")
+
+
 def load_vault_system_prompt() -> str:
-    """Load the vault's CLAUDE.md as the base system prompt."""
-    claude_md = os.path.join(config.VAULT_PATH, "CLAUDE.md")
+    """Load the vault's CLAUDE.md as the base system prompt (served from the vault cache)."""
+    claude_md = os.path.join(config.vault().path, "CLAUDE.md")
     if not os.path.isfile(claude_md):
         log.info("CLAUDE.md not found. Defaulting to generic system prompt.")
         return "You are a TPM AI agent. Help manage the project."
-    with open(claude_md) as f:
-        return f.read()
+    return cache.read_text(claude_md)
 
 
-def load_role_context(role_cfg: dict) -> str:
+def load_role_context(role_cfg: config.RoleConfig, trigger_text: str | None = None) -> str:
     """Read only the context files specified in the role config.
 
     When a path is a directory, reads all .md files inside (sorted),
-    skipping archive/ subdirectories and .gitkeep files.
+    skipping archive/ subdirectories and .gitkeep files. Unchanged files and
+    directory listings are served from the vault cache. With `trigger_text`
+    (inbox-triggered runs), directories are narrowed to their most relevant
+    files. The result is capped at the role's context budget.
     """
-    parts = []
-    for rel in role_cfg["context_files"]:
-        full = os.path.join(config.VAULT_PATH, rel)
-        if os.path.isfile(full):
-            with open(full) as f:
-                content = f.read()
-            parts.append(f"--- {rel} ---\n{content}")
-        elif os.path.isdir(full):
-            dir_parts = []
-            for fn in sorted(os.listdir(full)):
-                if fn == ".gitkeep" or fn.startswith("."):
-                    continue
-                entry_path = os.path.join(full, fn)
-                if os.path.isdir(entry_path):
-                    continue  # skip archive/ and other subdirectories
-                if fn.endswith(".md"):
-                    with open(entry_path) as f:
-                        content = f.read()
-                    dir_parts.append(f"### {fn}\n{content}")
-            if dir_parts:
-                parts.append(f"--- {rel} ---\n" + "\n\n".join(dir_parts))
-            else:
-                parts.append(f"--- {rel} ---\n(empty directory)")
-    return "\n\n".join(parts)
+    return context.render(role_context_sections(role_cfg, trigger_text))
+
+
+def role_context_sections(role_cfg: config.RoleConfig, trigger_text: str | None = None) -> list[context.ContextSection]:
+    """Collected, narrowed and budgeted context sections (see load_role_context)."""
+    sections = context.collect(role_cfg)
+    if trigger_text:
+        retrieval.narrow(sections, trigger_text, config.RETRIEVAL_TOP_K)
+    context.apply_budget(sections, context.budget_for(role_cfg))
+    return sections
+
+
+def is_inbox_only(reason: str) -> bool:
+    """True if every trigger coalesced into this run came from the inbox."""
+    return all(part.startswith("inbox") for part in reason.split(" + "))
+
+
+def is_scheduled_only(reason: str) -> bool:
+    """True if every trigger coalesced into this run was a schedule."""
+    return all(part.startswith("scheduled") for part in reason.split(" + "))
+
+
+def input_fingerprint(role_cfg: config.RoleConfig, sections: list[context.ContextSection] | None = None) -> str:
+    """Digest of everything a run of the role would see.
+
+    Covers the system prompt (role config + vault CLAUDE.md), every context
+    file (before retrieval and budgets), the inbox and the role's memory file.
+    Unchanged files are served from the vault cache, so this costs a few stat() calls.
+    Pass `sections` if they were just collected (and not yet narrowed or budgeted).
+    """
+    if sections is None:
+        sections = context.collect(role_cfg)
+    h = hashlib.sha256()
+    for segment in build_role_system_segments(role_cfg):
+        h.update(segment.digest.encode())
+    for path, digest in sorted(context.manifest(sections).items()):
+        h.update(f"{path}\0{digest}\n".encode())
+    h.update(check_inbox(role_cfg).encode("utf-8", "surrogateescape"))
+    memory = os.path.join(config.vault().path, "agent", "memory", f"{role_cfg['name']}.md")
+    if os.path.isfile(memory):
+        h.update(cache.entry(memory, context.large_file_limit(role_cfg)).digest.encode())
+    return h.hexdigest()
+
+
+def unchanged_since(role_name: str, fingerprint: str) -> str | None:
+    """When the role's inputs match its last full run (and that run is recent enough), its time; else None."""
+    last = get_store().get_fingerprint(role_name)
+    if last is None or last[0] != fingerprint:
+        return None
+    run_at = datetime.strptime(last[1], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    age_hours = (datetime.now(timezone.utc) - run_at).total_seconds() / 3600
+    if age_hours >= config.SKIP_UNCHANGED_MAX_AGE_HOURS:
+        return None
+    return last[1]
+
+
+def routing_signals(
+    role_cfg: config.RoleConfig, reason: str, context_chars: int, files: dict[str, str],
+) -> routing.Signals:
+    """What the model router needs to know about a run (`files` = context manifest before narrowing)."""
+    items = get_index().items_in(role_cfg["inbox"])
+    return routing.Signals(
+        trigger=reason,
+        context_tokens=context_chars // context.CHARS_PER_TOKEN,
+        inbox_items=len(items),
+        inbox_priority=max(
+            (PRIORITY_RANK["medium"] if item["priority"] is None else item["priority"] for item in items),
+            default=routing.NO_INBOX,
+        ),
+        changed=routing.changed_share(files, get_store().get_input_manifest(role_cfg["name"])),
+    )
+
+
+def inbox_files(role_cfg: config.RoleConfig) -> list[tuple[str, str]]:
+    """(path, vault-relative path) of the trigger files in the role's inbox, sorted by name."""
+    inbox_path = os.path.join(config.vault().path, role_cfg["inbox"])
+    try:
+        with os.scandir(inbox_path) as it:
+            names = sorted(e.name for e in it if e.name != ".gitkeep" and e.is_file())
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    return [(os.path.join(inbox_path, fn), os.path.join(role_cfg["inbox"], fn)) for fn in names]
 
 
-def check_inbox(role_cfg: dict) -> str:
-    """Read any trigger files in the role's inbox."""
-    inbox_path = os.path.join(config.VAULT_PATH, role_cfg["inbox"])
-    if not os.path.isdir(inbox_path):
-        return ""
+def check_inbox(role_cfg: config.RoleConfig) -> str:
+    """Read any trigger files in the role's inbox (oversized ones condensed, see large_files.py)."""
+    paths = inbox_files(role_cfg)
+    entries = cache.entries([full for full, _ in paths], context.large_file_limit(role_cfg))
     files = []
-    for fn in sorted(os.listdir(inbox_path)):
-        full = os.path.join(inbox_path, fn)
-        if os.path.isfile(full) and fn != ".gitkeep":
-            with open(full) as f:
-                content = f.read()
-            files.append(f"--- inbox: {fn} ---\n{content}")
+    for (full, rel), entry in zip(paths, entries):
+        text, _ = large_files.content(entry, rel)
+        files.append(f"--- inbox: {os.path.basename(full)} ---\n{text}")
     return "\n\n".join(files)
 
 
+async def summarize_large_files(role_cfg: config.RoleConfig) -> int:
+    """Summarize the role's oversized context and inbox files that have no cached summary yet."""
+    limit = context.large_file_limit(role_cfg)
+    if limit <= 0:
+        return 0
+    vault_path = config.vault().path
+    sections, inbox = await asyncio.gather(
+        asyncio.to_thread(context.collect, role_cfg), asyncio.to_thread(inbox_files, role_cfg),
+    )
+    files = [(os.path.join(vault_path, f.path), f.path) for s in sections for f in s.files] + inbox
+    return await large_files.summarize(files, limit, ratelimit.limited(query), role_cfg["name"])
+
+
 def has_inbox_items(role_name: str) -> bool:
-    """Check if a role's inbox has unprocessed trigger files."""
-    role_cfg = config.load_role(role_name)
-    inbox_path = os.path.join(config.VAULT_PATH, role_cfg["inbox"])
-    if not os.path.isdir(inbox_path):
+    """Check if a role's inbox has unprocessed trigger files. Blocking: pools call it on a worker thread."""
+    inbox_path = config.vault().registry.inbox_path(role_name)
+    try:
+        with os.scandir(inbox_path) as it:
+            return any(e.name != ".gitkeep" and e.is_file() for e in it)
+    except (FileNotFoundError, NotADirectoryError):
         return False
-    for fn in os.listdir(inbox_path):
-        full = os.path.join(inbox_path, fn)
-        if os.path.isfile(full) and fn != ".gitkeep":
-            return True
-    return False
+
+
+def inbox_status(role_name: str) -> tuple[int, float] | None:
+    """Return (highest priority rank, oldest item mtime) for a role's inbox, or None if empty.
+
+    Priority comes from each trigger file's `priority:` frontmatter (default
+    medium), looked up in the vault index — only new or changed files are read.
+    """
+    return get_index().dir_status(config.load_role(role_name).inbox)
+
+
+async def submit_inbox_trigger(pool: WorkerPool, role_name: str) -> bool:
+    """Queue an inbox-triggered run (of the current vault's role) at the priority of its most urgent item."""
+    status = await asyncio.to_thread(inbox_status, role_name)
+    if status is None:
+        return False
+    priority, since = status
+    pool.submit(config.vault().key(role_name), "inbox trigger", priority=priority, since=since, recheck=True)
+    return True
 
 
 # ---------------------------------------------------------------------------
 # Prompt building
 # ---------------------------------------------------------------------------
 
-def build_role_system_prompt(role_cfg: dict, log_file_path: str) -> str:
-    """Build a role-specific system prompt with THINK/ACT/REFLECT cycle."""
-    base = load_vault_system_prompt()
+def vault_display_path(vault: config.Vault) -> str:
+    """The vault's path as shown to roles: relative to the runner's directory when inside it."""
+    path = os.path.abspath(vault.path)
+    rel = os.path.relpath(path, os.path.dirname(os.path.abspath(__file__)))
+    if not rel.startswith(".."):
+        path = rel
+    return path.rstrip(os.sep) + "/"
+
+
+@functools.lru_cache(maxsize=32)
+def render_role_template(role_cfg: config.RoleConfig, project: str, vault_dir: str) -> str:
+    """The role's part of the system prompt. Contains no dates, so it is byte-stable across runs.
+
+    Memoized per RoleConfig (which changes whenever the role file does) and vault.
+    """
     role_name = role_cfg["name"]
     goals_str = "\n".join(f"- {g}" for g in role_cfg["goals"])
 
@@ -190,11 +351,18 @@ def build_role_system_prompt(role_cfg: dict, log_file_path: str) -> str:
     if preferences and not preferences.startswith("(No preferences"):
         prefs_section = f"\n\n## User Preferences\n{preferences}"
 
+    archive_note = ""
+    if config.ARCHIVE_TOOLS:
+        archive_note = (
+            f"\n- Older archived inbox items and logs are packed into monthly bundles under `{archive.ARCHIVE_DIR}/`."
+            " Look them up with the `archive_search` and `archive_read` tools"
+        )
+
     role_prompt = f"""
 ## Your Role: {role_cfg['display_name']}
 
-**Project:** Peak Logistics Movement (PLM)
-**Your working directory:** `vaults/peaklogistics/`
+**Project:** {project}
+**Your working directory:** `{vault_dir}`
 **This is the ONLY project you are working on.** If you see references to other projects, that's an error.
 
 ### Mission
@@ -220,7 +388,7 @@ Your working directory is the project vault. All file paths are relative to it.
 
 **BEFORE doing anything else**, you MUST append to your log file.
 
-**Log file location:** `{{LOG_FILE_PATH}}`
+**Log file location:** `agent/logs/{role_name}/YYYY-MM-DD.md` (today's date — the exact path is given at the end of each message)
 
 This file already exists. Use the Edit tool to append your new run section.
 
@@ -255,7 +423,7 @@ Execute your priority action:
 - Write trigger files to other roles' inboxes when they need to know something
 - Draft communications to `agent/outbox/{role_name}/drafts/`
 - Ask questions to the User via `agent/inbox/user/` (see format below)
-- After processing inbox files, move them to `{role_cfg['inbox']}archive/`
+- After processing inbox files, move them to `{role_cfg['inbox']}archive/`{archive_note}
 
 ### Phase 3: REFLECT
 
@@ -304,20 +472,36 @@ If you find answered questions or feedback in your inbox:
 2. Update `agent/memory/{role_name}.md` with any lessons learned
 3. Move the file to `{role_cfg['inbox']}archive/`
 """
-    # Replace log file path placeholder
-    role_prompt = role_prompt.replace("{{LOG_FILE_PATH}}", log_file_path)
-    return base + "\n\n" + role_prompt
+    return role_prompt
 
 
-def build_role_message(role_cfg: dict) -> str:
-    """Build the initial user message for a role-based run."""
+def build_role_system_segments(role_cfg: config.RoleConfig) -> list[prompt.Segment]:
+    """System prompt segments: vault rules, then the role template."""
+    vault = config.vault()
+    return [
+        prompt.segment("vault_rules", load_vault_system_prompt()),
+        prompt.segment("role_template", render_role_template(role_cfg, vault.project, vault_display_path(vault))),
+    ]
+
+
+def build_role_system_prompt(role_cfg: config.RoleConfig) -> str:
+    """Build a role-specific system prompt with THINK/ACT/REFLECT cycle."""
+    return prompt.join(build_role_system_segments(role_cfg))
+
+
+def build_role_message_segments(
+    role_cfg: config.RoleConfig, context_segments: list[prompt.Segment], delta: bool = False, inbox: str = "",
+) -> list[prompt.Segment]:
+    """User message segments, most static first: role header, context, inbox, run header.
+
+    With `delta`, the context is a render_delta() block for a resumed session
+    and is labelled as such. The time, date and today's log path only appear
+    in the final segment, so the rest can be served from the prompt cache.
+    """
     now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     current_time = datetime.now(timezone.utc).strftime("%H:%M")
 
-    context = load_role_context(role_cfg)
-    inbox = check_inbox(role_cfg)
-
     # MANDATORY FIRST ACTION - make it impossible to miss
     log_instruction = f"""━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 🚨 MANDATORY FIRST ACTION 🚨
@@ -333,7 +517,7 @@ The file already exists with a header. Use the Edit tool to append this structur
 - (list inbox items with priority, or write "empty")
 
 ### What Changed
-- (changes since last run based on context files below)
+- (changes since last run based on the context files above)
 
 ### Priority Action
 - (what you will do this run and why)
@@ -345,23 +529,44 @@ DO NOT do anything else before writing this log entry.
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 """
 
-    parts = [
-        log_instruction,
-        "",
-        f"Current time: {now}",
-        f"Today's date: {today}",
+    header = "\n".join([
         f"Role: {role_cfg['display_name']}",
         "",
-        "## Project Context",
-        context,
+        "## Project Context (changes since your last run)" if delta else "## Project Context",
+    ])
+    if inbox:
+        inbox_text = "## Inbox (trigger messages for you)\n" + inbox
+    else:
+        inbox_text = "## Inbox\n(empty — no pending triggers)"
+    run_header = f"Current time: {now}\nToday's date: {today}\n\n{log_instruction}"
+
+    return [
+        prompt.segment("role_header", header),
+        *context_segments,
+        prompt.segment("inbox", inbox_text),
+        prompt.segment("run_header", run_header),
     ]
 
-    if inbox:
-        parts += ["", "## Inbox (trigger messages for you)", inbox]
+
+def build_role_message(
+    role_cfg: config.RoleConfig, project_context: str | None = None, delta: bool = False, inbox: str | None = None,
+) -> str:
+    """Build the initial user message for a role-based run.
+
+    `project_context` defaults to the role's full context. `inbox` is the
+    check_inbox() text, if the caller already read it.
+    """
+    if project_context is None:
+        context_segments = prompt.context_segments(role_context_sections(role_cfg))
     else:
-        parts += ["", "## Inbox", "(empty — no pending triggers)"]
+        context_segments = [prompt.segment("context", project_context)]
+    if inbox is None:
+        inbox = check_inbox(role_cfg)
+    return render_message(build_role_message_segments(role_cfg, context_segments, delta, inbox))
+
 
-    return "\n".join(parts)
+def render_message(segments: list[prompt.Segment]) -> str:
+    return prompt.join(segments)
 
 
 # ---------------------------------------------------------------------------
@@ -371,7 +576,7 @@ DO NOT do anything else before writing this log entry.
 def ensure_log_file_exists(role_name: str) -> str:
     """Ensure today's log file exists. Create with header if needed. Returns relative path."""
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    log_dir = os.path.join(config.VAULT_PATH, "agent", "logs", role_name)
+    log_dir = os.path.join(config.vault().path, "agent", "logs", role_name)
     log_path = os.path.join(log_dir, f"{today}.md")
 
     # Ensure directory exists
@@ -390,7 +595,7 @@ def ensure_log_file_exists(role_name: str) -> str:
 def verify_log_written(role_name: str, initial_size: int) -> bool:
     """Verify that the agent wrote to its log file. Returns True if content was added."""
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    log_path = os.path.join(config.VAULT_PATH, "agent", "logs", role_name, f"{today}.md")
+    log_path = os.path.join(config.vault().path, "agent", "logs", role_name, f"{today}.md")
 
     if not os.path.isfile(log_path):
         log.error(f"[{role_name}] ❌ Log file disappeared: {log_path}")
@@ -408,24 +613,37 @@ def verify_log_written(role_name: str, initial_size: int) -> bool:
 
 
 async def run_role_async(role_name: str, reason: str):
-    """Invoke Claude Code for a role run via the Agent SDK."""
+    """Invoke Claude Code for a run of one of the current vault's roles via the Agent SDK."""
+    vault = config.vault()
     role_cfg = config.load_role(role_name)
 
     log.info(f"[{role_name}] Triggered — {reason}")
-    log.info(f"[{role_name}] Model: {role_cfg['model']}")
-
-    # Ensure log file exists and get its path + initial size
-    log_file_path = ensure_log_file_exists(role_name)
+    run_metrics = metrics.RunMetrics(role_name, reason, role_cfg["model"], vault.name)
+
+    # Scheduled run with nothing new to look at: record a skip instead of starting a session
+    if config.SKIP_UNCHANGED_RUNS and is_scheduled_only(reason):
+        with run_metrics.span("fingerprint"):
+            last_full_run = unchanged_since(role_name, await asyncio.to_thread(input_fingerprint, role_cfg))
+        if last_full_run is not None:
+            log.info(f"[{role_name}] Skipped — inputs unchanged since the full run at {last_full_run} "
+                     f"(forced after {config.SKIP_UNCHANGED_MAX_AGE_HOURS:g}h)")
+            store = get_store()
+            run_metrics.run_id = store.start_run(role_name, reason, role_cfg["model"])
+            store.finish_run(run_metrics.run_id, status="skipped", duration_ms=0, total_cost_usd=0.0)
+            store.clear_retry(role_name)  # a skip settles the trigger as well as a run does
+            run_metrics.finish("skipped", cost_usd=0.0)
+            await asyncio.to_thread(record_metrics, role_name, run_metrics)
+            return
+
+    # Oversized files get their middle summarized once per content, before context assembly reads them
+    with run_metrics.span("large_files"):
+        await summarize_large_files(role_cfg)
+
+    # Ensure log file exists and get its initial size
+    await asyncio.to_thread(ensure_log_file_exists, role_name)
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    log_full_path = os.path.join(config.VAULT_PATH, "agent", "logs", role_name, f"{today}.md")
-    initial_log_size = os.path.getsize(log_full_path)
-
-    system_prompt = build_role_system_prompt(role_cfg, log_file_path)
-    user_message = build_role_message(role_cfg)
-
-    log.debug(f"[{role_name}] System prompt: {len(system_prompt)} chars")
-    log.debug(f"[{role_name}] User message: {len(user_message)} chars")
-    log.debug(f"[{role_name}] Tools: {role_cfg['tools']}")
+    log_full_path = os.path.join(vault.path, "agent", "logs", role_name, f"{today}.md")
+    initial_log_size = await asyncio.to_thread(os.path.getsize, log_full_path)
 
     # Session management: resume same day, fresh next day
     session_id = get_session_id(role_name)
@@ -434,12 +652,83 @@ async def run_role_async(role_name: str, reason: str):
     else:
         log.info(f"[{role_name}] Starting fresh session")
 
-    vault_abs = os.path.abspath(config.VAULT_PATH)
+    # Resumed sessions already hold earlier context — send only what changed.
+    # Vault reads run on worker threads (inbox and context concurrently), so other runs keep going.
+    with run_metrics.span("context_load"):
+        inbox, sections = await asyncio.gather(
+            asyncio.to_thread(check_inbox, role_cfg), asyncio.to_thread(context.collect, role_cfg),
+        )
+        files = context.manifest(sections)
+        narrowed = None
+        if inbox and is_inbox_only(reason) and config.RETRIEVAL_TOP_K > 0:
+            narrowed = await asyncio.to_thread(retrieval.narrow, sections, inbox, config.RETRIEVAL_TOP_K)
+        budget = context.budget_for(role_cfg)
+        trimmed = context.apply_budget(sections, budget)
+        full_segments = prompt.context_segments(sections)
+
+    # Route on the full context: a resumed run sends only a delta, but its session holds all of it.
+    # A session stays on one model — if routing picks another, start a fresh one.
+    full_chars = sum(len(s.text) for s in full_segments)
+    signals = await asyncio.to_thread(routing_signals, role_cfg, reason, full_chars, files)
+    decision = await asyncio.to_thread(routing.decide, role_cfg, signals)
+    model = decision.model
+    if session_id and await asyncio.to_thread(get_store().session_model, session_id) not in (None, model):
+        log.info(f"[{role_name}] Session {session_id[:12]}... ran on another model — starting fresh for {model}")
+        session_id = None
+
+    with run_metrics.span("context_load"):
+        previous = None
+        if session_id and config.DELTA_CONTEXT:
+            previous = get_context_manifest(role_name, session_id)
+        if previous is not None:
+            delta_text, counts = await asyncio.to_thread(context.render_delta, sections, previous)
+            context_segments = [prompt.segment("context_delta", delta_text)]
+        else:
+            context_segments = full_segments
+    if trimmed:
+        summary = ", ".join(f"{path} ({action}, ~{tokens} tokens)" for path, action, tokens in trimmed)
+        message = f"[{role_name}] Context over {budget}-token budget — {summary}"
+        if any(action == "dropped" for _, action, _ in trimmed):
+            log.warning(message)
+        else:
+            log.info(message)
+    if narrowed and narrowed[0] < narrowed[1]:
+        log.info(f"[{role_name}] Retrieval: kept {narrowed[0]} of {narrowed[1]} directory files "
+                 f"(top {config.RETRIEVAL_TOP_K} per directory for this run's triggers)")
+    if previous is not None:
+        log.info(f"[{role_name}] Delta context: {counts}")
+
+    with run_metrics.span("prompt_build"):
+        system_segments = await asyncio.to_thread(build_role_system_segments, role_cfg)
+        message_segments = build_role_message_segments(role_cfg, context_segments, previous is not None, inbox)
+        system_prompt = prompt.join(system_segments)
+        user_message = render_message(message_segments)
+        run_metrics.prefix = prompt.tracker.observe(vault.key(role_name), system_segments + message_segments).to_dict()
+    run_metrics.sizes = {
+        "system_prompt_chars": len(system_prompt),
+        "user_message_chars": len(user_message),
+        "context_chars": sum(len(s.text) for s in context_segments),
+    }
+    log.info(f"[{role_name}] Prompt prefix: {run_metrics.prefix['segments_reused']}/"
+             f"{run_metrics.prefix['segments']} segments unchanged since last run "
+             f"({run_metrics.prefix['chars_reused']}/{run_metrics.prefix['chars']} chars)")
+
+    run_metrics.model = model
+    run_metrics.routing = decision.rule
+    log.info(f"[{role_name}] Model: {decision.describe()}")
+
+    log.debug(f"[{role_name}] System prompt: {len(system_prompt)} chars")
+    log.debug(f"[{role_name}] User message: {len(user_message)} chars")
+    log.debug(f"[{role_name}] Vault cache: {cache.stats()}")
+    log.debug(f"[{role_name}] Tools: {role_cfg['tools']}")
+
+    vault_abs = os.path.abspath(vault.path)
 
     options = ClaudeAgentOptions(
-        model=role_cfg["model"],
+        model=model,
         system_prompt=system_prompt,
-        allowed_tools=role_cfg["tools"],
+        allowed_tools=list(role_cfg["tools"]) + (archive.TOOL_NAMES if config.ARCHIVE_TOOLS else []),
+        mcp_servers={"archive": archive.mcp_server(vault_abs)} if config.ARCHIVE_TOOLS else {},
         permission_mode="bypassPermissions",
         max_turns=10,
         cwd=vault_abs,
@@ -447,86 +736,229 @@ async def run_role_async(role_name: str, reason: str):
         resume=session_id,
     )
 
+    store = get_store()
+    run_id = store.start_run(
+        role_name, reason, model, session_id, routing=None if decision.rule == "off" else decision.rule,
+    )
+    run_metrics.run_id = run_id
+    transcript = transcripts.start(
+        role_name, run_id, trigger=reason, model=model, routing=decision.describe(), resume=session_id,
+        allowed_tools=options.allowed_tools, max_turns=options.max_turns,
+        system_prompt=system_prompt, user_message=user_message,
+    )
+    started = time.monotonic()
+    result = None
+    log_ok = False
+
     try:
         new_session_id = None
-        async for message in query(prompt=user_message, options=options):
+        run_metrics.begin_query()
+        async for message in ratelimit.limited(query)(prompt=user_message, options=options):
+            transcript.message(message)
             if isinstance(message, AssistantMessage):
+                tool_uses = sum(1 for block in message.content if isinstance(block, ToolUseBlock))
+                run_metrics.on_message(is_assistant=True, tool_uses=tool_uses)
                 for block in message.content:
                     if hasattr(block, "text") and block.text:
                         preview = block.text[:300]
                         log.info(f"[{role_name}] {preview}{'...' if len(block.text) > 300 else ''}")
-                        log.debug(f"[{role_name}] Full: {block.text}")
                 # Track session ID from assistant messages
                 if hasattr(message, "session_id") and message.session_id:
                     new_session_id = message.session_id
 
             elif isinstance(message, ResultMessage):
-                log.info(f"[{role_name}] Done. Duration: {message.duration_ms}ms, Cost: ${message.total_cost_usd:.4f}")
+                run_metrics.on_message(is_assistant=False)
+                result = message
+                log.info(f"[{role_name}] Done. Duration: {message.duration_ms}ms, Cost: ${message.total_cost_usd or 0:.4f}")
                 if hasattr(message, "session_id") and message.session_id:
                     new_session_id = message.session_id
 
+            else:
+                run_metrics.on_message(is_assistant=False)
+        run_metrics.end_query()
+
         # Save session for same-day resumption
         if new_session_id:
             save_session_id(role_name, new_session_id)
+            await asyncio.to_thread(save_context_manifest, role_name, new_session_id, sections)
 
         # Verify log was written
-        verify_log_written(role_name, initial_log_size)
+        with run_metrics.span("verify_log"):
+            log_ok = await asyncio.to_thread(verify_log_written, role_name, initial_log_size)
+
+        status = "ok" if result is not None and not result.is_error else "error"
+        store.clear_retry(role_name)
+        if status == "ok":
+            # Taken after the run, so the role's own edits don't count as news next time
+            after = await asyncio.to_thread(context.collect, role_cfg)
+            fingerprint = await asyncio.to_thread(input_fingerprint, role_cfg, after)
+            store.save_fingerprint(role_name, fingerprint, context.manifest(after))
+        store.finish_run(
+            run_id,
+            status=status,
+            duration_ms=result.duration_ms if result else int((time.monotonic() - started) * 1000),
+            total_cost_usd=result.total_cost_usd if result else None,
+            session_id=new_session_id,
+            log_verified=log_ok,
+        )
+        run_metrics.finish(
+            status,
+            cost_usd=result.total_cost_usd if result else None,
+            sdk_duration_ms=result.duration_ms if result else None,
+            num_turns=result.num_turns if result else None,
+            usage=result.usage if result else None,
+        )
+        if run_metrics.tokens.get("input"):
+            log.info(f"[{role_name}] Prompt cache: {run_metrics.tokens['cache_read']} of "
+                     f"{run_metrics.tokens['input']} input tokens read from cache "
+                     f"({run_metrics.cache_hit_ratio:.0%})")
 
     except Exception as e:
-        error_str = str(e).lower()
-        if "rate" in error_str or "limit" in error_str or "quota" in error_str or "token" in error_str:
-            log.warning(f"[{role_name}] Token/rate limit hit: {e}. Will retry next scheduled run.")
+        run_metrics.end_query()
+        rate_limited = ratelimit.is_rate_limit_error(e)
+        if rate_limited:
+            retry = store.schedule_retry(role_name, retry_reason(reason), ratelimit.retry_delay, str(e))
+            if retry is None:
+                log.error(f"[{role_name}] Token/rate limit hit: {e}. Retries used up — "
+                          f"giving up until the next trigger.")
+            else:
+                attempt, due_at = retry
+                log.warning(f"[{role_name}] Token/rate limit hit: {e}. Retry {attempt} of "
+                            f"{config.RETRY_MAX_ATTEMPTS} in {due_at - time.time():.0f}s.")
+                wake_scheduler()
         else:
+            store.clear_retry(role_name)
             log.error(f"[{role_name}] Error: {e}")
+        status = "rate_limited" if rate_limited else "error"
+        store.finish_run(
+            run_id,
+            status=status,
+            duration_ms=int((time.monotonic() - started) * 1000),
+            error=str(e)[:500],
+        )
+        run_metrics.finish(status)
+        transcript.add("error", error=str(e))
+    finally:
+        transcript.close(run_metrics.to_dict())
+
+    await asyncio.to_thread(record_metrics, role_name, run_metrics)
+
+    # Summarize the run section(s) added to today's log while they are fresh
+    if log_ok:
+        summarizer = summaries.Summarizer(ratelimit.limited(query))
+        if await summaries.summarize_runs(summarizer, role_name, today) is not None and summarizer.calls:
+            log.info(f"[{role_name}] Summarized {summarizer.calls} run section(s), cost ${summarizer.cost_usd:.4f}")
+
+
+def retry_reason(reason: str) -> str:
+    """Trigger reason for the retry of a run: the original triggers, marked as a retry once."""
+    return reason if reason.endswith(" (retry)") else f"{reason} (retry)"
+
+
+def record_metrics(role_name: str, run_metrics: metrics.RunMetrics):
+    log.info(f"[{role_name}] Timing: {run_metrics.summary()}")
+    try:
+        metrics.record(run_metrics)
+    except OSError as e:
+        log.warning(f"[{role_name}] Could not write metrics: {e}")
 
 
-def run_role(role_name: str, reason: str, dry_run: bool = False):
-    """Sync wrapper for run_role_async. Used by the scheduler."""
+async def dry_run_role_async(role_name: str, reason: str):
+    """Log what a role run would do without invoking Claude Code."""
     log.info(f"[{role_name}] Triggered — {reason}")
+    role_cfg = config.load_role(role_name)
+    log.info(f"[{role_name}] DRY RUN — model: {role_cfg['model']}, tools: {list(role_cfg['tools'])}")
 
-    if dry_run:
-        role_cfg = config.load_role(role_name)
-        log.info(f"[{role_name}] DRY RUN — model: {role_cfg['model']}, tools: {role_cfg['tools']}")
-        return
 
-    asyncio.run(run_role_async(role_name, reason))
+def run_role(key: str, reason: str, dry_run: bool = False):
+    """Sync wrapper for a single role run ("role" or "vault/role"). Used by --role mode."""
+    runner = dry_run_role_async if dry_run else run_role_async
+    vault, role_name = config.split_key(key)
+    with config.use_vault(vault):
+        asyncio.run(runner(role_name, reason))
+
+
+def make_pool(dry_run: bool = False) -> WorkerPool:
+    """Create the worker pool that executes role runs of every vault concurrently.
+
+    The pool works on role keys ("<vault>/<role>"; a bare role name means the
+    default vault). Each run executes with its vault bound, and a vault's
+    runner.md can cap how many of the pool's slots it takes. With
+    JOB_QUEUE_PATH set, runs go through the shared job queue instead and
+    may execute on any node (see job_queue.py).
+    """
+    runner = dry_run_role_async if dry_run else run_role_async
+
+    async def run(key: str, reason: str):
+        vault, role_name = config.split_key(key)
+        with config.use_vault(vault):
+            await runner(role_name, reason)
+
+    def still_needed(key: str) -> bool:
+        vault, role_name = config.split_key(key)
+        with config.use_vault(vault):
+            return has_inbox_items(role_name)
+
+    def group_of(key: str) -> str:
+        return config.split_key(key)[0].name
+
+    if config.JOB_QUEUE_PATH:
+        pool = job_queue.DistributedPool(
+            job_queue.get_queue(),
+            run,
+            config.MAX_CONCURRENT_RUNS,
+            node_id=config.NODE_ID,
+            lease_seconds=config.JOB_LEASE_SECONDS,
+            debounce=config.DISPATCH_DEBOUNCE_SECONDS,
+            still_needed=still_needed,
+            group_of=group_of,
+            group_limits=lambda: {v.name: v.max_concurrent_runs for v in config.vaults()},
+            poll_seconds=config.JOB_POLL_SECONDS,
+            retention_days=config.JOB_RETENTION_DAYS,
+        )
+    else:
+        pool = RolePool(
+            run,
+            config.MAX_CONCURRENT_RUNS,
+            debounce=config.DISPATCH_DEBOUNCE_SECONDS,
+            still_needed=still_needed,
+            group_of=group_of,
+            group_limit=lambda name: config.get_vault(name).max_concurrent_runs,
+        )
+    if config.ADAPTIVE_CONCURRENCY and not dry_run:
+        ratelimit.concurrency.attach(pool)
+    return pool
+
+
+def leads_schedules(pool: WorkerPool) -> bool:
+    """True if this process fires schedules and compiles summaries.
+
+    Always, except in distributed mode, where only the node holding the
+    scheduler lease does — otherwise every node would enqueue each scheduled run.
+    """
+    return not isinstance(pool, job_queue.DistributedPool) or pool.is_leader
 
 
 # ---------------------------------------------------------------------------
 # Schedule parsing
 # ---------------------------------------------------------------------------
 
-def parse_schedule(role_name: str, schedule_text: str, dry_run: bool = False):
-    """Parse a human-readable schedule and register with the schedule library."""
-    text = schedule_text.lower().strip()
-
-    if "on-demand" in text:
-        log.info(f"[{role_name}] Schedule: on-demand (inbox-triggered only)")
-        return
-
-    # "every N minutes"
-    match = re.search(r"every\s+(\d+)\s+minute", text)
-    if match:
-        minutes = int(match.group(1))
-        schedule.every(minutes).minutes.do(run_role, role_name, f"scheduled (every {minutes}min)", dry_run)
-        log.info(f"[{role_name}] Schedule: every {minutes} minutes")
-        return
+def parse_schedule(role_name: str, schedule_text: str, deadlines: DeadlineScheduler):
+    """Parse a role's `## Schedule` section and register it with the deadline scheduler.
 
-    # Time-based: "9am", "9am and 5pm", "10am"
-    times = re.findall(r"(\d{1,2})\s*(am|pm)", text)
-    if times:
-        for hour_str, ampm in times:
-            hour = int(hour_str)
-            if ampm == "pm" and hour != 12:
-                hour += 12
-            if ampm == "am" and hour == 12:
-                hour = 0
-            time_str = f"{hour:02d}:00"
-            schedule.every().day.at(time_str).do(run_role, role_name, f"scheduled ({time_str})", dry_run)
-            log.info(f"[{role_name}] Schedule: daily at {time_str}")
-        return
+    `role_name` is the role key the scheduler submits ("<vault>/<role>").
+    Due roles are submitted to the worker pool, so run_due() never blocks.
+    """
+    spec = parse_schedule_spec(schedule_text)
 
-    log.warning(f"[{role_name}] Could not parse schedule: '{schedule_text}' — inbox-triggered only")
+    if spec.kind == "on-demand":
+        log.info(f"[{role_name}] Schedule: on-demand (inbox-triggered only)")
+    elif spec.kind == "unparsed":
+        log.warning(f"[{role_name}] Could not parse schedule: '{schedule_text}' — inbox-triggered only")
+    else:
+        fire = deadlines.add(role_name, spec)
+        next_run = f"next {fire:%a %Y-%m-%d %H:%M}" if fire else "never fires"
+        log.info(f"[{role_name}] Schedule: {spec.describe()} ({next_run})")
 
 
 # ---------------------------------------------------------------------------
@@ -534,40 +966,22 @@ def parse_schedule(role_name: str, schedule_text: str, dry_run: bool = False):
 # ---------------------------------------------------------------------------
 
 def route_answered_questions():
-    """Route answered questions from user inbox back to the asking role.
+    """Route answered questions from the current vault's user inbox back to the asking role.
 
-    Scans agent/inbox/user/answered/ for files, parses the `from:` field
-    from YAML frontmatter, and moves each file to the originating role's inbox.
+    Looks up the `from:` field of every file in agent/inbox/user/answered/ in
+    the vault index and moves each file to the originating role's inbox.
     """
-    answered_dir = os.path.join(config.VAULT_PATH, "agent", "inbox", "user", "answered")
+    vault_path = config.vault().path
+    answered_dir = answered_dir_path()
     if not os.path.isdir(answered_dir):
         return
 
     valid_roles = config.list_roles()
 
-    for fn in sorted(os.listdir(answered_dir)):
-        full = os.path.join(answered_dir, fn)
-        if not os.path.isfile(full) or fn.startswith("."):
-            continue
-
-        # Parse from: field from YAML frontmatter
-        from_role = None
-        try:
-            with open(full) as f:
-                content = f.read()
-            # Simple frontmatter parsing: look for from: between --- delimiters
-            if content.startswith("---"):
-                end = content.find("---", 3)
-                if end != -1:
-                    frontmatter = content[3:end]
-                    for line in frontmatter.splitlines():
-                        line = line.strip()
-                        if line.startswith("from:"):
-                            from_role = line[5:].strip()
-                            break
-        except Exception as e:
-            log.warning(f"[user-routing] Could not read {fn}: {e}")
-            continue
+    for item in get_index().items_in(os.path.relpath(answered_dir, vault_path)):
+        fn = os.path.basename(item["path"])
+        full = os.path.join(vault_path, item["path"])
+        from_role = item["from_role"]
 
         if not from_role:
             log.warning(f"[user-routing] No 'from:' field in {fn}, skipping")
@@ -578,77 +992,246 @@ def route_answered_questions():
             continue
 
         # Move to the originating role's inbox
-        dest = os.path.join(config.VAULT_PATH, "agent", "inbox", from_role, fn)
-        os.rename(full, dest)
+        dest = os.path.join(vault_path, "agent", "inbox", from_role, fn)
+        try:
+            os.rename(full, dest)
+        except FileNotFoundError:
+            continue  # routed meanwhile by another runner sharing the vault
         log.info(f"[user-routing] Routed {fn} → agent/inbox/{from_role}/")
 
 
-async def compile_daily_summary():
-    """Compile yesterday's role logs into a single daily summary.
+async def compile_summaries():
+    """Compile the daily, weekly and monthly log summaries that are due.
 
-    Idempotent — skips if summary already exists for yesterday.
-    Spawns a haiku agent with Write-only access to produce the summary.
+    Run sections are summarized as runs finish; this reduces them into
+    daily/weekly/monthly files under agent/logs/summaries/. Cheap when
+    nothing is due — see summaries.py. Vaults are compiled one after another.
     """
-    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
-    summaries_dir = os.path.join(config.VAULT_PATH, "agent", "logs", "summaries")
-    summary_path = os.path.join(summaries_dir, f"{yesterday}.md")
+    for vault in config.vaults():
+        with config.use_vault(vault):
+            try:
+                await summaries.compile_pending(ratelimit.limited(query))
+            except Exception as e:
+                log.warning(f"[summaries] Compilation failed: {e}")
 
-    # Idempotent: skip if already compiled
-    if os.path.isfile(summary_path):
-        return
 
-    # Collect all role logs from yesterday
-    logs_dir = os.path.join(config.VAULT_PATH, "agent", "logs")
-    log_contents = []
-    for role_name in config.list_roles():
-        role_logs_dir = os.path.join(logs_dir, role_name)
-        if not os.path.isdir(role_logs_dir):
+async def compact_archives():
+    """Pack old archived inbox items and role logs of every vault into bundles (see archive.py)."""
+    for vault in config.vaults():
+        try:
+            report = await asyncio.to_thread(archive.compact, vault.path)
+        except Exception as e:
+            log.warning(f"[archive] Compaction of {vault.name} failed: {e}")
             continue
-        for fn in sorted(os.listdir(role_logs_dir)):
-            if fn.startswith(yesterday) and fn.endswith(".md"):
-                full = os.path.join(role_logs_dir, fn)
-                with open(full) as f:
-                    content = f.read()
-                log_contents.append(f"--- {role_name}/{fn} ---\n{content}")
-
-    if not log_contents:
-        return
+        if report.files:
+            log.info(f"[archive] {vault.name}: packed {report}")
 
-    vault_abs = os.path.abspath(config.VAULT_PATH)
-    prompt = (
-        f"Compile the following role reasoning logs from {yesterday} into a single daily summary.\n"
-        f"Write the summary to agent/logs/summaries/{yesterday}.md\n\n"
-        "The summary should include:\n"
-        "- Key actions taken by each role\n"
-        "- Decisions made\n"
-        "- Questions raised\n"
-        "- Risks or blockers surfaced\n\n"
-        "Be concise — this is a reference document, not a narrative.\n\n"
-        + "\n\n".join(log_contents)
-    )
 
-    options = ClaudeAgentOptions(
-        model="haiku",
-        allowed_tools=["Write"],
-        permission_mode="bypassPermissions",
-        max_turns=3,
-        cwd=vault_abs,
-    )
+_scheduler_wakeup: asyncio.Event | None = None  # set while scheduler_loop runs
+
+
+def wake_scheduler():
+    """Make the scheduler loop re-check its deadlines now (e.g. a retry was just queued)."""
+    if _scheduler_wakeup is not None:
+        _scheduler_wakeup.set()
+
+
+def take_due_retries(vaults: list[config.Vault]) -> tuple[list[tuple[str, str, int]], float | None]:
+    """Rate-limited runs whose backoff has passed, as (role key, trigger, priority), and when the next is due."""
+    due_now = []
+    next_due = None
+    for vault in vaults:
+        with config.use_vault(vault):
+            store = get_store()
+            for retry in store.take_due_retries():
+                if retry["role"] not in vault.registry.names():
+                    store.clear_retry(retry["role"])
+                    continue
+                status = inbox_status(retry["role"])
+                priority = status[0] if status else PRIORITY_RANK["medium"]
+                log.info(f"[{retry['role']}] Retrying after rate limit (attempt {retry['attempts']})")
+                due_now.append((vault.key(retry["role"]), retry["trigger"], priority))
+            due = store.next_retry_at()
+        if due is not None and (next_due is None or due < next_due):
+            next_due = due
+    return due_now, next_due
+
+
+async def submit_due_retries(pool: WorkerPool, vaults: list[config.Vault]) -> float | None:
+    """Queue rate-limited runs whose backoff has passed. Returns seconds until the next retry, if any."""
+    due_now, next_due = await asyncio.to_thread(take_due_retries, vaults)
+    for key, trigger, priority in due_now:
+        pool.submit(key, trigger, priority=priority)
+    return None if next_due is None else max(0.0, next_due - time.time())
+
+
+def pending_inboxes() -> list[tuple[str, tuple[int, float]]]:
+    """Route answered questions, then (role key, inbox status) for every role of every vault with pending items."""
+    pending = []
+    for vault in config.vaults():
+        with config.use_vault(vault):
+            route_answered_questions()
+            for role_name in config.list_roles():
+                status = inbox_status(role_name)
+                if status is not None:
+                    pending.append((vault.key(role_name), status))
+    return pending
+
+
+async def check_all_inboxes(pool: WorkerPool):
+    """Check every role inbox of every vault and submit runs for any with pending items.
+
+    Each run is queued at the priority of the role's most urgent trigger file;
+    the pool coalesces it with anything already pending for that role. The
+    scan itself runs on a worker thread.
+    """
+    for key, (priority, since) in await asyncio.to_thread(pending_inboxes):
+        pool.submit(key, "inbox trigger", priority=priority, since=since, recheck=True)
+
+
+async def check_once(dry_run: bool = False):
+    """Check all inboxes once and wait for the resulting runs to finish."""
+    pool = make_pool(dry_run)
+    await check_all_inboxes(pool)
+    await pool.join()
+
+
+def start_inbox_watcher(keys: list[str], pool: WorkerPool) -> watcher.InboxWatcher | None:
+    """Watch role inboxes and user/answered/ of every vault so triggers fire within a second.
+
+    One watcher (one inotify observer) serves all vaults.
+    """
 
+    async def on_role(key: str):
+        vault, role_name = config.split_key(key)
+        with config.use_vault(vault):
+            await submit_inbox_trigger(pool, role_name)
+
+    async def on_answered(vault_name: str):
+        with config.use_vault(config.get_vault(vault_name)):
+            await asyncio.to_thread(route_answered_questions)
+
+    inbox_dirs = {}
+    answered_dirs = {}
+    for key in keys:
+        vault, role_name = config.split_key(key)
+        inbox_dirs[key] = vault.registry.inbox_path(role_name)
+        with config.use_vault(vault):
+            answered_dirs[vault.name] = answered_dir_path()
+
+    inbox_watcher = watcher.InboxWatcher(on_role, on_answered, config.INBOX_DEBOUNCE_SECONDS)
+    if not inbox_watcher.start(inbox_dirs, answered_dirs):
+        return None
+    return inbox_watcher
+
+
+async def scheduler_loop(keys: list[str], dry_run: bool = False):
+    """Long-running loop: fire due schedules, react to inbox events, compile summaries, compact archives.
+
+    `keys` are the role keys ("<vault>/<role>") to schedule and watch. All
+    vaults share this loop, the deadline heap, the worker pool and the inbox
+    watcher. Role runs execute on the worker pool in the background, so a slow
+    run never delays the next poll or another role's run. Inbox files trigger
+    runs through the file watcher; a timed full scan remains as a fallback
+    (every 60s if the watcher is unavailable).
+    """
+    pool = make_pool(dry_run)
+    if isinstance(pool, job_queue.DistributedPool):
+        await pool.lead()
+
+    def submit_scheduled(key: str, reason: str):
+        if leads_schedules(pool):
+            pool.submit(key, reason)
+
+    deadlines = DeadlineScheduler(submit_scheduled)
+    served: dict[str, config.Vault] = {}
+    for key in keys:
+        vault, role_name = config.split_key(key)
+        served.setdefault(vault.name, vault)
+        parse_schedule(key, vault.registry.get(role_name).schedule, deadlines)
+
+    # Retries handed to a pool that has since stopped are due again
+    for vault in served.values():
+        with config.use_vault(vault):
+            get_store().requeue_retries()
+
+    inbox_watcher = start_inbox_watcher(keys, pool)
+    scan_interval = config.INBOX_FALLBACK_SCAN_SECONDS if inbox_watcher else 60
+
+    loop = asyncio.get_running_loop()
+    mode = f", shared job queue as {config.NODE_ID}" if config.JOB_QUEUE_PATH else ""
+    log.info(f"Runner started (max {pool.max_concurrent} concurrent runs, "
+             f"inbox scan every {scan_interval}s{mode}). Press Ctrl+C to stop.")
+    summary_task = compaction_task = None
+    next_scan = next_compaction = loop.time()
+    global _scheduler_wakeup
+    wakeup = _scheduler_wakeup = asyncio.Event()
     try:
-        async for message in query(prompt=prompt, options=options):
-            if isinstance(message, ResultMessage):
-                log.info(f"[daily-summary] Compiled {yesterday} summary. Cost: ${message.total_cost_usd:.4f}")
-    except Exception as e:
-        log.warning(f"[daily-summary] Failed to compile {yesterday}: {e}")
+        while True:
+            deadlines.run_due()
+            # Retries live in this node's own run store, so every node drains its own, leader or not
+            until_retry = await submit_due_retries(pool, list(served.values()))
+            if loop.time() >= next_scan:
+                await check_all_inboxes(pool)
+                if not dry_run and leads_schedules(pool) and (summary_task is None or summary_task.done()):
+                    summary_task = asyncio.create_task(compile_summaries())
+                next_scan = loop.time() + scan_interval
+            if (config.ARCHIVE_COMPACT_HOURS > 0 and not dry_run and leads_schedules(pool)
+                    and loop.time() >= next_compaction):
+                compaction_task = asyncio.create_task(compact_archives())
+                next_compaction = loop.time() + config.ARCHIVE_COMPACT_HOURS * 3600
+
+            # Sleep exactly until the next deadline, retry or fallback scan, whichever is first
+            delay = next_scan - loop.time()
+            for until in (deadlines.seconds_until_next(), until_retry):
+                if until is not None:
+                    delay = min(delay, until)
+            try:
+                await asyncio.wait_for(wakeup.wait(), max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+    finally:
+        _scheduler_wakeup = None
+        if inbox_watcher is not None:
+            inbox_watcher.stop()
+        for task in (summary_task, compaction_task):
+            if task is not None:
+                task.cancel()
+        await pool.shutdown()
+
 
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
 
-def check_all_inboxes(dry_run: bool = False):
-    """Check all role inboxes and trigger runs for any with pending items."""
-    route_answered_questions()
-    for role_name in config.list_roles():
-        if has_inbox_items(role_name):
-            run_role(role_name, "inbox trigger", dry_run)
+def run_simulation(roles: list[str], days: float, arrival_rate: float, seed: int, from_history: bool):
+    """Replay the role configs on a virtual clock and print a capacity report."""
+    rng = random.Random(seed)
+    sim_roles = []
+    for role_name in roles:
+        role_cfg = config.load_role(role_name)
+        sim_roles.append(simulator.SimRole(
+            name=role_name,
+            model=role_cfg["model"],
+            schedule=parse_schedule_spec(role_cfg["schedule"]),
+            arrival_per_hour=arrival_rate,
+        ))
+    if from_history:
+        backend = simulator.SimulatedBackend.from_history(get_store(), roles, rng)
+    else:
+        backend = simulator.SimulatedBackend(rng)
+
+    report = simulator.simulate(
+        sim_roles,
+        days=days,
+        max_concurrent=config.MAX_CONCURRENT_RUNS,
+        backend=backend,
+        rng=rng,
+        fallback_scan_s=config.INBOX_FALLBACK_SCAN_SECONDS if watcher.is_available() else 60,
+        watcher=watcher.is_available(),
+    )
+    print(report.format())
 
 
 # ---------------------------------------------------------------------------
@@ -657,43 +1240,58 @@ def check_all_inboxes(dry_run: bool = False):
 
 def main():
     parser = argparse.ArgumentParser(description="Claude TPM Agent Runner")
-    parser.add_argument("--role", type=str, default=None, help="Run a specific role immediately")
+    parser.add_argument("--role", type=str, default=None,
+                        help="Run a specific role immediately ('role' or 'vault/role')")
+    parser.add_argument("--vault", type=str, default=None,
+                        help="Serve only this vault (default: every vault in VAULTS)")
     parser.add_argument("--once", action="store_true", help="Check once and exit (or run --role once)")
     parser.add_argument("--dry-run", action="store_true", help="Show what would run, don't execute")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Simulate schedules + inbox load of the first served vault on a virtual clock")
+    parser.add_argument("--days", type=float, default=7, help="Simulated days (with --simulate)")
+    parser.add_argument("--arrival-rate", type=float, default=1.0,
+                        help="Inbox items per hour per role (with --simulate)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (with --simulate)")
+    parser.add_argument("--from-history", action="store_true",
+                        help="Use per-role durations/costs from the run store (with --simulate)")
     args = parser.parse_args()
 
-    roles = config.list_roles()
+    if args.vault:
+        try:
+            config.set_vaults([config.get_vault(args.vault)])
+        except KeyError as e:
+            log.error(e.args[0])
+            sys.exit(1)
+
+    keys = [vault.key(role_name) for vault in config.vaults() for role_name in vault.registry.names()]
     log.info(f"=== Claude TPM Agent Runner ===")
-    log.info(f"Roles: {', '.join(roles)}")
-    log.info(f"Vault: {os.path.abspath(config.VAULT_PATH)}")
+    for vault in config.vaults():
+        log.info(f"Vault: {vault.name} ({os.path.abspath(vault.path)})")
+        log.info(f"  Roles: {', '.join(vault.registry.names())}")
+
+    if args.simulate:
+        run_simulation(config.list_roles(), args.days, args.arrival_rate, args.seed, args.from_history)
+        return
 
     # Single role mode
     if args.role:
-        if args.role not in roles:
-            log.error(f"Unknown role: {args.role}. Available: {', '.join(roles)}")
+        key = args.role if "/" in args.role else config.vault().key(args.role)
+        if key not in keys:
+            log.error(f"Unknown role: {args.role}. Available: {', '.join(keys)}")
             sys.exit(1)
-        run_role(args.role, "manual", args.dry_run)
+        run_role(key, "manual", args.dry_run)
         return
 
     # Once mode: check inboxes, run what's needed, exit
     if args.once:
         log.info("Mode: single check")
-        check_all_inboxes(dry_run=args.dry_run)
+        asyncio.run(check_once(dry_run=args.dry_run))
         log.info("Done.")
         return
 
-    # Scheduler mode: register schedules + poll inboxes
-    for role_name in roles:
-        role_cfg = config.load_role(role_name)
-        parse_schedule(role_name, role_cfg["schedule"], dry_run=args.dry_run)
-
-    log.info("Runner started. Press Ctrl+C to stop.")
+    # Scheduler mode: register schedules + poll inboxes on one event loop
     try:
-        while True:
-            schedule.run_pending()
-            check_all_inboxes(dry_run=args.dry_run)
-            asyncio.run(compile_daily_summary())
-            time.sleep(60)
+        asyncio.run(scheduler_loop(keys, dry_run=args.dry_run))
     except KeyboardInterrupt:
         log.info("Runner stopped.")
 
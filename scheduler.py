@@ -0,0 +1,311 @@
+"""Deadline scheduler — parses `## Schedule` sections and fires role runs on time.
+
+Schedule expressions (case-insensitive):
+
+    On-demand                         inbox-triggered only
+    Every 30 minutes                  interval, counted from runner start ("every 2 hours" also works)
+    9am and 5pm                       daily at fixed times ("9:30am" and "17:00" also work)
+    10am, weekdays                    any time or interval schedule can be limited to
+                                      weekdays, weekends or named days ("monday and thursday",
+                                      "mon-fri")
+    cron: 0 9 * * 1-5                 5-field cron: minute hour day-of-month month day-of-week
+
+`DeadlineScheduler` keeps a min-heap of each role's next fire time, so the
+runner can sleep exactly until the earliest one. Due roles are handed to the
+same submit callback inbox triggers use (the worker pool). Times are local
+wall-clock time. Deadlines missed while the machine was asleep fire once,
+not once per missed slot.
+"""
+
+import heapq
+import itertools
+import math
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+ALL_DAYS = frozenset(range(7))  # datetime.weekday(): Monday = 0
+WEEKDAYS = frozenset(range(5))
+WEEKENDS = frozenset({5, 6})
+
+_DAY_NAMES = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tues": 1, "tue": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thurs": 3, "thur": 3, "thu": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+_DAY_ALT = "|".join(sorted(_DAY_NAMES, key=len, reverse=True))
+_DAY_RE = re.compile(rf"\b({_DAY_ALT})s?\b")
+_DAY_RANGE_RE = re.compile(rf"\b({_DAY_ALT})\s*(?:-|to|through)\s*({_DAY_ALT})\b")
+_SHORT_DAY = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+_INTERVAL_RE = re.compile(r"every\s+(\d+)\s+(minute|min|hour)")
+_TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b")
+_CRON_RE = re.compile(r"^cron:?\s+(.+)$")
+
+
+# ---------------------------------------------------------------------------
+# Cron expressions
+# ---------------------------------------------------------------------------
+
+def _cron_field(text: str, low: int, high: int, names: dict[str, int] | None = None) -> frozenset[int]:
+    values = set()
+    for part in text.split(","):
+        body, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if body == "*":
+            start, end = low, high
+        else:
+            first, _, last = body.partition("-")
+            start = names.get(first, None) if names else None
+            start = int(first) if start is None else start
+            end = start
+            if last:
+                end = names.get(last, None) if names else None
+                end = int(last) if end is None else end
+            elif step_text:
+                end = high
+        if step < 1 or not (low <= start <= high and low <= end <= high) or start > end:
+            raise ValueError(f"cron field out of range: {part!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronExpr:
+    """A 5-field cron expression. Day-of-week uses cron numbering (0 or 7 = Sunday)."""
+
+    text: str
+    minutes: tuple[int, ...]
+    hours: tuple[int, ...]
+    month_days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]  # datetime.weekday() numbering
+    any_month_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, text: str) -> "CronExpr":
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got {len(fields)}: {text!r}")
+        minute, hour, dom, month, dow = fields
+        cron_days = {name: (idx + 1) % 7 for name, idx in _DAY_NAMES.items()}
+        dow_values = _cron_field(dow, 0, 7, cron_days)
+        return cls(
+            text=" ".join(fields),
+            minutes=tuple(sorted(_cron_field(minute, 0, 59))),
+            hours=tuple(sorted(_cron_field(hour, 0, 23))),
+            month_days=_cron_field(dom, 1, 31),
+            months=_cron_field(month, 1, 12),
+            weekdays=frozenset((d - 1) % 7 for d in dow_values),
+            any_month_day=dom == "*",
+            any_weekday=dow == "*",
+        )
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        dom_ok = day.day in self.month_days
+        dow_ok = day.weekday() in self.weekdays
+        # Standard cron: when both day fields are restricted, either may match
+        if self.any_month_day or self.any_weekday:
+            return dom_ok and dow_ok
+        return dom_ok or dow_ok
+
+    def next_after(self, moment: datetime) -> datetime | None:
+        t = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(366 * 5):
+            if self._day_matches(t):
+                for hour in self.hours:
+                    if hour < t.hour:
+                        continue
+                    for minute in self.minutes:
+                        if hour == t.hour and minute < t.minute:
+                            continue
+                        return t.replace(hour=hour, minute=minute)
+            t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Schedule specs
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ScheduleSpec:
+    """A parsed `## Schedule` section.
+
+    kind is "on-demand", "interval" (every `interval_minutes`), "daily"
+    (at each "HH:MM" in `times`), "cron" or "unparsed" (treated as
+    on-demand). Interval and daily schedules only fire on `days`.
+    """
+
+    kind: str
+    interval_minutes: int = 0
+    times: tuple[str, ...] = ()
+    days: frozenset[int] = ALL_DAYS
+    cron: CronExpr | None = None
+
+    def next_after(self, moment: datetime, anchor: datetime) -> datetime | None:
+        """Next fire time strictly after `moment`. Intervals count from `anchor`."""
+        if self.kind == "interval":
+            step = timedelta(minutes=self.interval_minutes)
+            fire = anchor + (int((moment - anchor) / step) + 1) * step
+            for _ in range(8):
+                if fire.weekday() in self.days:
+                    return fire
+                midnight = (fire + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+                fire = anchor + math.ceil((midnight - anchor) / step) * step
+            return None
+        if self.kind == "daily":
+            for offset in range(8):
+                day = moment + timedelta(days=offset)
+                if day.weekday() not in self.days:
+                    continue
+                candidates = []
+                for t in self.times:
+                    hour, minute = (int(x) for x in t.split(":"))
+                    fire = day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                    if fire > moment:
+                        candidates.append(fire)
+                if candidates:
+                    return min(candidates)
+            return None
+        if self.kind == "cron":
+            return self.cron.next_after(moment)
+        return None
+
+    def label(self, fire: datetime) -> str:
+        """Short trigger reason for a run fired at `fire`."""
+        if self.kind == "interval":
+            return f"every {self.interval_minutes}min"
+        if self.kind == "cron":
+            return f"cron {self.cron.text}"
+        return fire.strftime("%H:%M")
+
+    def describe(self) -> str:
+        if self.kind == "interval":
+            text = f"every {self.interval_minutes} minutes"
+        elif self.kind == "daily":
+            text = f"daily at {', '.join(self.times)}"
+        elif self.kind == "cron":
+            return f"cron '{self.cron.text}'"
+        else:
+            return self.kind
+        if self.days == ALL_DAYS:
+            return text
+        if self.days == WEEKDAYS:
+            return f"{text}, weekdays"
+        if self.days == WEEKENDS:
+            return f"{text}, weekends"
+        return f"{text}, {', '.join(_SHORT_DAY[d] for d in sorted(self.days))}"
+
+
+def _parse_days(text: str) -> frozenset[int]:
+    if re.search(r"\bweekdays?\b", text):
+        return WEEKDAYS
+    if re.search(r"\bweekends?\b", text):
+        return WEEKENDS
+    days = set()
+    for first, last in _DAY_RANGE_RE.findall(text):
+        start, end = _DAY_NAMES[first], _DAY_NAMES[last]
+        days.update(range(start, end + 1) if start <= end else [*range(start, 7), *range(0, end + 1)])
+    days.update(_DAY_NAMES[name] for name in _DAY_RE.findall(text))
+    return frozenset(days) or ALL_DAYS
+
+
+def parse_schedule_spec(schedule_text: str) -> ScheduleSpec:
+    """Parse a human-readable schedule ("Every 30 minutes", "9am and 5pm, weekdays", "cron: 0 9 * * 1-5")."""
+    text = schedule_text.lower().strip()
+
+    if "on-demand" in text:
+        return ScheduleSpec("on-demand")
+
+    match = _CRON_RE.match(text)
+    if match:
+        try:
+            return ScheduleSpec("cron", cron=CronExpr.parse(match.group(1)))
+        except ValueError:
+            return ScheduleSpec("unparsed")
+
+    days = _parse_days(text)
+
+    # "every N minutes" / "every N hours"
+    match = _INTERVAL_RE.search(text)
+    if match:
+        minutes = int(match.group(1)) * (60 if match.group(2) == "hour" else 1)
+        if minutes > 0:
+            return ScheduleSpec("interval", interval_minutes=minutes, days=days)
+
+    # Time-based: "9am", "9am and 5pm", "9:30am", "17:00"
+    parsed = []
+    for hour_str, minute_str, ampm, hour24, minute24 in _TIME_RE.findall(text):
+        if ampm:
+            hour, minute = int(hour_str), int(minute_str or 0)
+            if ampm == "pm" and hour != 12:
+                hour += 12
+            if ampm == "am" and hour == 12:
+                hour = 0
+        else:
+            hour, minute = int(hour24), int(minute24)
+        if hour < 24 and minute < 60:
+            parsed.append(f"{hour:02d}:{minute:02d}")
+    if parsed:
+        return ScheduleSpec("daily", times=tuple(dict.fromkeys(parsed)), days=days)
+
+    return ScheduleSpec("unparsed")
+
+
+# ---------------------------------------------------------------------------
+# Deadline heap
+# ---------------------------------------------------------------------------
+
+class DeadlineScheduler:
+    """Min-heap of the next fire time of every scheduled role."""
+
+    def __init__(self, submit: Callable[[str, str], object], clock: Callable[[], datetime] = datetime.now):
+        self._submit = submit
+        self._clock = clock
+        self._anchor = clock()
+        self._specs: dict[str, ScheduleSpec] = {}
+        self._heap: list[tuple[datetime, int, str]] = []
+        self._seq = itertools.count()
+
+    def add(self, role_name: str, spec: ScheduleSpec) -> datetime | None:
+        """Register a role's schedule. Returns its first fire time (None if it never fires)."""
+        self._specs[role_name] = spec
+        fire = spec.next_after(self._clock(), self._anchor)
+        if fire is not None:
+            heapq.heappush(self._heap, (fire, next(self._seq), role_name))
+        return fire
+
+    def next_deadline(self) -> datetime | None:
+        return self._heap[0][0] if self._heap else None
+
+    def seconds_until_next(self) -> float | None:
+        """Seconds until the earliest deadline (0 if one is due, None if nothing is scheduled)."""
+        if not self._heap:
+            return None
+        return max((self._heap[0][0] - self._clock()).total_seconds(), 0.0)
+
+    def upcoming(self) -> list[tuple[datetime, str]]:
+        return [(fire, role) for fire, _, role in sorted(self._heap)]
+
+    def run_due(self) -> int:
+        """Submit every role whose deadline has passed and push its next one. Returns the count."""
+        now = self._clock()
+        fired = 0
+        while self._heap and self._heap[0][0] <= now:
+            fire, _, role_name = heapq.heappop(self._heap)
+            spec = self._specs[role_name]
+            self._submit(role_name, f"scheduled ({spec.label(fire)})")
+            fired += 1
+            nxt = spec.next_after(max(fire, now), self._anchor)
+            if nxt is not None:
+                heapq.heappush(self._heap, (nxt, next(self._seq), role_name))
+        return fired
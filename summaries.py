@@ -0,0 +1,283 @@
+"""Log summaries — incremental, hierarchical rollups of the role reasoning logs.
+
+Levels:
+    run      one `## Run HH:MM` section of a role's daily log, summarized right
+             after the run finishes
+    daily    per role: the day's run summaries reduced into one summary (roles
+             in parallel); written together to agent/logs/summaries/YYYY-MM-DD.md
+    weekly   the week's daily summaries → agent/logs/summaries/weekly/YYYY-Www.md
+    monthly  the month's daily summaries → agent/logs/summaries/monthly/YYYY-MM.md
+
+Every model call is cached in the run store by a digest of its input (run
+section text, or the run summaries being reduced), so a section or a set of
+summaries is never sent twice — retries after a failure only redo what is
+missing. Daily, weekly and monthly files are only written once their period
+has ended, and their existence is the "already done" check, so a scan with
+nothing to do costs a few stat() calls.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+import config
+from run_store import get_store
+from claude_agent_sdk import AssistantMessage, ClaudeAgentOptions, ResultMessage
+
+log = logging.getLogger("tpm-runner")
+
+MODEL = "haiku"
+LOOKBACK_DAYS = 7  # days without a daily summary that are still compiled
+MAX_PARALLEL = 4  # concurrent summarization calls
+MAX_SECTION_CHARS = 40_000  # clip pathological run sections before sending them
+
+_RUN_HEADING_RE = re.compile(r"^## Run\b.*$", re.MULTILINE)
+
+_FOCUS = (
+    "- Key actions taken\n"
+    "- Decisions made\n"
+    "- Questions raised\n"
+    "- Risks or blockers surfaced\n"
+)
+
+
+@dataclass(slots=True)
+class RunSection:
+    heading: str  # e.g. "## Run 09:00 (scheduled)"
+    text: str
+    digest: str
+
+
+def split_runs(log_text: str) -> list[RunSection]:
+    """Split a daily role log into its `## Run` sections (the file header is dropped)."""
+    starts = [m.start() for m in _RUN_HEADING_RE.finditer(log_text)]
+    sections = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(log_text)
+        text = log_text[start:end].strip()
+        heading = text.splitlines()[0]
+        sections.append(RunSection(heading, text, _digest("run", text)))
+    return sections
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _summaries_dir() -> str:
+    return os.path.join(config.vault().path, "agent", "logs", "summaries")
+
+
+def role_log_path(role_name: str, day: str) -> str:
+    return os.path.join(config.vault().path, "agent", "logs", role_name, f"{day}.md")
+
+
+def daily_path(day: str) -> str:
+    return os.path.join(_summaries_dir(), f"{day}.md")
+
+
+def weekly_path(year: int, week: int) -> str:
+    return os.path.join(_summaries_dir(), "weekly", f"{year}-W{week:02d}.md")
+
+
+def monthly_path(year: int, month: int) -> str:
+    return os.path.join(_summaries_dir(), "monthly", f"{year}-{month:02d}.md")
+
+
+def _write_atomic(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Model calls
+# ---------------------------------------------------------------------------
+
+class Summarizer:
+    """Runs cached, concurrency-limited summarization calls through `query_fn`.
+
+    `query_fn` is the Agent SDK's query() (or a stand-in with the same shape).
+    """
+
+    def __init__(self, query_fn, max_parallel: int = MAX_PARALLEL):
+        self._query = query_fn
+        self._slots = asyncio.Semaphore(max_parallel)
+        self.calls = 0
+        self.cost_usd = 0.0
+
+    async def complete(self, digest: str, kind: str, role: str, period: str, prompt: str) -> str | None:
+        """Return the cached summary for `digest`, or ask the model and cache it. None on failure."""
+        store = get_store()
+        cached = store.get_summary(digest)
+        if cached is not None:
+            return cached
+
+        options = ClaudeAgentOptions(
+            model=MODEL,
+            tools=[],
+            permission_mode="bypassPermissions",
+            max_turns=1,
+            cwd=os.path.abspath(config.vault().path),
+        )
+        parts = []
+        cost = 0.0
+        try:
+            async with self._slots:
+                async for message in self._query(prompt=prompt, options=options):
+                    if isinstance(message, AssistantMessage):
+                        parts += [block.text for block in message.content if getattr(block, "text", None)]
+                    elif isinstance(message, ResultMessage):
+                        cost = message.total_cost_usd or 0.0
+        except Exception as e:
+            log.warning(f"[summaries] {kind} summary for {role or 'all roles'} {period} failed: {e}")
+            return None
+
+        text = "\n".join(parts).strip()
+        if not text:
+            log.warning(f"[summaries] {kind} summary for {role or 'all roles'} {period} came back empty")
+            return None
+        self.calls += 1
+        self.cost_usd += cost
+        store.save_summary(digest, kind, role, period, text, cost)
+        return text
+
+
+# ---------------------------------------------------------------------------
+# Run → daily
+# ---------------------------------------------------------------------------
+
+async def summarize_runs(summarizer: Summarizer, role_name: str, day: str) -> list[tuple[str, str]] | None:
+    """Summarize every run section in a role's daily log that isn't cached yet.
+
+    Returns [(heading, summary)] in log order, or None if any section failed.
+    """
+    path = role_log_path(role_name, day)
+    try:
+        with open(path, errors="replace") as f:
+            sections = split_runs(f.read())
+    except FileNotFoundError:
+        return []
+
+    async def one(section: RunSection) -> str | None:
+        prompt = (
+            f"Summarize this run of the {role_name} role from {day} in 3-6 terse bullets covering:\n"
+            f"{_FOCUS}\n"
+            "Reply with the bullets only.\n\n"
+            + section.text[:MAX_SECTION_CHARS]
+        )
+        return await summarizer.complete(section.digest, "run", role_name, day, prompt)
+
+    results = await asyncio.gather(*(one(s) for s in sections))
+    if any(r is None for r in results):
+        return None
+    return [(s.heading, r) for s, r in zip(sections, results)]
+
+
+async def _role_daily(summarizer: Summarizer, role_name: str, day: str) -> str | None:
+    runs = await summarize_runs(summarizer, role_name, day)
+    if runs is None:
+        return None
+    if len(runs) <= 1:
+        return runs[0][1] if runs else ""
+    joined = "\n\n".join(f"{heading}\n{summary}" for heading, summary in runs)
+    prompt = (
+        f"Combine these run summaries of the {role_name} role from {day} into one daily summary covering:\n"
+        f"{_FOCUS}\n"
+        "Merge duplicates and keep it concise — this is a reference document, not a narrative. "
+        "Reply with the summary only.\n\n"
+        + joined
+    )
+    return await summarizer.complete(_digest("role-day", role_name, day, joined), "role-day", role_name, day, prompt)
+
+
+async def compile_daily(summarizer: Summarizer, day: str) -> bool:
+    """Write the daily summary for a finished day. Returns True if one exists afterwards."""
+    path = daily_path(day)
+    if os.path.isfile(path):
+        return True
+    roles = [r for r in config.list_roles() if os.path.isfile(role_log_path(r, day))]
+    if not roles:
+        return False
+
+    results = await asyncio.gather(*(_role_daily(summarizer, r, day) for r in roles))
+    if any(r is None for r in results):
+        return False  # retried on the next scan; finished parts are cached
+
+    parts = [f"# Daily Summary — {day}\n"]
+    parts += [f"## {role_name.title()}\n\n{text}\n" for role_name, text in zip(roles, results) if text]
+    _write_atomic(path, "\n".join(parts))
+    log.info(f"[summaries] Compiled daily summary {day} ({len(roles)} roles)")
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Daily → weekly / monthly
+# ---------------------------------------------------------------------------
+
+async def _rollup(summarizer: Summarizer, kind: str, period: str, days: list[date], path: str) -> bool:
+    if os.path.isfile(path):
+        return True
+    for d in days:
+        await compile_daily(summarizer, d.isoformat())
+    dailies = []
+    for d in days:
+        day = d.isoformat()
+        if os.path.isfile(daily_path(day)):
+            with open(daily_path(day)) as f:
+                dailies.append(f.read().strip())
+        elif any(os.path.isfile(role_log_path(r, day)) for r in config.list_roles()):
+            return False  # a daily is still missing; try again next scan
+    if not dailies:
+        return False
+
+    joined = "\n\n".join(dailies)
+    prompt = (
+        f"Roll up these daily summaries into a {kind} summary for {period}. Per role, cover:\n"
+        f"{_FOCUS}"
+        "- Trends across days and what is still open at the end of the period\n\n"
+        "Be concise. Reply with the summary only.\n\n"
+        + joined
+    )
+    text = await summarizer.complete(_digest(kind, period, joined), kind, "", period, prompt)
+    if text is None:
+        return False
+    _write_atomic(path, f"# {kind.title()} Summary — {period}\n\n{text}\n")
+    log.info(f"[summaries] Compiled {kind} summary {period} ({len(dailies)} days)")
+    return True
+
+
+async def compile_pending(query_fn, today: date | None = None) -> Summarizer:
+    """Compile every daily, weekly and monthly summary that is due and missing."""
+    today = today or datetime.now(timezone.utc).date()
+    summarizer = Summarizer(query_fn)
+
+    days = [today - timedelta(days=n) for n in range(LOOKBACK_DAYS, 0, -1)]
+    for d in days:
+        await compile_daily(summarizer, d.isoformat())
+
+    # Last complete ISO week (Monday–Sunday)
+    week_start = today - timedelta(days=today.weekday() + 7)
+    year, week, _ = week_start.isocalendar()
+    await _rollup(summarizer, "weekly", f"{year}-W{week:02d}",
+                  [week_start + timedelta(days=n) for n in range(7)], weekly_path(year, week))
+
+    # Last complete month
+    month_end = today.replace(day=1) - timedelta(days=1)
+    month_days = [month_end.replace(day=n) for n in range(1, month_end.day + 1)]
+    await _rollup(summarizer, "monthly", f"{month_end:%Y-%m}", month_days,
+                  monthly_path(month_end.year, month_end.month))
+
+    if summarizer.calls:
+        log.info(f"[summaries] {summarizer.calls} summarization call(s), cost ${summarizer.cost_usd:.4f}")
+    return summarizer
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import run_store  # noqa: E402
+import vault_index  # noqa: E402
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """A throwaway vault (shared roles/, stores under tmp_path), bound as the only configured vault."""
+    path = tmp_path / "acme"
+    (path / "agent" / "inbox").mkdir(parents=True)
+    previous = config.vaults()
+    v = config.make_vault("acme", str(path), sessions_dir=str(tmp_path / ".sessions"))
+    config.set_vaults([v])
+    run_store._stores.clear()
+    vault_index._indexes.clear()
+    try:
+        with config.use_vault(v):
+            yield v
+    finally:
+        for store in run_store._stores.values():
+            store.close()
+        run_store._stores.clear()
+        for index in vault_index._indexes.values():
+            index.close()
+        vault_index._indexes.clear()
+        config.set_vaults(previous)
@@ -0,0 +1,106 @@
+import gzip
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+import archive
+
+NOW = datetime(2026, 10, 17, tzinfo=timezone.utc).timestamp()
+SEPT = datetime(2026, 9, 3, tzinfo=timezone.utc).timestamp()
+INBOX = "agent/inbox/delivery/archive"
+
+
+def write(vault, rel, text, mtime=None):
+    path = os.path.join(vault, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def vault(tmp_path):
+    path = str(tmp_path / "acme")
+    write(path, f"{INBOX}/vendor.md", "---\nfrom: risk\npriority: high\n---\n# Vendor delay\nTwo weeks late.", SEPT)
+    write(path, f"{INBOX}/dock.md", "Dock schedule moved to Friday.", SEPT + 3600)
+    write(path, f"{INBOX}/fresh.md", "Still recent.", NOW - 86400)
+    write(path, "agent/logs/delivery/2026-06-02.md", "## Run 09:00 (scheduled)\nAll quiet.")
+    write(path, "agent/logs/delivery/2026-10-16.md", "## Run 09:00 (scheduled)\nRecent.")
+    write(path, "agent/logs/summaries/2026-06-02.md", "Summary, never compacted.")
+    return path
+
+
+def test_compact_packs_old_items_and_removes_the_originals(vault):
+    planned = archive.compact(vault, dry_run=True, now=NOW)
+    assert (planned.files, planned.bundles) == (3, {f"{INBOX}/2026-09", "agent/logs/delivery/2026-06"})
+    assert os.path.exists(os.path.join(vault, INBOX, "vendor.md"))
+
+    report = archive.compact(vault, now=NOW)
+    assert report.files == 3 and 0 < report.bytes_out
+    assert sorted(os.listdir(os.path.join(vault, INBOX))) == ["fresh.md"]
+    assert os.listdir(os.path.join(vault, "agent/logs/delivery")) == ["2026-10-16.md"]
+    assert os.path.exists(os.path.join(vault, "agent/logs/summaries/2026-06-02.md"))
+
+    assert archive.read(vault, f"{INBOX}/2026-09", "dock.md") == "Dock schedule moved to Friday."
+    assert archive.read(vault, "agent/logs/delivery/2026-06", "2026-06-02.md").endswith("All quiet.")
+    bundle_path = os.path.join(vault, archive.ARCHIVE_DIR, INBOX, "2026-09.bundle.gz")
+    with gzip.open(bundle_path, "rt") as f:  # what zcat prints: every member in order
+        assert f.read().endswith("Two weeks late.Dock schedule moved to Friday.")
+    assert archive.compact(vault, now=NOW).files == 0
+
+
+def test_later_items_are_appended_to_the_month_bundle(vault):
+    archive.compact(vault, now=NOW)
+    write(vault, f"{INBOX}/customs.md", "Customs hold released.", SEPT + 7200)
+    assert archive.compact(vault, now=NOW).files == 1
+    index = archive.load_index(vault, f"{INBOX}/2026-09")
+    assert sorted(index) == ["customs.md", "dock.md", "vendor.md"]
+    assert archive.read(vault, f"{INBOX}/2026-09", "vendor.md").endswith("Two weeks late.")
+    assert archive.read(vault, f"{INBOX}/2026-09", "customs.md") == "Customs hold released."
+
+
+def test_a_later_item_with_the_same_name_keeps_the_earlier_one(vault):
+    archive.compact(vault, now=NOW)
+    write(vault, f"{INBOX}/dock.md", "Dock schedule moved again, to Monday.", SEPT + 7200)
+    assert archive.compact(vault, now=NOW).files == 1
+    bundle = f"{INBOX}/2026-09"
+    assert sorted(archive.load_index(vault, bundle)) == [f"dock.{int(SEPT + 7200)}.md", "dock.md", "vendor.md"]
+    assert archive.read(vault, bundle, "dock.md") == "Dock schedule moved to Friday."
+    assert archive.read(vault, bundle, f"dock.{int(SEPT + 7200)}.md") == "Dock schedule moved again, to Monday."
+
+
+def test_an_unindexed_tail_from_an_interrupted_run_is_cut_off(vault):
+    archive.compact(vault, now=NOW)
+    bundle_path = os.path.join(vault, archive.ARCHIVE_DIR, INBOX, "2026-09.bundle.gz")
+    size = os.path.getsize(bundle_path)
+    with open(bundle_path, "ab") as f:
+        f.write(gzip.compress(b"half written")[:7])
+
+    write(vault, f"{INBOX}/customs.md", "Customs hold released.", SEPT + 7200)
+    archive.compact(vault, now=NOW)
+    index = archive.load_index(vault, f"{INBOX}/2026-09")
+    assert index["customs.md"]["offset"] == size
+    with gzip.open(bundle_path, "rt") as f:
+        assert "half written" not in f.read()
+    assert archive.read(vault, f"{INBOX}/2026-09", "customs.md") == "Customs hold released."
+
+
+def test_search_matches_name_title_and_frontmatter(vault):
+    archive.compact(vault, now=NOW)
+    assert [h["name"] for h in archive.search(vault, "vendor delay")] == ["vendor.md"]
+    assert [h["name"] for h in archive.search(vault, "risk high")] == ["vendor.md"]
+    assert [h["name"] for h in archive.search(vault, "", source="inbox/delivery")] == ["dock.md", "vendor.md"]
+    assert [h["name"] for h in archive.search(vault, "", source="logs")] == ["2026-06-02.md"]
+    assert archive.search(vault, "nothing like this") == []
+
+
+def test_bundle_ids_cannot_leave_the_archive(vault):
+    archive.compact(vault, now=NOW)
+    with pytest.raises(ValueError):
+        archive.read(vault, "../agent/inbox/delivery/archive/2026-09", "dock.md")
+    with pytest.raises(KeyError):
+        archive.read(vault, f"{INBOX}/2026-09", "missing.md")
+    assert archive.bundles(vault) == ["agent/inbox/delivery/archive/2026-09", "agent/logs/delivery/2026-06"]
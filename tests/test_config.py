@@ -0,0 +1,78 @@
+import os
+
+import config
+from config import RoleRegistry
+
+ROLE = """# Delivery Manager
+
+## Model
+sonnet
+
+## Context Files
+- project/timeline.md
+- project/blockers/
+
+## Context Budget
+20k tokens
+
+## Tools
+- Read
+- Write
+
+## Schedule
+9am, weekdays
+
+## Inbox
+agent/inbox/delivery/
+"""
+
+
+def write(path, text, mtime_ns=None):
+    path.write_text(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_role_files_are_parsed_once_and_reparsed_when_changed(tmp_path):
+    roles = tmp_path / "roles"
+    roles.mkdir()
+    write(roles / "delivery.md", ROLE, mtime_ns=1_000_000_000)
+    registry = RoleRegistry(str(roles), str(tmp_path / "vault"))
+
+    role = registry.get("delivery")
+    assert (role.display_name, role.model, role["schedule"]) == ("Delivery Manager", "sonnet", "9am, weekdays")
+    assert role.context_files == ("project/timeline.md", "project/blockers/")
+    assert (role.tools, role.context_budget, role.large_file_tokens) == (("Read", "Write"), 20000, None)
+    assert registry.get("delivery") is role
+
+    # Same size, new mtime
+    write(roles / "delivery.md", ROLE.replace("9am", "8am"), mtime_ns=2_000_000_000)
+    assert registry.get("delivery").schedule == "8am, weekdays"
+    # Same mtime, new size
+    write(roles / "delivery.md", ROLE.replace("sonnet", "opus"), mtime_ns=2_000_000_000)
+    assert registry.get("delivery").model == "opus"
+    assert registry.inbox_path("delivery") == os.path.join(str(tmp_path / "vault"), "agent/inbox/delivery/")
+
+
+def test_role_list_follows_the_roles_directory(tmp_path):
+    roles = tmp_path / "roles"
+    roles.mkdir()
+    write(roles / "delivery.md", ROLE)
+    write(roles / "notes.txt", "not a role")
+    registry = RoleRegistry(str(roles), str(tmp_path))
+    assert registry.names() == ["delivery"]
+    registry.get("delivery")
+
+    write(roles / "risk.md", ROLE.replace("Delivery Manager", "Risk Manager"))
+    os.remove(roles / "delivery.md")
+    os.utime(roles, ns=(5_000_000_000, 5_000_000_000))  # make the change visible on coarse clocks
+    assert registry.names() == ["risk"]
+    assert [r.display_name for r in registry.all()] == ["Risk Manager"]
+    assert RoleRegistry(str(tmp_path / "missing"), str(tmp_path)).names() == []
+
+
+def test_budgets_parse_counts_units_and_unlimited():
+    assert config._parse_budget("20000 tokens") == 20000
+    assert config._parse_budget("8k") == 8000
+    assert config._parse_budget("unlimited") == 0
+    assert config._parse_budget("") is None
@@ -0,0 +1,81 @@
+import hashlib
+
+import context
+from context import ContextFile, ContextSection
+from frontmatter import PRIORITY_RANK
+
+
+def cfile(path, text, **kwargs):
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    return ContextFile(path, path.rsplit("/", 1)[-1], text, digest, **kwargs)
+
+
+def section(rel, *files):
+    return ContextSection(rel, rel.endswith("/"), list(files))
+
+
+def test_render_delta_classifies_unchanged_changed_added_and_deleted(vault):
+    lines = [f"- milestone {i}: on track" for i in range(40)]
+    before = [
+        section("project/status.md", cfile("project/status.md", "\n".join(lines))),
+        section("project/blockers/",
+                cfile("project/blockers/api.md", "API auth blocked."),
+                cfile("project/blockers/vendor.md", "Vendor late.")),
+    ]
+    context.save_blobs(before)
+    previous = context.manifest(before)
+
+    lines[7] = "- milestone 7: slipped a week"
+    after = [
+        section("project/status.md", cfile("project/status.md", "\n".join(lines))),
+        section("project/blockers/",
+                cfile("project/blockers/api.md", "API auth blocked."),
+                cfile("project/blockers/customs.md", "Customs hold.")),
+    ]
+    text, counts = context.render_delta(after, previous)
+
+    assert counts == {"added": 1, "changed": 1, "deleted": 1, "unchanged": 1}
+    assert "--- changed: project/status.md (diff) ---" in text
+    assert "+- milestone 7: slipped a week" in text and "milestone 30" not in text
+    assert "--- added: project/blockers/customs.md ---\nCustoms hold." in text
+    assert "--- deleted: project/blockers/vendor.md ---" in text
+    assert "API auth blocked." not in text
+
+
+def test_render_delta_sends_full_contents_without_the_old_blob(vault):
+    previous = {"memory.md": "0" * 64}
+    text, counts = context.render_delta([section("memory.md", cfile("memory.md", "Lessons."))], previous)
+    assert counts["changed"] == 1
+    assert "--- changed: memory.md (full contents) ---\nLessons." in text
+
+
+def test_render_delta_with_nothing_new(vault):
+    sections = [section("memory.md", cfile("memory.md", "Lessons."))]
+    text, counts = context.render_delta(sections, context.manifest(sections))
+    assert counts["unchanged"] == 1
+    assert text.endswith("(no changes)")
+
+
+def test_budget_keeps_earlier_entries_then_urgent_then_recent_files(vault):
+    medium, high = PRIORITY_RANK["medium"], PRIORITY_RANK["high"]
+    status = cfile("project/status.md", "s" * 1200)  # ~300 tokens, first entry
+    old = cfile("project/blockers/old.md", "o" * 400, priority=1, urgency=medium, mtime_ns=1)
+    urgent = cfile("project/blockers/urgent.md", "u" * 2000, priority=1, urgency=high, mtime_ns=1)
+    closed = cfile("project/blockers/closed.md", "c" * 40, priority=1, urgency=-1, mtime_ns=3)
+    recent = cfile("project/blockers/recent.md", "r" * 400, priority=1, urgency=medium, mtime_ns=2)
+    sections = [section("project/status.md", status), section("project/blockers/", old, urgent, closed, recent)]
+
+    assert context.apply_budget(sections, 0) == []
+    trimmed = context.apply_budget(sections, 500)
+
+    assert trimmed == [
+        ("project/blockers/urgent.md", "truncated", 500),
+        ("project/blockers/recent.md", "dropped", 100),
+        ("project/blockers/old.md", "dropped", 100),
+        ("project/blockers/closed.md", "dropped", 10),
+    ]
+    assert status.text == "s" * 1200
+    assert urgent.text.startswith("u" * 100) and "truncated: ~200 of ~500 tokens" in urgent.text
+    assert context.estimate_tokens(urgent.text) <= 200
+    assert recent.text.startswith("(omitted") and "Read project/blockers/recent.md" in recent.text
+    assert recent.digest == hashlib.sha256(recent.text.encode()).hexdigest()
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import job_queue
+from job_queue import DistributedPool, JobQueue
+from pool import PRIORITY_HIGH
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = JobQueue(str(tmp_path / "queue.db"))
+    yield q
+    q.close()
+
+
+def row(queue, job_id):
+    return dict(queue._read("SELECT * FROM jobs WHERE id = ?", (job_id,))[0])
+
+
+def test_triggers_merge_into_the_queued_job(queue):
+    job_id, created = queue.enqueue("acme/delivery", "acme", "scheduled", 1, since=20.0, recheck=True)
+    assert created
+    assert queue.enqueue("acme/delivery", "acme", "inbox trigger", PRIORITY_HIGH, since=10.0, recheck=False) \
+        == (job_id, False)
+    job = row(queue, job_id)
+    assert json.loads(job["reasons"]) == ["scheduled", "inbox trigger"]
+    assert (job["priority"], job["since"], job["recheck"]) == (PRIORITY_HIGH, 10.0, 0)
+
+
+def test_one_live_lease_per_role_and_reclaim_after_expiry(queue):
+    job_id, _ = queue.enqueue("acme/delivery", "acme", "scheduled", 1, since=1.0, recheck=False)
+    queue.enqueue("acme/risk", "acme", "scheduled", 1, since=2.0, recheck=False)
+    first = queue.claim("node-a", lease_seconds=0.1)
+    assert (first.id, first.attempts) == (job_id, 1)
+    # A follow-up for the running role waits; the other role is free
+    queue.enqueue("acme/delivery", "acme", "inbox trigger", 1, since=3.0, recheck=True)
+    assert queue.claim("node-b", lease_seconds=10).role_key == "acme/risk"
+    assert queue.claim("node-b", lease_seconds=10) is None
+
+    time.sleep(0.15)
+    # node-a died: its job is merged into the queued follow-up, which node-b now claims
+    again = queue.claim("node-b", lease_seconds=10)
+    assert again.role_key == "acme/delivery" and again.id != job_id
+    assert row(queue, job_id)["state"] == "dropped"
+    assert queue.heartbeat("node-a", [job_id], 10) == set()
+    queue.finish(job_id, "node-a", "done")  # too late: not the owner any more
+    assert row(queue, job_id)["state"] == "dropped"
+
+
+def test_expired_job_is_requeued_then_failed_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 2)
+    job_id, _ = queue.enqueue("acme/delivery", "acme", "scheduled", 1, since=1.0, recheck=True)
+    assert queue.claim("node-a", lease_seconds=0.05).id == job_id
+    time.sleep(0.1)
+    job = queue.claim("node-b", lease_seconds=0.05)
+    assert (job.id, job.attempts, job.recheck) == (job_id, 2, False)
+    time.sleep(0.1)
+    assert queue.claim("node-c", lease_seconds=0.05) is None
+    assert row(queue, job_id)["state"] == "failed"
+
+
+def test_vault_limits_apply_across_nodes(queue):
+    for role in ("delivery", "risk"):
+        queue.enqueue(f"acme/{role}", "acme", "scheduled", 1, since=1.0, recheck=False)
+    assert queue.claim("node-a", 10, {"acme": 1}) is not None
+    assert queue.claim("node-b", 10, {"acme": 1}) is None
+    assert queue.claim("node-b", 10, {"acme": 2}) is not None
+
+
+def test_prune_deletes_only_old_finished_jobs(queue):
+    old, _ = queue.enqueue("acme/delivery", "acme", "scheduled", 1, since=1.0, recheck=False)
+    queue.claim("node-a", 10)
+    queue.finish(old, "node-a", "done")
+    recent, _ = queue.enqueue("acme/delivery", "acme", "scheduled", 1, since=2.0, recheck=False)
+    queue.claim("node-a", 10)
+    queue.finish(recent, "node-a", "failed", "boom")
+    queued, _ = queue.enqueue("acme/delivery", "acme", "scheduled", 1, since=3.0, recheck=False)
+    queue._transaction(lambda conn: conn.execute(
+        "UPDATE jobs SET finished_at = '2020-01-01T00:00:00Z' WHERE id = ?", (old,)))
+
+    assert queue.prune(days=7) == 1
+    assert {r["id"] for r in queue._read("SELECT id FROM jobs")} == {recent, queued}
+
+
+def make_pool(queue, run, **kwargs):
+    return DistributedPool(queue, run, max_concurrent=2, node_id="node-a", lease_seconds=10,
+                           poll_seconds=0.02, group_of=lambda key: key.split("/")[0], **kwargs)
+
+
+def test_pool_runs_its_jobs_and_joins_only_on_them(queue):
+    ran = []
+
+    async def run(key, reason):
+        ran.append((key, reason))
+
+    async def main():
+        # Another node's job that is not ready yet must not hold up join()
+        queue.enqueue("beta/risk", "beta", "scheduled", 1, since=1.0, recheck=False, debounce=3600)
+        pool = make_pool(queue, run, debounce=0.05)
+        assert pool.submit("acme/delivery", "scheduled") is True
+        pool.submit("acme/delivery", "inbox trigger")
+        await asyncio.wait_for(pool.join(), timeout=5)
+        await pool.shutdown()
+
+    asyncio.run(main())
+    assert ran == [("acme/delivery", "scheduled + inbox trigger")]
+    assert [j["role_key"] for j in queue.jobs(("queued",))] == ["beta/risk"]
+    assert [j["state"] for j in queue.jobs(("done",))] == ["done"]
+
+
+def test_pool_drops_drained_inbox_jobs_and_records_failures(queue):
+    async def run(key, reason):
+        raise RuntimeError("boom")
+
+    async def main():
+        pool = make_pool(queue, run, still_needed=lambda key: key != "acme/comms")
+        pool.submit("acme/comms", "inbox trigger", recheck=True)
+        pool.submit("acme/delivery", "scheduled")
+        await asyncio.wait_for(pool.join(), timeout=5)
+        await pool.shutdown()
+
+    asyncio.run(main())
+    states = {j["role_key"]: (j["state"], j["error"]) for j in queue.jobs(job_queue.FINISHED_STATES)}
+    assert states == {"acme/comms": ("dropped", None), "acme/delivery": ("failed", "boom")}
+
+
+def test_pool_cancels_a_run_whose_lease_was_taken_over(queue):
+    cancelled = asyncio.Event
+
+    async def main():
+        nonlocal cancelled
+        cancelled = asyncio.Event()
+
+        async def run(key, reason):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        pool = DistributedPool(queue, run, max_concurrent=1, node_id="node-a", lease_seconds=0.3,
+                               poll_seconds=0.02)
+        pool.submit("acme/delivery", "scheduled")
+        while not pool.running:
+            await asyncio.sleep(0.01)
+        queue._transaction(lambda conn: conn.execute("UPDATE jobs SET owner = 'node-b', lease_expires = ?",
+                                                      (time.time() + 60,)))
+        await asyncio.wait_for(cancelled.wait(), timeout=2)
+        await pool.shutdown()
+
+    asyncio.run(main())
+    assert queue.jobs(("running",))[0]["owner"] == "node-b"
+
+
+def test_leader_holds_the_scheduler_lease_and_prunes(queue):
+    async def run(key, reason):
+        pass
+
+    old, _ = queue.enqueue("acme/delivery", "acme", "scheduled", 1, since=1.0, recheck=False)
+    queue.claim("node-a", 10)
+    queue.finish(old, "node-a", "done")
+    queue._transaction(lambda conn: conn.execute("UPDATE jobs SET finished_at = '2020-01-01T00:00:00Z'"))
+
+    async def main():
+        a = make_pool(queue, run)
+        b = DistributedPool(queue, run, max_concurrent=1, node_id="node-b", lease_seconds=10)
+        assert await a.lead() is True
+        assert await b.lead() is False
+        await a.shutdown()
+        assert await b.lead() is True
+        await b.shutdown()
+
+    asyncio.run(main())
+    assert queue.jobs(job_queue.FINISHED_STATES) == []
@@ -0,0 +1,41 @@
+import asyncio
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock
+
+import large_files
+from vault_cache import cache
+
+
+def test_summarizes_the_middle_once_and_condenses_the_file(vault):
+    path = vault.path + "/notes.md"
+    with open(path, "w") as f:
+        f.write("HEAD " * 100 + "middle detail " * 2000 + " TAIL" * 100)
+    prompts = []
+
+    async def query_fn(*, prompt, options):
+        prompts.append(prompt)
+        yield AssistantMessage([TextBlock("- vendor slipped two weeks")], "haiku")
+        yield ResultMessage("success", 1, 1, False, 1, "s", total_cost_usd=0.001)
+
+    files = [(path, "notes.md")]
+    assert asyncio.run(large_files.summarize(files, 2000, query_fn, "delivery")) == 1
+    assert asyncio.run(large_files.summarize(files, 2000, query_fn, "delivery")) == 0
+    assert len(prompts) == 1 and "middle detail" in prompts[0]
+
+    text, digest = large_files.content(cache.entry(path, 2000), "notes.md")
+    assert text.startswith("HEAD") and text.endswith("TAIL")
+    assert "- vendor slipped two weeks" in text and "middle detail" not in text
+    assert digest != cache.entry(path, 2000).digest
+
+
+def test_small_files_are_sent_whole(vault):
+    path = vault.path + "/small.md"
+    with open(path, "w") as f:
+        f.write("short note")
+
+    async def query_fn(*, prompt, options):
+        raise AssertionError("no summary needed")
+        yield
+
+    assert asyncio.run(large_files.summarize([(path, "small.md")], 2000, query_fn, "delivery")) == 0
+    assert large_files.content(cache.entry(path, 2000), "small.md")[0] == "short note"
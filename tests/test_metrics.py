@@ -0,0 +1,54 @@
+import json
+import os
+
+import config
+import metrics
+from metrics import RunMetrics
+
+
+def test_phases_counts_and_tokens_of_a_run():
+    m = RunMetrics("delivery", "scheduled", "sonnet", "acme")
+    with m.span("context_load"):
+        pass
+    with m.span("context_load"):  # spans of the same phase add up
+        pass
+    m.begin_query()
+    m.on_message(is_assistant=False)  # SDK init
+    m.on_message(is_assistant=True, tool_uses=2)
+    m.on_message(is_assistant=False)  # tool results
+    m.on_message(is_assistant=True)
+    m.end_query()
+    m.finish("ok", cost_usd=0.02, num_turns=2, usage={
+        "input_tokens": 100, "cache_read_input_tokens": 300, "cache_creation_input_tokens": 100, "output_tokens": 50,
+    })
+
+    assert m.counts == {"messages": 4, "assistant_messages": 2, "tool_uses": 2, "tool_turns": 1, "turns": 2}
+    assert {"context_load", "sdk_start", "first_assistant", "tool_turns", "query", "total"} <= set(m.phases)
+    assert m.phases["sdk_start"] <= m.phases["first_assistant"] <= m.phases["query"] <= m.phases["total"]
+    assert m.tokens == {"input": 500, "uncached": 100, "cache_read": 300, "cache_write": 100, "output": 50}
+    assert m.cache_hit_ratio == 0.6
+    assert "cache_hit=60%" in m.summary() and "tool_uses=2" in m.summary()
+
+
+def test_record_appends_jsonl_and_rewrites_the_prom_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "_aggregate", metrics._Aggregate())
+    for status, cost in (("ok", 0.25), ("error", None)):
+        m = RunMetrics("delivery", "scheduled", "sonnet", "acme")
+        m.prefix = {"segments": 4, "segments_reused": 3, "chars": 1000, "chars_reused": 800}
+        m.finish(status, cost_usd=cost)
+        metrics.record(m)
+
+    with open(tmp_path / metrics.JSONL_FILE) as f:
+        runs = [json.loads(line) for line in f]
+    assert [(r["vault"], r["role"], r["status"]) for r in runs] == [("acme", "delivery", "ok"),
+                                                                      ("acme", "delivery", "error")]
+    assert "total" in runs[0]["phases_ms"]
+
+    prom = (tmp_path / metrics.PROM_FILE).read_text()
+    assert 'tpm_runner_runs_total{vault="acme",role="delivery",status="ok"} 1' in prom
+    assert 'tpm_runner_runs_total{vault="acme",role="delivery",status="error"} 1' in prom
+    assert 'tpm_runner_cost_usd_total{vault="acme",role="delivery"} 0.250000' in prom
+    assert 'tpm_runner_phase_seconds_count{vault="acme",role="delivery",phase="total"} 2' in prom
+    assert 'tpm_runner_prompt_prefix_total{vault="acme",role="delivery",kind="chars_reused"} 1600' in prom
+    assert [fn for fn in os.listdir(tmp_path) if fn.endswith(".tmp")] == []
@@ -0,0 +1,155 @@
+import asyncio
+
+from pool import PRIORITY_HIGH, PRIORITY_LOW, RolePool
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_triggers_for_one_role_coalesce_into_one_run():
+    calls = []
+
+    async def role_run(role, reason):
+        calls.append((role, reason))
+
+    async def main():
+        pool = RolePool(role_run, max_concurrent=2, debounce=0.05)
+        assert pool.submit("delivery", "scheduled (9am)") is True
+        assert pool.submit("delivery", "inbox trigger") is False
+        assert pool.submit("delivery", "inbox trigger") is False
+        await pool.join()
+
+    run(main())
+    assert calls == [("delivery", "scheduled (9am) + inbox trigger")]
+
+
+def test_highest_priority_then_oldest_runs_first():
+    order = []
+
+    release = None
+
+    async def role_run(role, reason):
+        if role == "blocker":
+            await release.wait()
+        else:
+            order.append(role)
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        pool = RolePool(role_run, max_concurrent=1)
+        pool.submit("blocker", "manual")  # holds the only slot while the others queue
+        pool.submit("comms", "inbox trigger", priority=PRIORITY_LOW, since=1.0)
+        pool.submit("risk", "inbox trigger", since=3.0)
+        pool.submit("product", "inbox trigger", since=2.0)
+        pool.submit("delivery", "inbox trigger", priority=PRIORITY_HIGH, since=4.0)
+        assert pool.pending == ["delivery", "product", "risk", "comms"]
+        release.set()
+        await pool.join()
+
+    run(main())
+    assert order == ["delivery", "product", "risk", "comms"]
+
+
+def test_debounce_delays_the_start():
+    started = []
+
+    async def role_run(role, reason):
+        started.append(asyncio.get_running_loop().time())
+
+    async def main():
+        pool = RolePool(role_run, max_concurrent=1, debounce=0.1)
+        t = asyncio.get_running_loop().time()
+        pool.submit("delivery", "inbox trigger")
+        await pool.join()
+        return t
+
+    t = run(main())
+    assert started[0] - t >= 0.1
+
+
+def test_a_role_never_runs_twice_at_once_and_gets_a_follow_up():
+    active, peak, reasons = set(), [0], []
+
+    async def role_run(role, reason):
+        assert role not in active
+        active.add(role)
+        peak[0] = max(peak[0], len(active))
+        reasons.append(reason)
+        await asyncio.sleep(0.05)
+        active.discard(role)
+
+    async def main():
+        pool = RolePool(role_run, max_concurrent=4)
+        pool.submit("delivery", "first")
+        await asyncio.sleep(0.01)
+        assert pool.is_running("delivery")
+        pool.submit("delivery", "second")
+        pool.submit("delivery", "third")
+        await pool.join()
+
+    run(main())
+    assert reasons == ["first", "second + third"]
+    assert peak[0] == 1
+
+
+def test_concurrency_and_group_limits():
+    active, peak, group_peak = [], [0], {}
+
+    async def role_run(role, reason):
+        active.append(role)
+        peak[0] = max(peak[0], len(active))
+        group = role.split("/")[0]
+        group_peak[group] = max(group_peak.get(group, 0), sum(r.startswith(group) for r in active))
+        await asyncio.sleep(0.02)
+        active.remove(role)
+
+    async def main():
+        pool = RolePool(role_run, max_concurrent=3, group_of=lambda k: k.split("/")[0],
+                        group_limit=lambda g: 1 if g == "a" else 0)
+        for key in ("a/x", "a/y", "a/z", "b/x", "b/y", "b/z"):
+            pool.submit(key, "scheduled")
+        await pool.join()
+
+    run(main())
+    assert peak[0] == 3
+    assert group_peak == {"a": 1, "b": 2}
+
+
+def test_inbox_follow_up_is_dropped_once_the_inbox_is_drained():
+    calls = []
+    inbox = {"delivery": True}
+
+    async def role_run(role, reason):
+        calls.append(reason)
+        await asyncio.sleep(0.02)
+        inbox[role] = False
+
+    async def main():
+        pool = RolePool(role_run, max_concurrent=1, still_needed=lambda role: inbox[role])
+        pool.submit("delivery", "scheduled")
+        await asyncio.sleep(0.005)
+        pool.submit("delivery", "inbox trigger", recheck=True)
+        await pool.join()
+
+    run(main())
+    assert calls == ["scheduled"]
+
+
+def test_a_failing_run_does_not_stop_the_pool():
+    calls = []
+
+    async def role_run(role, reason):
+        calls.append(role)
+        if role == "risk":
+            raise RuntimeError("boom")
+
+    async def main():
+        pool = RolePool(role_run, max_concurrent=1)
+        pool.submit("risk", "scheduled", priority=PRIORITY_HIGH)
+        pool.submit("delivery", "scheduled")
+        await pool.join()
+
+    run(main())
+    assert calls == ["risk", "delivery"]
@@ -0,0 +1,36 @@
+import prompt
+from context import ContextFile, ContextSection
+from prompt import PrefixTracker, segment
+
+
+def test_observe_counts_the_unchanged_leading_segments():
+    tracker = PrefixTracker()
+    rules, template = segment("vault_rules", "rules"), segment("role_template", "template")
+
+    first = tracker.observe("acme/delivery", [rules, template, segment("run", "09:00")])
+    assert (first.segments, first.segments_reused, first.chars, first.chars_reused) == (3, 0, 18, 0)
+
+    second = tracker.observe("acme/delivery", [rules, template, segment("run", "10:00")])
+    assert (second.segments_reused, second.chars_reused) == (2, 13)
+
+    # A change early on breaks the prefix, even if later segments match again
+    third = tracker.observe("acme/delivery", [rules, segment("role_template", "edited"), segment("run", "10:00")])
+    assert third.segments_reused == 1
+    assert third.to_dict() == {"segments": 3, "segments_reused": 1, "chars": 16, "chars_reused": 5}
+
+
+def test_observe_keeps_roles_apart():
+    tracker = PrefixTracker()
+    segments = [segment("vault_rules", "rules")]
+    tracker.observe("acme/delivery", segments)
+    assert tracker.observe("acme/risk", segments).segments_reused == 0
+    assert tracker.observe("acme/delivery", segments).segments_reused == 1
+
+
+def test_context_segments_put_recently_changed_sections_last():
+    def section(rel, mtime_ns):
+        return ContextSection(rel, False, [ContextFile(rel, rel, rel, "", mtime_ns=mtime_ns)])
+
+    sections = [section("memory.md", 30), section("project/scope.md", 10), section("project/team.md", 10)]
+    names = [s.name for s in prompt.context_segments(sections)]
+    assert names == ["context:project/scope.md", "context:project/team.md", "context:memory.md"]
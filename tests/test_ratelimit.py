@@ -0,0 +1,148 @@
+import asyncio
+import threading
+
+import pytest
+from claude_agent_sdk import AssistantMessage, ResultError, ResultMessage
+
+import config
+import ratelimit
+from ratelimit import AdaptiveConcurrency, RateLimited, TokenBucket, is_rate_limit_error, is_rate_limit_message
+from run_store import RunStore
+
+
+def result(is_error=False, status=None, text=None):
+    return ResultMessage("success", 10, 10, is_error, 1, "s1", result=text, api_error_status=status)
+
+
+def assistant(error=None):
+    return AssistantMessage([], "sonnet", error=error)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Rate limit exceeded, retry later", True),
+    ("API Error: 529 Overloaded", True),
+    ("HTTP 429 Too Many Requests", True),
+    ("invalid x-api-key token", False),
+    ("prompt is too long: 210000 tokens > 200000 maximum context limit", False),
+    ("Your credit balance is too low", False),
+    ("usage quota exceeded for this billing period", False),
+])
+def test_error_text_fallback_only_matches_explicit_phrases(text, expected):
+    assert is_rate_limit_error(RuntimeError(text)) is expected
+
+
+def test_error_status_wins_over_text():
+    assert is_rate_limit_error(ResultError("boom", {"api_error_status": 429}))
+    assert is_rate_limit_error(ResultError("boom", {"api_error_status": 529}))
+    assert not is_rate_limit_error(ResultError("rate limit in request id 429", {"api_error_status": 401}))
+    assert is_rate_limit_error(RateLimited("API error: rate_limit"))
+
+
+def test_rate_limit_messages():
+    assert is_rate_limit_message(result(is_error=True, status=429))
+    assert is_rate_limit_message(result(is_error=True, status=529))
+    assert is_rate_limit_message(assistant(error="rate_limit"))
+    assert not is_rate_limit_message(result(is_error=True, status=401))
+    assert not is_rate_limit_message(result(is_error=False, status=429))
+    assert not is_rate_limit_message(assistant(error="authentication_failed"))
+    assert not is_rate_limit_message(assistant())
+
+
+class Pool:
+    max_concurrent = 8
+
+
+@pytest.fixture
+def controls(monkeypatch):
+    monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY", True)
+    monkeypatch.setattr(config, "ADAPTIVE_RECOVERY_RUNS", 2)
+    monkeypatch.setattr(ratelimit, "limiter", TokenBucket(0, 1))
+    monkeypatch.setattr(ratelimit, "concurrency", AdaptiveConcurrency(8))
+    pool = Pool()
+    ratelimit.concurrency.attach(pool)
+    return pool
+
+
+def collect(messages, error=None):
+    async def query_fn(*, prompt, options):
+        for message in messages:
+            yield message
+        if error is not None:
+            raise error
+
+    async def main():
+        return [m async for m in ratelimit.limited(query_fn)(prompt="p", options=None)]
+
+    return asyncio.run(main())
+
+
+def test_rate_limited_result_raises_pauses_and_halves_concurrency(controls):
+    with pytest.raises(RateLimited, match="HTTP 429"):
+        collect([assistant(error="rate_limit"), result(is_error=True, status=429, text="API Error: 429")])
+    assert controls.max_concurrent == 4
+    assert ratelimit.limiter._paused_until > 0
+
+
+def test_sdk_error_after_rate_limit_message_counts_as_rate_limit(controls):
+    with pytest.raises(RateLimited) as raised:
+        collect([assistant(error="rate_limit")], error=RuntimeError("Command failed with exit code 1"))
+    assert is_rate_limit_error(raised.value)
+    assert controls.max_concurrent == 4
+
+
+def test_recovered_or_unrelated_failures_are_not_rate_limits(controls):
+    assert len(collect([assistant(error="rate_limit"), result()])) == 2
+    assert len(collect([result(is_error=True, status=500)])) == 1
+    with pytest.raises(RuntimeError):
+        collect([], error=RuntimeError("invalid api key"))
+    assert controls.max_concurrent == 8
+
+
+def test_concurrency_recovers_one_slot_per_run_of_successes(controls, monkeypatch):
+    monkeypatch.setattr(config, "RATE_LIMIT_COOLDOWN_SECONDS", 0)
+    ratelimit.concurrency.on_rate_limited()
+    ratelimit.concurrency.on_rate_limited()
+    assert controls.max_concurrent == 2
+    for _ in range(4):
+        collect([result()])
+    assert controls.max_concurrent == 4
+
+
+def test_retry_delay_is_capped_with_equal_jitter(monkeypatch):
+    monkeypatch.setattr(config, "RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(config, "RETRY_MAX_SECONDS", 60)
+    for attempt, backoff in ((1, 10), (2, 20), (3, 40), (4, 60), (9, 60)):
+        for _ in range(20):
+            assert backoff / 2 <= ratelimit.retry_delay(attempt) <= backoff
+
+
+def test_token_bucket_spends_the_burst_then_waits():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket._reserve() == 0 and bucket._reserve() == 0
+    assert bucket._reserve() == pytest.approx(0.1, abs=0.02)
+
+
+def test_schedule_retry_counts_attempts_across_connections(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RETRY_MAX_ATTEMPTS", 40)
+    path = str(tmp_path / "runs.db")
+    stores = [RunStore(path) for _ in range(4)]
+    attempts = []
+
+    def worker(store):
+        for _ in range(10):
+            attempts.append(store.schedule_retry("delivery", "scheduled (retry)", lambda n: 60, "429")[0])
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(attempts) == list(range(1, 41))
+    assert stores[0].schedule_retry("delivery", "scheduled (retry)", lambda n: 60, "429") is None
+    assert stores[0].retries() == []
+
+    stores[0].schedule_retry("delivery", "scheduled (retry)", lambda n: -1, "429")
+    taken = [s.take_due_retries() for s in stores]
+    assert sum(len(t) for t in taken) == 1
+    for store in stores:
+        store.close()
@@ -0,0 +1,90 @@
+import hashlib
+
+import pytest
+
+import retrieval
+from context import ContextFile, ContextSection
+from retrieval import BM25Index, tokenize
+
+
+def doc(text: str) -> tuple[str, str]:
+    return hashlib.sha256(text.encode()).hexdigest(), text
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = BM25Index(str(tmp_path / "retrieval.db"))
+    yield idx
+    idx.close()
+
+
+def test_tokenize_drops_stopwords_and_numbers():
+    assert tokenize("The vendor is late by 3 days on API-auth_v2") == ["vendor", "late", "days", "api", "auth_v2"]
+
+
+def test_ranks_the_matching_document_first(index):
+    index.sync_dir("project/blockers", {
+        "project/blockers/api.md": doc("API auth token rotation blocks the vendor integration"),
+        "project/blockers/dock.md": doc("Loading dock schedule slipped, forklift maintenance"),
+        "project/blockers/hiring.md": doc("Hiring freeze delays the warehouse team"),
+    })
+    scores = index.scores("vendor integration auth", index.paths_in("project/blockers"))
+    assert max(scores, key=scores.get) == "project/blockers/api.md"
+    assert scores["project/blockers/hiring.md"] == 0.0
+    assert index.scores("", ["project/blockers/api.md"]) == {"project/blockers/api.md": 0.0}
+
+
+def test_rare_terms_weigh_more(index):
+    index.sync_dir("d", {
+        "d/a.md": doc("delay delay delay"),
+        "d/b.md": doc("delay customs"),
+        "d/c.md": doc("delay"),
+    })
+    scores = index.scores("delay customs", ["d/a.md", "d/b.md", "d/c.md"])
+    assert scores["d/b.md"] > scores["d/a.md"] > scores["d/c.md"]
+
+
+def test_updates_are_incremental_and_persist(index, tmp_path):
+    docs = {"d/a.md": doc("vendor delay"), "d/b.md": doc("dock schedule")}
+    assert index.sync_dir("d", docs) == 2
+    assert index.sync_dir("d", docs) == 0  # unchanged digests: nothing re-tokenized
+
+    docs["d/b.md"] = doc("vendor escalation")
+    del docs["d/a.md"]
+    assert index.sync_dir("d", docs) == 2
+    assert index.paths_in("d") == ["d/b.md"]
+
+    reopened = BM25Index(index.path)
+    try:
+        assert reopened.paths_in("d") == ["d/b.md"]
+        assert reopened.scores("escalation", ["d/b.md"])["d/b.md"] > 0
+        assert reopened.sync_dir("d", docs) == 0
+    finally:
+        reopened.close()
+
+
+def test_scores_handle_more_paths_and_terms_than_one_sqlite_statement(index):
+    docs = {f"d/{i}.md": doc(f"item{i} shared") for i in range(1200)}
+    index.sync_dir("d", docs)
+    query = " ".join(f"item{i}" for i in range(1200))
+    scores = index.scores(query, list(docs))
+    assert all(score > 0 for score in scores.values())
+
+
+def test_narrow_keeps_top_k_per_directory_and_lists_the_rest(vault):
+    def cf(path, text, mtime):
+        digest, _ = doc(text)
+        return ContextFile(path, path.rsplit("/", 1)[-1], text, digest, mtime_ns=mtime)
+
+    blockers = ContextSection("project/blockers/", True, [
+        cf("project/blockers/api.md", "vendor API outage", 1),
+        cf("project/blockers/dock.md", "dock schedule", 3),
+        cf("project/blockers/team.md", "team vacation", 2),
+    ])
+    single = ContextSection("memory.md", False, [cf("memory.md", "unrelated", 1)])
+    kept, considered = retrieval.narrow([blockers, single], "the vendor API is down", top_k=2)
+    assert (kept, considered) == (2, 3)
+    # The match first; the tie among non-matching files goes to the most recently modified
+    assert [f.path for f in blockers.files] == ["project/blockers/api.md", "project/blockers/dock.md"]
+    assert blockers.omitted == ["project/blockers/team.md"]
+    assert [f.path for f in single.files] == ["memory.md"]
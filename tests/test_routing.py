@@ -0,0 +1,64 @@
+import pytest
+
+import config
+import routing
+from frontmatter import PRIORITY_RANK
+from run_store import get_store
+from routing import NO_INBOX, Policy, Signals, changed_share, decide, parse_policy
+
+ROLE = {"name": "delivery", "model": "sonnet", "routing": ""}
+
+
+@pytest.fixture
+def routed(vault, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_ROUTING", True)
+    return vault
+
+
+def signals(trigger="inbox trigger", tokens=1000, items=1, priority="low", changed=0.0):
+    return Signals(trigger, tokens, items, PRIORITY_RANK[priority] if items else NO_INBOX, changed)
+
+
+def test_routing_off_keeps_the_role_model(vault, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_ROUTING", False)
+    decision = decide(ROLE, signals())
+    assert (decision.model, decision.rule) == ("sonnet", "off")
+
+
+def test_parse_policy():
+    assert parse_policy("") == Policy()
+    assert parse_policy("off") == Policy(enabled=False)
+    assert parse_policy("- light: haiku\n- heavy: opus\n- other: x") == Policy(light="haiku", heavy="opus")
+
+
+def test_changed_share():
+    assert changed_share({"a": "1"}, None) == 1.0
+    assert changed_share({}, {}) == 0.0
+    assert changed_share({"a": "1", "b": "2"}, {"a": "1", "b": "3", "c": "4"}) == pytest.approx(2 / 3)
+
+
+def test_rules(routed):
+    assert decide(ROLE, signals(trigger="manual")).rule == "fixed"
+    light = decide(ROLE, signals())
+    assert (light.model, light.rule, light.routed) == ("haiku", "light", True)
+    assert decide(ROLE, signals(items=0)).rule == "light"
+    assert decide(ROLE, signals(changed=0.5)).rule == "default"
+    assert decide(ROLE, signals(priority="medium")).rule == "default"
+    # Heavy keeps the role's own model unless the role names a heavy one
+    heavy = decide(ROLE, signals(tokens=config.ROUTING_HEAVY_MIN_TOKENS))
+    assert (heavy.model, heavy.rule) == ("sonnet", "heavy")
+    opus = decide({**ROLE, "routing": "- heavy: opus"}, signals(items=5, priority="high"))
+    assert (opus.model, opus.rule) == ("opus", "heavy")
+    assert decide({**ROLE, "routing": "off"}, signals()).rule == "off"
+
+
+def test_guard_falls_back_after_failed_light_runs(routed, monkeypatch):
+    monkeypatch.setattr(config, "ROUTING_MAX_FAILURE_RATE", 0.5)
+    store = get_store()
+    for status in ("error", "ok", "error"):
+        run_id = store.start_run("delivery", "inbox trigger", "haiku", routing="light")
+        store.finish_run(run_id, status=status)
+    decision = decide(ROLE, signals())
+    assert (decision.model, decision.rule) == ("sonnet", "guard")
+    assert "haiku failed 2 of its last 3 light runs" in decision.describe()
+    assert routing.decide({**ROLE, "name": "risk"}, signals()).model == "haiku"
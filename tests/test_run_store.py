@@ -0,0 +1,38 @@
+import json
+import os
+
+from run_store import RunStore
+
+
+def test_legacy_sessions_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "sessions.json"
+    legacy.write_text(json.dumps({
+        "delivery": {"session_id": "abc123", "date": "2026-10-17"},
+        "risk": {"session_id": "def456", "date": "2026-10-16"},
+        "comms": {"date": "2026-10-17"},  # incomplete entries are skipped
+    }))
+
+    store = RunStore(str(tmp_path / "runs.db"))
+    assert store.get_session("delivery", "2026-10-17") == "abc123"
+    assert store.get_session("risk", "2026-10-16") == "def456"
+    assert store.get_session("risk", "2026-10-17") is None
+    assert store.get_session("comms", "2026-10-17") is None
+    assert not legacy.exists() and (tmp_path / "sessions.json.migrated").exists()
+
+    store.save_session("delivery", "xyz789", "2026-10-17")
+    store.close()
+    # Reopening does not import again, even if an old sessions.json reappears
+    legacy.write_text(json.dumps({"delivery": {"session_id": "abc123", "date": "2026-10-17"}}))
+    os.remove(tmp_path / "sessions.json.migrated")
+    store = RunStore(str(tmp_path / "runs.db"))
+    assert store.get_session("delivery", "2026-10-17") == "xyz789"
+    store.close()
+
+
+def test_unreadable_sessions_json_is_set_aside(tmp_path):
+    (tmp_path / "sessions.json").write_text("{not json")
+    store = RunStore(str(tmp_path / "runs.db"))
+    assert store.get_session("delivery", "2026-10-17") is None
+    assert (tmp_path / "sessions.json.migrated").exists()
+    store.close()
+
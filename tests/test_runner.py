@@ -0,0 +1,130 @@
+import asyncio
+import os
+
+import config
+import job_queue
+import run_store
+import runner
+
+
+def test_role_template_names_the_vault_project(vault, tmp_path):
+    role = vault.registry.all()[0]
+    text = runner.build_role_system_prompt(role)
+    assert "**Project:** acme\n" in text
+    assert f"**Your working directory:** `{vault.path}/`" in text
+    assert "Peak Logistics" not in text
+
+    (tmp_path / "acme" / "runner.md").write_text("## Project\nAcme Rollout (AR)\n")
+    named = config.make_vault("acme", vault.path, sessions_dir=vault.sessions_dir)
+    with config.use_vault(named):
+        assert "**Project:** Acme Rollout (AR)\n" in runner.build_role_system_prompt(named.registry.all()[0])
+
+
+def test_vault_display_path_is_relative_inside_the_checkout():
+    demo = config.make_vault("peaklogistics", config._DEFAULT_VAULT)
+    assert runner.vault_display_path(demo) == "vaults/peaklogistics/"
+    assert demo.project == "Peak Logistics Movement (PLM)"
+
+
+def test_unchanged_scheduled_run_is_skipped_before_any_summarizing(vault, monkeypatch):
+    async def no_summaries(role_cfg):
+        raise AssertionError("large files summarized for a skipped run")
+
+    monkeypatch.setattr(config, "SKIP_UNCHANGED_RUNS", True)
+    monkeypatch.setattr(runner, "summarize_large_files", no_summaries)
+    role = config.load_role("delivery")
+    store = run_store.get_store()
+    store.save_fingerprint("delivery", runner.input_fingerprint(role), {})
+    store.schedule_retry("delivery", "scheduled (9am) (retry)", lambda attempt: 0, "429 rate limited")
+
+    asyncio.run(runner.run_role_async("delivery", "scheduled (9am) (retry)"))
+
+    assert [r["status"] for r in store.recent_runs("delivery")] == ["skipped"]
+    assert store.retries() == []
+
+
+def test_has_inbox_items_ignores_gitkeep_and_directories(vault):
+    inbox = vault.registry.inbox_path("delivery")
+    assert runner.has_inbox_items("delivery") is False  # inbox not created yet
+    os.makedirs(os.path.join(inbox, "archive"))
+    open(os.path.join(inbox, ".gitkeep"), "w").close()
+    assert runner.has_inbox_items("delivery") is False
+    open(os.path.join(inbox, "2026-10-17-vendor.md"), "w").close()
+    assert runner.has_inbox_items("delivery") is True
+
+
+def test_resumed_session_keeps_its_model(vault, monkeypatch):
+    seen = []
+
+    async def fake_query(prompt, options):
+        seen.append((options.model, options.resume))
+        return
+        yield
+
+    monkeypatch.setattr(config, "MODEL_ROUTING", True)
+    monkeypatch.setattr(runner, "query", fake_query)
+    store = run_store.get_store()
+    for session_model in ("sonnet", "haiku"):
+        store.start_run("delivery", "inbox trigger", session_model, "s1")
+        store.save_session("delivery", "s1", runner.datetime.now(runner.timezone.utc).strftime("%Y-%m-%d"))
+        asyncio.run(runner.run_role_async("delivery", "scheduled (9am)"))
+
+    # Routing picks the role default (sonnet): resume the sonnet session, start fresh over the haiku one
+    assert seen == [("sonnet", "s1"), ("sonnet", None)]
+
+
+def test_non_leader_node_requeues_its_own_rate_limited_runs(vault, tmp_path, monkeypatch):
+    ran = []
+
+    async def run_on_leader(key, reason):
+        ran.append(("node-a", key, reason))
+
+    async def run_role_async(role_name, reason):
+        ran.append(("node-b", f"{config.vault().name}/{role_name}", reason))
+
+    queue = job_queue.JobQueue(str(tmp_path / "queue.db"))
+    monkeypatch.setattr(job_queue, "_queue", queue)
+    monkeypatch.setattr(config, "JOB_QUEUE_PATH", str(tmp_path / "queue.db"))
+    monkeypatch.setattr(config, "NODE_ID", "node-b")
+    monkeypatch.setattr(config, "JOB_POLL_SECONDS", 0.02)
+    monkeypatch.setattr(config, "DISPATCH_DEBOUNCE_SECONDS", 0)
+    monkeypatch.setattr(runner, "run_role_async", run_role_async)
+    # node-b hit the 429: the retry lives in node-b's run store only
+    run_store.get_store().schedule_retry("delivery", "inbox trigger (retry)", lambda attempt: 0, "429")
+
+    async def main():
+        leader = job_queue.DistributedPool(queue, run_on_leader, max_concurrent=1, node_id="node-a",
+                                           lease_seconds=10, poll_seconds=0.02)
+        assert await leader.lead() is True
+        node_b = asyncio.create_task(runner.scheduler_loop(["acme/delivery"]))
+        try:
+            for _ in range(250):
+                if ran:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            node_b.cancel()
+            await asyncio.gather(node_b, return_exceptions=True)
+            await leader.shutdown()
+
+    try:
+        asyncio.run(main())
+    finally:
+        queue.close()
+    assert [(key, reason) for _, key, reason in ran] == [("acme/delivery", "inbox trigger (retry)")]
+
+
+def test_check_all_inboxes_scans_off_the_loop_and_submits_on_it(vault):
+    submitted = []
+
+    class Pool:
+        def submit(self, key, reason, priority, since, recheck):
+            submitted.append((key, reason, recheck))
+
+    inbox = vault.registry.inbox_path("delivery")
+    os.makedirs(inbox)
+    with open(os.path.join(inbox, "2026-10-17-vendor.md"), "w") as f:
+        f.write("---\npriority: high\n---\nVendor slipped.\n")
+
+    asyncio.run(runner.check_all_inboxes(Pool()))
+    assert submitted == [("acme/delivery", "inbox trigger", True)]
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduler import WEEKDAYS, CronExpr, DeadlineScheduler, parse_schedule_spec
+
+FRI_1000 = datetime(2026, 10, 16, 10, 0)  # a Friday
+
+
+@pytest.mark.parametrize("text, kind, times, days", [
+    ("9am and 5pm, weekdays", "daily", ("09:00", "17:00"), WEEKDAYS),
+    ("9:30am", "daily", ("09:30",), frozenset(range(7))),
+    ("12am and 12pm", "daily", ("00:00", "12:00"), frozenset(range(7))),
+    ("17:00 on monday and thursday", "daily", ("17:00",), frozenset({0, 3})),
+    ("10am, fri-mon", "daily", ("10:00",), frozenset({4, 5, 6, 0})),
+    ("On-demand", "on-demand", (), frozenset(range(7))),
+    ("whenever", "unparsed", (), frozenset(range(7))),
+])
+def test_parse_daily_and_other_kinds(text, kind, times, days):
+    spec = parse_schedule_spec(text)
+    assert (spec.kind, spec.times, spec.days) == (kind, times, days)
+
+
+def test_parse_intervals():
+    assert parse_schedule_spec("Every 30 minutes").interval_minutes == 30
+    spec = parse_schedule_spec("every 2 hours, weekends")
+    assert (spec.kind, spec.interval_minutes, spec.describe()) == ("interval", 120, "every 120 minutes, weekends")
+
+
+def test_daily_next_after_skips_to_the_next_allowed_day():
+    spec = parse_schedule_spec("9am and 5pm, weekdays")
+    assert spec.next_after(FRI_1000, FRI_1000) == datetime(2026, 10, 16, 17, 0)
+    assert spec.next_after(datetime(2026, 10, 16, 17, 0), FRI_1000) == datetime(2026, 10, 19, 9, 0)
+
+
+def test_interval_counts_from_the_anchor_and_respects_days():
+    spec = parse_schedule_spec("every 45 minutes, weekdays")
+    anchor = datetime(2026, 10, 16, 9, 10)
+    assert spec.next_after(datetime(2026, 10, 16, 9, 56), anchor) == datetime(2026, 10, 16, 10, 40)
+    monday = spec.next_after(datetime(2026, 10, 16, 23, 50), anchor)
+    assert monday.weekday() == 0 and (monday - anchor) % timedelta(minutes=45) == timedelta(0)
+
+
+@pytest.mark.parametrize("expr, after, expected", [
+    ("0 9 * * 1-5", FRI_1000, datetime(2026, 10, 19, 9, 0)),
+    ("*/15 * * * *", datetime(2026, 10, 16, 10, 7), datetime(2026, 10, 16, 10, 15)),
+    ("30 8 1 * *", FRI_1000, datetime(2026, 11, 1, 8, 30)),
+    ("0 12 * * sun", FRI_1000, datetime(2026, 10, 18, 12, 0)),
+    ("0 12 * * 7", FRI_1000, datetime(2026, 10, 18, 12, 0)),
+    # Both day fields restricted: either one matches (the 20th, or any Monday)
+    ("0 0 20 * mon", FRI_1000, datetime(2026, 10, 19, 0, 0)),
+    ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29, 0, 0)),
+])
+def test_cron_next_after(expr, after, expected):
+    assert CronExpr.parse(expr).next_after(after) == expected
+
+
+@pytest.mark.parametrize("expr", ["0 9 * *", "60 * * * *", "0 24 * * *", "5-1 * * * *", "*/0 * * * *"])
+def test_invalid_cron_is_rejected(expr):
+    with pytest.raises(ValueError):
+        CronExpr.parse(expr)
+    assert parse_schedule_spec(f"cron: {expr}").kind == "unparsed"
+
+
+class Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def test_deadline_heap_fires_due_roles_in_order_and_reschedules():
+    clock = Clock(datetime(2026, 10, 16, 8, 59))
+    fired = []
+    deadlines = DeadlineScheduler(lambda role, reason: fired.append((role, reason)), clock)
+    deadlines.add("delivery", parse_schedule_spec("9am and 5pm"))
+    deadlines.add("risk", parse_schedule_spec("every 30 minutes"))
+    assert deadlines.add("comms", parse_schedule_spec("on-demand")) is None
+    assert deadlines.seconds_until_next() == 60
+
+    assert deadlines.run_due() == 0
+    clock.now = datetime(2026, 10, 16, 9, 30)
+    assert deadlines.run_due() == 2
+    assert fired == [("delivery", "scheduled (09:00)"), ("risk", "scheduled (every 30min)")]
+    assert deadlines.upcoming() == [(datetime(2026, 10, 16, 9, 59), "risk"), (datetime(2026, 10, 16, 17, 0), "delivery")]
+
+
+def test_missed_deadlines_fire_once():
+    clock = Clock(datetime(2026, 10, 16, 9, 0))
+    fired = []
+    deadlines = DeadlineScheduler(lambda role, reason: fired.append(role), clock)
+    deadlines.add("risk", parse_schedule_spec("every 10 minutes"))
+    clock.now = datetime(2026, 10, 16, 13, 5)  # woke up after four hours asleep
+    assert deadlines.run_due() == 1
+    assert deadlines.next_deadline() == datetime(2026, 10, 16, 13, 10)
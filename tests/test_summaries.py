@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock
+
+import summaries
+
+DAY = "2026-10-16"
+LOG = f"""# Delivery Log — {DAY}
+
+## Run 09:00 (scheduled)
+Checked the timeline. Vendor is late.
+
+## Run 14:00 (inbox trigger)
+Escalated the vendor delay to the User.
+"""
+
+
+class FakeModel:
+    """Stands in for query(): answers every prompt with a numbered summary."""
+
+    def __init__(self, fail=False):
+        self.prompts = []
+        self.fail = fail
+
+    async def __call__(self, prompt, options):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("overloaded")
+        yield AssistantMessage(content=[TextBlock(text=f"- summary {len(self.prompts)}")], model=options.model)
+        yield ResultMessage(subtype="success", duration_ms=1, duration_api_ms=1, is_error=False, num_turns=1,
+                            session_id="s", total_cost_usd=0.001)
+
+
+def write_log(text, role="delivery", day=DAY):
+    path = summaries.role_log_path(role, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_split_runs_drops_the_header():
+    sections = summaries.split_runs(LOG)
+    assert [s.heading for s in sections] == ["## Run 09:00 (scheduled)", "## Run 14:00 (inbox trigger)"]
+    assert sections[1].text == "## Run 14:00 (inbox trigger)\nEscalated the vendor delay to the User."
+    assert summaries.split_runs("# Delivery Log\n\nNo runs yet.\n") == []
+
+
+def test_run_sections_are_summarized_once(vault):
+    write_log(LOG)
+    model = FakeModel()
+    first = asyncio.run(summaries.summarize_runs(summaries.Summarizer(model), "delivery", DAY))
+    assert [heading for heading, _ in first] == ["## Run 09:00 (scheduled)", "## Run 14:00 (inbox trigger)"]
+    assert len(model.prompts) == 2
+
+    write_log(LOG + "\n## Run 17:00 (scheduled)\nWrapped up.\n")
+    summarizer = summaries.Summarizer(model)
+    again = asyncio.run(summaries.summarize_runs(summarizer, "delivery", DAY))
+    assert again[:2] == first and len(again) == 3
+    assert summarizer.calls == 1 and "Wrapped up." in model.prompts[-1]
+
+
+def test_failed_calls_are_not_cached_and_the_daily_waits(vault):
+    write_log(LOG)
+    assert asyncio.run(summaries.compile_daily(summaries.Summarizer(FakeModel(fail=True)), DAY)) is False
+    assert not os.path.exists(summaries.daily_path(DAY))
+
+    model = FakeModel()
+    assert asyncio.run(summaries.compile_daily(summaries.Summarizer(model), DAY)) is True
+    assert len(model.prompts) == 3  # two runs, then the day's reduction
+    with open(summaries.daily_path(DAY)) as f:
+        assert f.read() == f"# Daily Summary — {DAY}\n\n## Delivery\n\n- summary 3\n"
+
+    # The file is the "already done" check
+    assert asyncio.run(summaries.compile_daily(summaries.Summarizer(model), DAY)) is True
+    assert len(model.prompts) == 3
@@ -0,0 +1,43 @@
+import gzip
+
+from claude_agent_sdk import AssistantMessage, TextBlock
+
+import config
+import transcripts
+
+
+def test_a_run_round_trips_through_the_writer(vault, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TRANSCRIPTS", True)
+    monkeypatch.setattr(config, "TRANSCRIPTS_DIR", str(tmp_path / "transcripts"))
+
+    transcript = transcripts.start("delivery", 7, trigger="scheduled", model="sonnet", user_message="Go")
+    path = transcript.path
+    transcript.message(AssistantMessage(content=[TextBlock(text="Checked the blockers.")], model="sonnet"))
+    transcript.close({"status": "ok"})
+    transcript.add("late", note="after close")  # discarded
+    transcripts.flush()
+
+    assert path.startswith(str(tmp_path / "transcripts" / "acme" / "delivery")) and path.endswith("-run7.jsonl.gz")
+    records = transcripts.read(path)
+    assert [r["kind"] for r in records] == ["run", "message", "end"]
+    assert (records[0]["vault"], records[0]["run_id"], records[0]["user_message"]) == ("acme", 7, "Go")
+    message = records[1]["message"]
+    assert message["type"] == "AssistantMessage"
+    assert message["content"] == [{"type": "TextBlock", "text": "Checked the blockers."}]
+    assert records[2]["metrics"] == {"status": "ok"}
+    assert all(r["t"] >= 0 for r in records)
+
+
+def test_writer_appends_gzip_members_and_restarts_after_flush(tmp_path):
+    path = str(tmp_path / "nested" / "run.jsonl.gz")
+    writer = transcripts._Writer()
+    writer.put(path, {"n": 1})
+    writer.put(path, {"n": 2})
+    writer.stop()
+    with gzip.open(path, "rt") as f:
+        assert f.read() == '{"n": 1}\n{"n": 2}\n'
+
+    writer.put(path, {"n": 3})  # a new thread reopens the file and appends another gzip member
+    writer.put(path, transcripts._CLOSE)
+    writer.stop()
+    assert [r["n"] for r in transcripts.read(path)] == [1, 2, 3]
@@ -0,0 +1,74 @@
+import os
+
+from vault_cache import VaultCache
+
+
+def write(path, text, mtime_ns=None):
+    with open(path, "w") as f:
+        f.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_unchanged_files_are_served_from_memory(tmp_path):
+    cache = VaultCache(max_bytes=1024)
+    path = write(tmp_path / "a.md", "alpha")
+    first = cache.entry(path)
+    assert cache.entry(path) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_mtime_size_or_inode_change_rereads_the_file(tmp_path):
+    cache = VaultCache(max_bytes=1024)
+    path = write(tmp_path / "a.md", "alpha", mtime_ns=1_000_000_000)
+    digest = cache.digest(path)
+
+    # Same size, new mtime
+    write(path, "omega", mtime_ns=2_000_000_000)
+    assert cache.read_text(path) == "omega" and cache.digest(path) != digest
+    # Same mtime, new size
+    write(path, "omega!", mtime_ns=2_000_000_000)
+    assert cache.read_text(path) == "omega!"
+    # Same mtime and size, new inode (an editor's atomic save)
+    replacement = write(tmp_path / "a.md.tmp", "delta!", mtime_ns=2_000_000_000)
+    os.replace(replacement, path)
+    assert cache.read_text(path) == "delta!"
+    assert cache.misses == 4
+
+
+def test_least_recently_used_files_are_evicted_first(tmp_path):
+    cache = VaultCache(max_bytes=10)
+    a, b, c = (write(tmp_path / f"{name}.md", name * 4) for name in "abc")
+    cache.entry(a)
+    cache.entry(b)
+    cache.entry(a)  # b is now the least recently used
+    cache.entry(c)
+    assert cache.evictions == 1
+    assert cache.stats()["files"] == 2 and cache.stats()["bytes"] == 8
+    hits = cache.hits
+    cache.entry(a)
+    cache.entry(c)
+    assert cache.hits == hits + 2
+    cache.entry(b)
+    assert cache.misses == 4
+
+
+def test_files_over_the_budget_are_not_kept(tmp_path):
+    cache = VaultCache(max_bytes=4)
+    path = write(tmp_path / "big.md", "too large")
+    assert cache.read_text(path) == "too large"
+    assert cache.stats()["files"] == 0
+
+
+def test_directory_listing_is_relisted_when_an_entry_changes(tmp_path):
+    cache = VaultCache(max_bytes=1024)
+    write(tmp_path / "a.md", "alpha")
+    (tmp_path / "sub").mkdir()
+    assert cache.list_dir(tmp_path) == [("a.md", True, False), ("sub", False, True)]
+    assert cache.list_dir(tmp_path) == [("a.md", True, False), ("sub", False, True)]
+    assert (cache.dir_hits, cache.dir_misses) == (1, 1)
+
+    os.remove(tmp_path / "a.md")
+    os.utime(tmp_path, ns=(3_000_000_000, 3_000_000_000))  # make the change visible on coarse clocks
+    assert cache.list_dir(tmp_path) == [("sub", False, True)]
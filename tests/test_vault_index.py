@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from frontmatter import PRIORITY_RANK
+from vault_index import VaultIndex
+
+
+def write(root, rel, text, mtime_ns=None):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def index(tmp_path):
+    root = str(tmp_path / "vault")
+    write(root, "agent/inbox/delivery/vendor.md", "---\nfrom: risk\npriority: high\n---\nVendor late.", 1_000)
+    write(root, "agent/inbox/delivery/note.md", "No frontmatter.", 2_000)
+    write(root, "agent/inbox/delivery/.gitkeep", "")
+    write(root, "agent/inbox/user/q1.md", "---\nfrom: delivery\nstatus: open\ndate: 2026-10-01\n---\nShip?")
+    write(root, "agent/inbox/user/q2.md", "---\nfrom: risk\nstatus: answered\n---\nEscalate?")
+    write(root, "agent/logs/delivery/2026-10-16.md", "---\npriority: high\n---\nlogs are not indexed")
+    index = VaultIndex(str(tmp_path / "index.db"), root)
+    yield index
+    index.close()
+
+
+def test_refresh_reads_only_new_changed_or_removed_files(index):
+    assert index.refresh() == 4
+    assert index.refresh() == 0
+
+    write(index.vault, "agent/inbox/delivery/note.md", "---\npriority: low\n---\nNow with frontmatter.", 3_000)
+    os.remove(os.path.join(index.vault, "agent/inbox/user/q2.md"))
+    write(index.vault, "project/blockers/api.md", "---\nid: B-1\n---\nAPI auth.")
+    assert index.refresh() == 3
+    assert [i["path"] for i in index.items_in("agent/inbox/user")] == ["agent/inbox/user/q1.md"]
+    assert index.items_in("project/blockers")[0]["id"] == "B-1"
+
+
+def test_queries_use_the_frontmatter_fields(index):
+    items = index.items_in("agent/inbox/delivery/")
+    assert [(i["path"], i["priority"], i["from_role"]) for i in items] == [
+        ("agent/inbox/delivery/vendor.md", PRIORITY_RANK["high"], "risk"),
+        ("agent/inbox/delivery/note.md", None, None),
+    ]
+    assert index.dir_status("agent/inbox/delivery") == (PRIORITY_RANK["high"], 1_000 / 1e9)
+    assert index.dir_status("agent/inbox/comms") is None
+    assert [q["path"] for q in index.open_questions()] == ["agent/inbox/user/q1.md"]
+    assert index.open_questions("risk") == []
+    assert [t["path"] for t in index.high_priority_triggers()] == ["agent/inbox/delivery/vendor.md"]
@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+import pytest
+
+import watcher
+
+pytestmark = pytest.mark.skipif(not watcher.is_available(), reason="watchdog not installed")
+
+
+def test_a_burst_of_inbox_files_fires_one_callback(tmp_path):
+    inbox = tmp_path / "delivery"
+    answered = tmp_path / "answered"
+    inbox.mkdir()
+    answered.mkdir()
+    fired = []
+
+    async def main():
+        got = asyncio.Event()
+
+        async def on_role(key):
+            fired.append(("role", key))
+            got.set()
+
+        async def on_answered(name):
+            fired.append(("answered", name))
+            got.set()
+
+        inbox_watcher = watcher.InboxWatcher(on_role, on_answered, debounce=0.2)
+        assert inbox_watcher.start({"acme/delivery": str(inbox)}, {"acme": str(answered)})
+        try:
+            (inbox / ".hidden").write_text("ignored")
+            for i in range(5):
+                (inbox / f"2026-10-17-item{i}.md").write_text("burst")
+            await asyncio.wait_for(got.wait(), timeout=5)
+            await asyncio.sleep(0.4)  # nothing else fires once the debounce window has closed
+            assert fired == [("role", "acme/delivery")]
+
+            got.clear()
+            (answered / "reply.md").write_text("Yes, go ahead.")
+            await asyncio.wait_for(got.wait(), timeout=5)
+            assert fired[-1] == ("answered", "acme")
+        finally:
+            inbox_watcher.stop()
+
+    asyncio.run(main())
+
+
+def test_a_failing_callback_is_logged_and_the_watcher_keeps_going(tmp_path, caplog):
+    inbox = tmp_path / "risk"
+    inbox.mkdir()
+    calls = []
+
+    async def main():
+        async def on_role(key):
+            calls.append(key)
+            raise RuntimeError("boom")
+
+        async def on_answered(name):
+            pass
+
+        inbox_watcher = watcher.InboxWatcher(on_role, on_answered, debounce=0.05)
+        assert inbox_watcher.start({"acme/risk": str(inbox)}, {})
+        try:
+            for expected, name in enumerate(("first.md", "second.md"), start=1):
+                (inbox / name).write_text("x")
+                while len(calls) < expected:
+                    await asyncio.sleep(0.02)
+                await asyncio.sleep(0.1)  # let the debounce window close
+        finally:
+            inbox_watcher.stop()
+
+    asyncio.run(asyncio.wait_for(main(), timeout=10))
+    assert calls == ["acme/risk", "acme/risk"]
+    assert "Callback for acme/risk failed: boom" in caplog.text
+
+
+def test_missing_directories_are_not_watched(tmp_path):
+    async def noop(key):
+        pass
+
+    async def main():
+        inbox_watcher = watcher.InboxWatcher(noop, noop)
+        assert not inbox_watcher.start({"acme/comms": os.path.join(tmp_path, "missing")}, {})
+
+    asyncio.run(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Run transcripts — one gzip-compressed JSONL file per role run.
+
+The text log keeps a short preview of each assistant message; the transcript
+keeps everything needed to replay or audit a run:
+
+    run       header: vault, role, trigger, model and routing, resumed session,
+              allowed tools, the full system prompt and user message
+    message   one per SDK message: its type and every field (text, tool_use
+              blocks with their input, tool results, usage, cost, ...)
+    end       the run's metrics record (status, phase timings, tokens, cost)
+
+Every record carries `t`, seconds since the transcript was opened. Files live
+at TRANSCRIPTS_DIR/<vault>/<role>/<YYYY-MM-DD>/<HHMMSS>-run<id>.jsonl.gz.
+
+Records are handed to one background writer thread, which serializes and
+compresses them and owns the open files, so a run never waits on disk.
+
+Usage:
+    python3 transcripts.py                     # List the 20 most recent transcripts
+    python3 transcripts.py --role delivery     # ... of one role
+    python3 transcripts.py <file.jsonl.gz>     # Replay a transcript as text
+"""
+
+import argparse
+import atexit
+import dataclasses
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+import config
+
+log = logging.getLogger("tpm-runner")
+
+_CLOSE = object()  # record sentinel: close the file
+_STOP = None  # queue sentinel: stop the writer thread
+
+
+def _default(obj):
+    """JSON fallback for SDK message and content-block dataclasses."""
+    if dataclasses.is_dataclass(obj):
+        fields = {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+        return {"type": type(obj).__name__, **fields}
+    return repr(obj)
+
+
+class _Writer:
+    """Background thread that appends records to gzip files, in submission order."""
+
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def put(self, path: str, record):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="transcripts", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+        self._queue.put((path, record))
+
+    def stop(self):
+        """Write everything queued so far, close all files and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _loop(self):
+        files: dict[str, gzip.GzipFile] = {}
+        while (item := self._queue.get()) is not _STOP:
+            path, record = item
+            try:
+                if record is _CLOSE:
+                    f = files.pop(path, None)
+                    if f is not None:
+                        f.close()
+                    continue
+                f = files.get(path)
+                if f is None:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    f = files[path] = gzip.open(path, "at", encoding="utf-8", compresslevel=6)
+                f.write(json.dumps(record, default=_default) + "\n")
+            except (OSError, TypeError, ValueError) as e:
+                log.warning(f"[transcripts] Could not write {path}: {e}")
+        for f in files.values():
+            f.close()
+
+
+_writer = _Writer()
+
+
+class Transcript:
+    """The transcript of one run. A transcript without a path discards everything."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._t0 = time.perf_counter()
+
+    def add(self, kind: str, **data):
+        if self.path is not None:
+            _writer.put(self.path, {"kind": kind, "t": round(time.perf_counter() - self._t0, 4), **data})
+
+    def message(self, message):
+        self.add("message", message=message)
+
+    def close(self, metrics: dict):
+        """Write the end record and close the file."""
+        if self.path is not None:
+            self.add("end", metrics=metrics)
+            _writer.put(self.path, _CLOSE)
+            self.path = None
+
+
+def start(role_name: str, run_id: int | None, **header) -> Transcript:
+    """Open the transcript of a run of one of the current vault's roles and write its header."""
+    if not config.TRANSCRIPTS:
+        return Transcript(None)
+    now = datetime.now(timezone.utc)
+    vault = config.vault().name
+    path = os.path.join(
+        config.TRANSCRIPTS_DIR, vault, role_name, now.strftime("%Y-%m-%d"), f"{now:%H%M%S}-run{run_id}.jsonl.gz",
+    )
+    transcript = Transcript(path)
+    transcript.add("run", vault=vault, role=role_name, run_id=run_id,
+                   started_at=now.strftime("%Y-%m-%dT%H:%M:%SZ"), **header)
+    return transcript
+
+
+def flush():
+    """Block until every queued record is on disk (the writer restarts on the next record)."""
+    _writer.stop()
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+def read(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _render_block(block: dict) -> str:
+    kind = block.get("type", "")
+    if kind == "TextBlock":
+        return block["text"]
+    if kind == "ToolUseBlock":
+        return f"→ {block['name']} {json.dumps(block['input'])[:500]}"
+    if kind == "ToolResultBlock":
+        content = block.get("content")
+        text = content if isinstance(content, str) else json.dumps(content)
+        return f"← {'error ' if block.get('is_error') else ''}{(text or '')[:500]}"
+    if kind == "ThinkingBlock":
+        return f"(thinking) {block.get('thinking', '')[:500]}"
+    return json.dumps(block)[:500]
+
+
+def replay(path: str):
+    for record in read(path):
+        t = f"{record['t']:8.2f}s"
+        if record["kind"] == "run":
+            print(f"{t}  run {record['run_id']} of {record['vault']}/{record['role']} — {record['trigger']} "
+                  f"(model {record['model']}, {record.get('routing') or 'no routing'})")
+            print(f"{'':10}system prompt {len(record['system_prompt'])} chars, "
+                  f"user message {len(record['user_message'])} chars")
+        elif record["kind"] == "message":
+            message = record["message"]
+            content = message.get("content")
+            if isinstance(content, list):
+                for block in content:
+                    print(f"{t}  {message['type']:<16} {_render_block(block)}")
+            elif message.get("type") == "ResultMessage":
+                print(f"{t}  ResultMessage    {message.get('subtype')}, {message.get('num_turns')} turns, "
+                      f"${message.get('total_cost_usd') or 0:.4f}, usage {json.dumps(message.get('usage'))}")
+            else:
+                print(f"{t}  {message.get('type', '?'):<16} {json.dumps(message)[:300]}")
+        elif record["kind"] == "end":
+            m = record["metrics"]
+            phases = " ".join(f"{k}={v:.0f}ms" for k, v in m.get("phases_ms", {}).items())
+            print(f"{t}  end — {m['status']}, cost {m.get('cost_usd')}, {phases}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or replay run transcripts")
+    parser.add_argument("path", nargs="?", help="Transcript file to replay")
+    parser.add_argument("--role", type=str, default=None, help="Only list transcripts of this role")
+    parser.add_argument("--vault", type=str, default="*", help="Only list transcripts of this vault")
+    parser.add_argument("--limit", type=int, default=20, help="Number of transcripts to list")
+    args = parser.parse_args()
+
+    if args.path:
+        replay(args.path)
+        return
+    pattern = os.path.join(config.TRANSCRIPTS_DIR, args.vault, args.role or "*", "*", "*.jsonl.gz")
+    paths = sorted(glob.glob(pattern), key=lambda p: (os.path.basename(os.path.dirname(p)), os.path.basename(p)))
+    for path in paths[-args.limit:]:
+        print(f"{os.path.getsize(path):>9}  {os.path.relpath(path, config.TRANSCRIPTS_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
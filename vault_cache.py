@@ -0,0 +1,218 @@
+"""Vault file cache — serves unchanged vault files from memory.
+
+Several roles load the same context files (project/blockers/, memory.md,
+CLAUDE.md, ...) many times per hour. The cache keeps file contents keyed by
+path and validated against (mtime_ns, size, inode) from a single os.stat(),
+so an unchanged file is never re-read. Each entry also carries a SHA-256
+digest of its contents, which other components use as a content address.
+
+Files over a caller's size limit are never read whole: they are mapped
+(mmap), hashed in place, and only a head and a tail window are decoded and
+kept. `gap` on the entry is the byte range that was left out.
+
+Directory listings are cached separately and only re-listed when the
+directory's own mtime changes (i.e. an entry was added, removed or renamed).
+
+Memory use is bounded by a byte budget with least-recently-used eviction.
+
+`entries()` looks up many files at once on a small thread pool
+(VAULT_IO_THREADS), so the stat() and read latency of a network-mounted
+vault is paid concurrently rather than once per file.
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import config
+
+
+@dataclass(frozen=True, slots=True)
+class _Signature:
+    mtime_ns: int
+    size: int
+    inode: int
+
+    @classmethod
+    def of(cls, st: os.stat_result) -> "_Signature":
+        return cls(st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+@dataclass(slots=True)
+class CachedFile:
+    sig: _Signature
+    text: str  # the whole file, or its head window if `gap` is set
+    digest: str  # of the whole file
+    cost: int
+    tail: str = ""
+    gap: tuple[int, int] | None = None  # byte range between head and tail that was not read
+    window: int = 0  # window size used for head and tail (0 = whole file)
+
+
+def _read_windows(path: str, sig: _Signature, window: int) -> CachedFile:
+    """Hash the whole file and decode only `window` bytes from each end.
+
+    Windows are cut at a line break when there is one in their inner half.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        digest = hashlib.sha256(mm).hexdigest()
+        size = len(mm)
+        head_end = mm.rfind(b"\n", window // 2, window) + 1 or window
+        tail_start = mm.find(b"\n", size - window, size - window // 2) + 1 or size - window
+        head = mm[:head_end].decode("utf-8", "ignore")
+        tail = mm[tail_start:].decode("utf-8", "ignore")
+    return CachedFile(sig, head, digest, cost=head_end + size - tail_start, tail=tail,
+                      gap=(head_end, tail_start), window=window)
+
+
+@dataclass(slots=True)
+class _DirEntry:
+    sig: _Signature
+    entries: list[tuple[str, bool, bool]]  # (name, is_file, is_dir), sorted by name
+
+
+class VaultCache:
+    """Process-wide, thread-safe LRU cache of vault file contents and listings."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._files: OrderedDict[str, CachedFile] = OrderedDict()
+        self._dirs: dict[str, _DirEntry] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dir_hits = 0
+        self.dir_misses = 0
+
+    # -- files --------------------------------------------------------------
+
+    def entry(self, path: str, limit: int = 0) -> CachedFile:
+        """Return the cached (text, digest) entry, re-reading only if the file changed.
+
+        With `limit`, a file larger than `limit` bytes is read as head and tail
+        windows of `limit // 4` bytes each (see CachedFile.gap).
+        """
+        path = os.path.abspath(path)
+        sig = _Signature.of(os.stat(path))
+        window = limit // 4 if 0 < limit < sig.size else 0
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None and entry.sig == sig and entry.window == window:
+                self._files.move_to_end(path)
+                self.hits += 1
+                return entry
+
+        if window:
+            entry = _read_windows(path, sig, window)
+        else:
+            with open(path) as f:
+                text = f.read()
+            digest = hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest()
+            entry = CachedFile(sig, text, digest, cost=max(sig.size, len(text)))
+
+        with self._lock:
+            self.misses += 1
+            old = self._files.pop(path, None)
+            if old is not None:
+                self._bytes -= old.cost
+            if entry.cost <= self.max_bytes:
+                self._files[path] = entry
+                self._bytes += entry.cost
+                self._evict()
+        return entry
+
+    def entries(self, paths: list[str], limit: int = 0) -> list[CachedFile]:
+        """entry() for many files, in order; looked up concurrently on the vault I/O pool."""
+        if len(paths) < 2 or config.VAULT_IO_THREADS <= 1:
+            return [self.entry(path, limit) for path in paths]
+        return list(_io_pool().map(lambda path: self.entry(path, limit), paths))
+
+    def read_text(self, path: str) -> str:
+        """Return the file's contents, re-reading only if it changed on disk."""
+        return self.entry(path).text
+
+    def digest(self, path: str) -> str:
+        """Return the SHA-256 hex digest of the file's current contents."""
+        return self.entry(path).digest
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._files:
+            _, old = self._files.popitem(last=False)
+            self._bytes -= old.cost
+            self.evictions += 1
+
+    # -- directories --------------------------------------------------------
+
+    def list_dir(self, path: str) -> list[tuple[str, bool, bool]]:
+        """Return sorted (name, is_file, is_dir) tuples for a directory.
+
+        The listing is reused until the directory's mtime changes.
+        """
+        path = os.path.abspath(path)
+        sig = _Signature.of(os.stat(path))
+        with self._lock:
+            entry = self._dirs.get(path)
+            if entry is not None and entry.sig == sig:
+                self.dir_hits += 1
+                return entry.entries
+
+        with os.scandir(path) as it:
+            entries = sorted(
+                (e.name, e.is_file(), e.is_dir()) for e in it
+            )
+        with self._lock:
+            self.dir_misses += 1
+            self._dirs[path] = _DirEntry(sig, entries)
+        return entries
+
+    # -- housekeeping -------------------------------------------------------
+
+    def invalidate(self, path: str | None = None):
+        """Drop one path (file or directory), or everything if path is None."""
+        with self._lock:
+            if path is None:
+                self._files.clear()
+                self._dirs.clear()
+                self._bytes = 0
+                return
+            path = os.path.abspath(path)
+            old = self._files.pop(path, None)
+            if old is not None:
+                self._bytes -= old.cost
+            self._dirs.pop(path, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "files": len(self._files),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "dir_hits": self.dir_hits,
+                "dir_misses": self.dir_misses,
+            }
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _io_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=config.VAULT_IO_THREADS, thread_name_prefix="vault-io")
+        return _pool
+
+
+cache = VaultCache(config.VAULT_CACHE_MAX_BYTES)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Vault index — persistent frontmatter metadata for every item under agent/ and project/.
+
+Triggers, questions, blockers and goals carry YAML frontmatter (id, from, to,
+priority, status, date). The index keeps those fields in a SQLite database
+(WAL mode, like the run store) so routing, dispatch and reporting can query
+them instead of opening files.
+
+Updates are incremental: `refresh()` walks a directory with scandir, compares
+each file's (mtime_ns, size) to the stored row, re-reads only the frontmatter
+head of files that changed, and deletes rows for files that are gone. Role
+logs (agent/logs/) hold no frontmatter and are not indexed. The database is
+a cache — deleting it just costs one full re-read.
+
+Usage (reporting):
+    python3 vault_index.py                     # Open questions + high-priority triggers
+    python3 vault_index.py --older-than 14     # Items dated more than 14 days ago
+    python3 vault_index.py --vault acme        # ... for another configured vault
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import config
+import frontmatter
+
+ROOTS = ("agent", "project")
+SKIP_DIRS = frozenset({os.path.join("agent", "logs")})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    path        TEXT PRIMARY KEY,
+    dir         TEXT NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    id          TEXT,
+    from_role   TEXT,
+    to_role     TEXT,
+    priority    INTEGER,
+    status      TEXT,
+    date        TEXT,
+    fields      TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS items_dir ON items (dir);
+CREATE INDEX IF NOT EXISTS items_status ON items (status, from_role);
+CREATE INDEX IF NOT EXISTS items_priority ON items (priority);
+"""
+
+
+def _row(rel: str, st: os.stat_result, fields: dict[str, str]) -> tuple:
+    priority = fields.get("priority", "").lower()
+    return (
+        rel,
+        os.path.dirname(rel),
+        st.st_mtime_ns,
+        st.st_size,
+        fields.get("id"),
+        fields.get("from"),
+        fields.get("to"),
+        frontmatter.PRIORITY_RANK.get(priority),
+        fields.get("status", "").lower() or None,
+        fields.get("date"),
+        json.dumps(fields),
+    )
+
+
+class VaultIndex:
+    """Thread-safe frontmatter index over one vault."""
+
+    def __init__(self, path: str, vault: str):
+        self.path = path
+        self.vault = vault
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            self._conn.executescript(_SCHEMA)
+
+    def _read(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, params).fetchall()]
+
+    # -- updates ------------------------------------------------------------
+
+    def _scan(self, rel_dir: str, recursive: bool, seen: dict[str, os.stat_result]):
+        full = os.path.join(self.vault, rel_dir)
+        try:
+            it = os.scandir(full)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        with it:
+            for entry in it:
+                if entry.name.startswith(".") or entry.name == ".gitkeep":
+                    continue
+                rel = os.path.join(rel_dir, entry.name)
+                if entry.is_dir():
+                    if recursive and rel not in SKIP_DIRS:
+                        self._scan(rel, True, seen)
+                elif entry.is_file():
+                    try:
+                        seen[rel] = entry.stat()
+                    except FileNotFoundError:
+                        continue  # moved while we were looking
+
+    def refresh(self, rel_dir: str | None = None, recursive: bool = True) -> int:
+        """Bring the index up to date for `rel_dir` (default: all of agent/ and project/).
+
+        Returns the number of rows added, changed or removed.
+        """
+        dirs = [os.path.normpath(rel_dir)] if rel_dir else list(ROOTS)
+        seen: dict[str, os.stat_result] = {}
+        for d in dirs:
+            self._scan(d, recursive, seen)
+
+        known = {}
+        for d in dirs:
+            if recursive:
+                rows = self._read("SELECT path, mtime_ns, size FROM items WHERE dir = ? OR dir LIKE ?",
+                                  (d, d + "/%"))
+            else:
+                rows = self._read("SELECT path, mtime_ns, size FROM items WHERE dir = ?", (d,))
+            known.update((r["path"], (r["mtime_ns"], r["size"])) for r in rows)
+
+        upserts = []
+        for rel, st in seen.items():
+            if known.get(rel) == (st.st_mtime_ns, st.st_size):
+                continue
+            try:
+                fields = frontmatter.read(os.path.join(self.vault, rel))
+            except OSError:
+                continue
+            upserts.append(_row(rel, st, fields))
+        removed = [(rel,) for rel in known if rel not in seen]
+
+        if upserts or removed:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                           upserts)
+                    self._conn.executemany("DELETE FROM items WHERE path = ?", removed)
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        return len(upserts) + len(removed)
+
+    # -- queries ------------------------------------------------------------
+
+    def items_in(self, rel_dir: str, refresh: bool = True) -> list[dict]:
+        """Items directly inside a vault-relative directory, oldest first."""
+        rel_dir = os.path.normpath(rel_dir)
+        if refresh:
+            self.refresh(rel_dir, recursive=False)
+        return self._read("SELECT * FROM items WHERE dir = ? ORDER BY mtime_ns, path", (rel_dir,))
+
+    def dir_status(self, rel_dir: str, refresh: bool = True) -> tuple[int, float] | None:
+        """(highest priority rank, oldest mtime in seconds) of a directory's items, or None if empty.
+
+        Items without a `priority:` count as medium.
+        """
+        rel_dir = os.path.normpath(rel_dir)
+        if refresh:
+            self.refresh(rel_dir, recursive=False)
+        rows = self._read(
+            "SELECT COUNT(*) AS n, MAX(COALESCE(priority, ?)) AS best, MIN(mtime_ns) AS oldest "
+            "FROM items WHERE dir = ?",
+            (frontmatter.PRIORITY_RANK["medium"], rel_dir),
+        )
+        if not rows or not rows[0]["n"]:
+            return None
+        return rows[0]["best"], rows[0]["oldest"] / 1e9
+
+    def open_questions(self, role: str | None = None) -> list[dict]:
+        """Questions to the User that are still open, optionally only those from `role`."""
+        user_dir = os.path.join("agent", "inbox", "user")
+        self.refresh(user_dir, recursive=False)
+        sql = "SELECT * FROM items WHERE dir = ? AND status = 'open'"
+        params: tuple = (user_dir,)
+        if role:
+            sql += " AND from_role = ?"
+            params += (role,)
+        return self._read(sql + " ORDER BY date, path", params)
+
+    def high_priority_triggers(self) -> list[dict]:
+        """Unprocessed high-priority trigger files in any role inbox."""
+        inbox = os.path.join("agent", "inbox")
+        self.refresh(inbox)
+        return self._read(
+            "SELECT * FROM items WHERE dir LIKE ? AND dir NOT LIKE ? AND dir != ? AND priority = ? "
+            "ORDER BY mtime_ns",
+            (inbox + "/%", "%/archive", os.path.join(inbox, "user"), frontmatter.PRIORITY_RANK["high"]),
+        )
+
+    def older_than(self, days: float, rel_dir: str | None = None) -> list[dict]:
+        """Items whose `date:` (or mtime, if undated) is more than `days` days ago."""
+        if rel_dir:
+            rel_dir = os.path.normpath(rel_dir)
+        self.refresh(rel_dir)
+        cutoff = time.time() - days * 86400
+        cutoff_iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(cutoff))
+        sql = "SELECT * FROM items WHERE ((date IS NOT NULL AND date < ?) OR (date IS NULL AND mtime_ns < ?))"
+        params: tuple = (cutoff_iso, int(cutoff * 1e9))
+        if rel_dir:
+            sql += " AND (dir = ? OR dir LIKE ?)"
+            params += (rel_dir, rel_dir + "/%")
+        return self._read(sql + " ORDER BY COALESCE(date, ''), path", params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: dict[str, VaultIndex] = {}
+_index_lock = threading.Lock()
+
+
+def get_index() -> VaultIndex:
+    """Return the current vault's index, opening it on first use."""
+    vault = config.vault()
+    with _index_lock:
+        index = _indexes.get(vault.name)
+        if index is None:
+            index = _indexes[vault.name] = VaultIndex(vault.index_path, vault.path)
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vault frontmatter index report")
+    parser.add_argument("--older-than", type=float, default=None, help="List items dated more than N days ago")
+    parser.add_argument("--dir", type=str, default=None, help="Limit --older-than to a vault-relative directory")
+    parser.add_argument("--vault", type=str, default=None, help="Vault name (default: the first configured vault)")
+    args = parser.parse_args()
+
+    if args.vault:
+        with config.use_vault(config.get_vault(args.vault)):
+            index = get_index()
+    else:
+        index = get_index()
+    t = time.perf_counter()
+    changed = index.refresh()
+    print(f"Index refreshed in {(time.perf_counter() - t) * 1000:.1f} ms ({changed} rows updated)")
+
+    if args.older_than is not None:
+        for item in index.older_than(args.older_than, args.dir):
+            print(f"  {item['date'] or '-':<22} {item['status'] or '-':<10} {item['path']}")
+        return
+
+    print("Open questions:")
+    for item in index.open_questions():
+        print(f"  {item['date'] or '-':<22} from {item['from_role'] or '?':<10} {item['path']}")
+    print("High-priority triggers:")
+    for item in index.high_priority_triggers():
+        print(f"  from {item['from_role'] or '?':<10} {item['path']}")
+
+
+if __name__ == "__main__":
+    main()
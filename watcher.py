@@ -0,0 +1,171 @@
+"""Inbox watcher — event-driven triggers from file system notifications.
+
+Watches each role's inbox (agent/inbox/<role>/) and agent/inbox/user/answered/
+of every served vault with one inotify observer (via watchdog) and calls back
+into the event loop as soon as a file lands. Bursts of writes to the same
+directory are coalesced: the first event opens a short debounce window and
+every event inside it is absorbed, so a burst fires one callback no later
+than `debounce` seconds after it began.
+
+The watcher is only a latency optimisation. The runner keeps a timed fallback
+scan for events that are missed (watch limits, network mounts, startup races).
+"""
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watcher is optional — the runner falls back to polling
+    Observer = None
+    FileSystemEventHandler = object
+    FileSystemEvent = None
+
+log = logging.getLogger("tpm-runner")
+
+ANSWERED_KEY = "user/answered"
+
+
+def is_available() -> bool:
+    """True if the watchdog backend is installed."""
+    return Observer is not None
+
+
+def _is_trigger_file(path: str) -> bool:
+    fn = os.path.basename(path)
+    return bool(fn) and not fn.startswith(".")
+
+
+class _Handler(FileSystemEventHandler):
+    """Translates watchdog events (observer thread) into loop callbacks."""
+
+    def __init__(self, watcher: "InboxWatcher"):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event: "FileSystemEvent"):
+        if event.is_directory or event.event_type not in ("created", "moved", "modified", "closed"):
+            return
+        # For moves, only the destination matters (moving *out* to archive/ is not a trigger)
+        path = event.dest_path if event.event_type == "moved" else event.src_path
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        if not _is_trigger_file(path):
+            return
+        key = self._watcher.key_for_dir(os.path.dirname(path))
+        if key is not None:
+            self._watcher.notify_threadsafe(key)
+
+
+class InboxWatcher:
+    """Watches inbox directories and fires debounced callbacks on the event loop.
+
+    `on_role(key)` fires when a role inbox receives a file (key as given in
+    `inbox_dirs`). `on_answered(name)` fires when a file lands in the
+    agent/inbox/user/answered/ directory registered under `name`. Both are
+    coroutine functions, run as tasks so their I/O never blocks the loop.
+    """
+
+    def __init__(
+        self,
+        on_role: Callable[[str], Awaitable[None]],
+        on_answered: Callable[[str], Awaitable[None]],
+        debounce: float = 0.5,
+    ):
+        self._on_role = on_role
+        self._on_answered = on_answered
+        self.debounce = debounce
+        self._dirs: dict[str, str] = {}  # abs dir -> key (role key or "<name>/user/answered")
+        self._answered: dict[str, str] = {}  # answered key -> name
+        self._pending: dict[str, asyncio.TimerHandle] = {}
+        self._callbacks: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._observer = None
+
+    def key_for_dir(self, directory: str) -> str | None:
+        return self._dirs.get(os.path.abspath(directory))
+
+    def start(self, inbox_dirs: dict[str, str], answered_dirs: dict[str, str]) -> bool:
+        """Start watching.
+
+        `inbox_dirs` maps role key -> absolute inbox path; `answered_dirs` maps
+        a name (the vault) -> its absolute answered/ path. Must be called from
+        inside the running event loop. Returns False if the watcher could not
+        start (backend missing or no watchable dirs).
+        """
+        if not is_available():
+            log.warning("[inbox-watcher] watchdog not installed — falling back to polling only")
+            return False
+
+        self._loop = asyncio.get_running_loop()
+        self._observer = Observer()
+        handler = _Handler(self)
+
+        targets = dict(inbox_dirs)
+        for name, directory in answered_dirs.items():
+            key = f"{name}/{ANSWERED_KEY}"
+            self._answered[key] = name
+            targets[key] = directory
+        for key, directory in targets.items():
+            directory = os.path.abspath(directory)
+            if not os.path.isdir(directory):
+                log.warning(f"[inbox-watcher] {directory} does not exist — not watched")
+                continue
+            try:
+                self._observer.schedule(handler, directory, recursive=False)
+            except OSError as e:
+                log.warning(f"[inbox-watcher] Could not watch {directory}: {e}")
+                continue
+            self._dirs[directory] = key
+
+        if not self._dirs:
+            self._observer = None
+            return False
+
+        self._observer.daemon = True
+        self._observer.start()
+        log.info(f"[inbox-watcher] Watching {len(self._dirs)} inbox directories")
+        return True
+
+    def stop(self):
+        for handle in self._pending.values():
+            handle.cancel()
+        self._pending.clear()
+        for task in self._callbacks:
+            task.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+
+    # -- event delivery -----------------------------------------------------
+
+    def notify_threadsafe(self, key: str):
+        """Called from the observer thread for every relevant event."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._schedule, key)
+
+    def _schedule(self, key: str):
+        if key in self._pending:
+            return  # already inside this directory's debounce window
+        self._pending[key] = self._loop.call_later(self.debounce, self._fire, key)
+
+    def _fire(self, key: str):
+        self._pending.pop(key, None)
+        if key in self._answered:
+            callback = self._on_answered(self._answered[key])
+        else:
+            log.info(f"[inbox-watcher] New file in {key} inbox")
+            callback = self._on_role(key)
+        task = self._loop.create_task(self._deliver(key, callback))
+        self._callbacks.add(task)
+        task.add_done_callback(self._callbacks.discard)
+
+    async def _deliver(self, key: str, callback: Awaitable[None]):
+        try:
+            await callback
+        except Exception as e:
+            log.error(f"[inbox-watcher] Callback for {key} failed: {e}")